@@ -6,13 +6,19 @@ from flask_login import LoginManager
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config_overrides=None):
     app = Flask(__name__)
     # Ensure the instance folder exists so SQLite can create the database file there
     os.makedirs(app.instance_path, exist_ok=True)
     app.config['SECRET_KEY'] = 'your-secret-key-here'  # Add secret key for sessions
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(app.instance_path, "db.db")}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    import config
+    app.config['MAX_CONTENT_LENGTH'] = config.MAX_CONTENT_LENGTH
+    app.config['EXPORT_DIR'] = config.EXPORT_DIR or os.path.join(os.path.dirname(app.root_path), 'uploads')
+    # e.g. a separate database for scripts and stress tests
+    if config_overrides:
+        app.config.update(config_overrides)
     db.init_app(app)
 
     login_manager.init_app(app)
@@ -22,6 +28,9 @@ def create_app():
     with app.app_context():
         db.create_all()
 
+    from .services.user_cache import register_invalidation_events
+    register_invalidation_events()
+
     from .routes import bp
     from .auth import auth_bp
     from .agent import agent_bp
@@ -31,10 +40,17 @@ def create_app():
 
     from .migration import migration_bp
     app.register_blueprint(migration_bp)
+
+    from .assets import init_assets
+    init_assets(app)
+
+    from .http_cache import init_http_cache
+    init_http_cache(app)
     
     return app
 
 @login_manager.user_loader
 def load_user(user_id):
-    from .models import User
-    return User.query.get(int(user_id))
+    # Cached identity (id, email, accessible project ids), see services/user_cache.py
+    from .services.user_cache import load_cached_user
+    return load_cached_user(int(user_id))
@@ -1,41 +1,22 @@
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, abort
 from flask_login import login_required, current_user
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 import os
 import json
+import uuid
 from datetime import datetime
 from . import db
-from .models import Requirement, RequirementVersion, Project, ProjectFile
+from .models import Requirement, RequirementVersion, Project, ProjectFile, normalize_key, version_label
 from .services.ai_client import AIClient, generate_new_requirements, optimize_excel_requirements
-from .services.exel_service import parse_excel_to_data
+from .services.exel_service import parse_workbook_sheets
+from .services.import_service import latest_fingerprint, preview_import, record_to_row
+from .services.similarity_service import DuplicateDetector, text_vector, vector_to_bytes
+from .services.upload_service import UploadError, spool_upload
 
 agent_bp = Blueprint('agent', __name__, url_prefix='/agent')
 
 
-def normalize_key(title: str) -> str:
-    """
-    Normalize a requirement title to create a unique key.
-    
-    Args:
-        title (str): The requirement title
-    
-    Returns:
-        str: Normalized key (lowercase, no special chars, max 100 chars)
-    """
-    import re
-    # Convert to lowercase and replace spaces with underscores
-    key = title.lower().strip()
-    # Remove special characters except underscores and hyphens
-    key = re.sub(r'[^a-z0-9_\-]', '_', key)
-    # Replace multiple underscores with single underscore
-    key = re.sub(r'_+', '_', key)
-    # Trim to max 100 characters
-    key = key[:100]
-    # Remove leading/trailing underscores
-    key = key.strip('_')
-    return key
-
-
 @agent_bp.route('/<int:project_id>')
 @login_required
 def agent_page(project_id):
@@ -59,7 +40,7 @@ def upload_page(project_id):
     """Render a dedicated upload page where users can upload an Excel file to be
     analyzed/optimized by the AI."""
     project = Project.query.get_or_404(project_id)
-    if project.user_id != current_user.id and current_user not in project.shared_with:
+    if not project.is_accessible_by(current_user):
         abort(403)
     
     # Import available models from config
@@ -94,21 +75,28 @@ def upload_excel_route(project_id):
                 'error': 'Bitte eine gültige Excel-Datei (.xlsx oder .xls) hochladen.'
             }), 400
         
-        # Secure filename and add timestamp
+        # Secure filename and add timestamp (plus random suffix for uploads in the same second)
         filename = secure_filename(file.filename)
         name, ext = os.path.splitext(filename)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{name}_{timestamp}{ext}"
+        unique_filename = f"{name}_{timestamp}_{uuid.uuid4().hex[:8]}{ext}"
 
-        # Save file permanently
+        # Save file permanently (streamed to disk in chunks, content checked first)
         uploads_dir = os.path.join('uploads')
-        os.makedirs(uploads_dir, exist_ok=True)
+        try:
+            upload = spool_upload(file, directory=uploads_dir)
+        except UploadError as e:
+            return jsonify({
+                'ok': False,
+                'error': str(e)
+            }), 400
         uploaded_file_path = os.path.join(uploads_dir, unique_filename)
-        file.save(uploaded_file_path)
+        os.replace(upload.path, uploaded_file_path)
 
         try:
-            # Parse Excel file
-            excel_data = parse_excel_to_data(uploaded_file_path)
+            # Parse all sheets, or only those named in the form (comma-separated)
+            sheet_names = [name.strip() for name in request.form.get('sheets', '').split(',') if name.strip()]
+            excel_data = parse_workbook_sheets(uploaded_file_path, sheet_names or None)
             
             # Remove system columns (Version, ID)
             cleaned_excel_data = []
@@ -123,8 +111,19 @@ def upload_excel_route(project_id):
                     'error': 'Keine Daten in der Excel-Datei gefunden.'
                 }), 400
 
+            # Dry run: validate the rows as uploaded (before AI optimization), write nothing
+            if request.form.get('dry_run') == '1':
+                os.remove(uploaded_file_path)
+                rows = (record_to_row(number, record) for number, record in enumerate(cleaned_excel_data, 1))
+                return jsonify({
+                    'ok': True,
+                    'dry_run': True,
+                    'report': preview_import(project_id, rows)
+                })
+
             # Extract column names from Excel (do NOT save to project)
-            excel_columns = list(cleaned_excel_data[0].keys())
+            # Sheets can have different headers - take the columns of all rows
+            excel_columns = list(dict.fromkeys(col for row in cleaned_excel_data for col in row))
             filtered_columns = [col for col in excel_columns if col and col.strip()]
             
             # Use Excel columns directly for AI optimization
@@ -136,6 +135,7 @@ def upload_excel_route(project_id):
                 filename=filename,
                 filepath=uploaded_file_path,
                 file_type='upload',
+                content_hash=upload.sha256,
                 created_by_id=current_user.id
             )
             db.session.add(project_file)
@@ -173,36 +173,14 @@ def upload_excel_route(project_id):
                 }), 400
 
             # Import optimized requirements
-            saved_count = 0
-            for req_data in optimized_reqs:
-                # Find title
-                title = None
-                for title_key in ['title', 'Title', 'titel', 'Titel', 'name', 'Name']:
-                    if title_key in req_data:
-                        title = req_data.get(title_key, '').strip()
-                        if title:
-                            break
-                
-                if not title:
-                    for key, value in req_data.items():
-                        if value and str(value).strip():
-                            title = str(value).strip()
-                            break
-                
-                # Find description
-                description = None
-                for desc_key in ['description', 'Description', 'beschreibung', 'Beschreibung', 'text', 'Text']:
-                    if desc_key in req_data:
-                        description = req_data.get(desc_key, '').strip()
-                        if description:
-                            break
-                
-                if not description:
-                    values = [str(v).strip() for v in req_data.values() if v and str(v).strip() and str(v).strip() != title]
-                    description = values[0] if values else "Keine Beschreibung"
-                
-                if not title:
+            saved_count = unchanged_count = 0
+            duplicates = DuplicateDetector(project_id)
+            for number, req_data in enumerate(optimized_reqs, 1):
+                # Title, description, category and status (with fallbacks)
+                item = record_to_row(number, req_data)
+                if item.errors:
                     continue
+                title, description = item.title, item.description
                 
                 # Create normalized key
                 key = normalize_key(title)
@@ -210,65 +188,47 @@ def upload_excel_route(project_id):
                 # Check if requirement exists
                 existing_req = Requirement.query.filter_by(project_id=project_id, key=key).first()
                 
+                # Reworded titles get a new key - match them by text similarity instead
+                vector = text_vector(title, description)
                 if not existing_req:
-                    req = Requirement(project_id=project_id, key=key)
-                    db.session.add(req)
-                    db.session.flush()
-                    version_index = 1
-                    version_label = 'A'
-                else:
+                    duplicate_id = duplicates.find_duplicate(title, vector)
+                    if duplicate_id:
+                        existing_req = Requirement.query.get(duplicate_id)
+                
+                created = False
+                if existing_req:
                     req = existing_req
-                    db.session.refresh(req)
-                    
-                    if req.versions:
-                        max_version_index = max(v.version_index for v in req.versions)
-                        version_index = max_version_index + 1
-                    else:
-                        version_index = 1
-                    version_label = chr(ord('A') + (version_index - 1))
+                else:
+                    req, created = Requirement.create_or_get(project_id, key)
                 
-                # Get category
-                category = ''
-                for cat_key in ['category', 'Category', 'kategorie', 'Kategorie', 'cat', 'Cat']:
-                    if cat_key in req_data:
-                        category = req_data.get(cat_key, '').strip()
-                        if category:
-                            break
+                if not created and latest_fingerprint(req.id) == item.fingerprint:
+                    # Same content as the latest version - no new version
+                    unchanged_count += 1
+                    continue
                 
-                # Get status
-                status = 'Offen'
-                for status_key in ['status', 'Status']:
-                    if status_key in req_data:
-                        status_val = req_data.get(status_key, '').strip()
-                        if status_val in ['Offen', 'In Arbeit', 'Fertig']:
-                            status = status_val
-                            break
+                version_index = req.allocate_version_index()
                 
                 # Create version
                 new_version = RequirementVersion(
                     requirement_id=req.id,
                     version_index=version_index,
-                    version_label=version_label,
+                    version_label=version_label(version_index),
                     title=title,
                     description=description,
-                    category=category,
-                    status=status,
+                    category=item.category,
+                    status=item.status,
                     created_by_id=current_user.id,
                     source_file_id=uploaded_file_id
                 )
                 
                 # Store custom data
-                custom_data = {}
-                for col, value in req_data.items():
-                    if col.lower() not in ['version', 'id']:
-                        if value and str(value).strip():
-                            custom_data[col] = str(value).strip()
-                
-                if custom_data:
-                    new_version.set_custom_data(custom_data)
+                if item.custom_data:
+                    new_version.set_custom_data(item.custom_data)
                 
+                new_version.text_vector = vector_to_bytes(vector)
                 db.session.add(new_version)
                 db.session.flush()
+                duplicates.add(req.id, vector)
                 saved_count += 1
             
             db.session.commit()
@@ -278,8 +238,10 @@ def upload_excel_route(project_id):
             return jsonify({
                 'ok': True,
                 'count': saved_count,
+                'unchanged': unchanged_count,
                 'redirect': redirect_url,
-                'message': f'{saved_count} Anforderungen aus Excel importiert und mit KI optimiert.'
+                'message': f'{saved_count} Anforderungen aus Excel importiert und mit KI optimiert.',
+                'possible_duplicates': duplicates.flagged
             })
 
         except Exception as e:
@@ -291,6 +253,8 @@ def upload_excel_route(project_id):
                     pass
             raise e
             
+    except RequestEntityTooLarge:
+        raise  # Answered by the 413 handler
     except Exception as e:
         return jsonify({
             'ok': False,
@@ -393,7 +357,7 @@ def generate_requirements_route(project_id):
 
             # save workbook to uploads dir
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"generated_requirements_{project.name.replace(' ', '_')}_{timestamp}.xlsx"
+            filename = f"generated_requirements_{project.name.replace(' ', '_')}_{timestamp}_{uuid.uuid4().hex[:8]}.xlsx"
             uploads_dir = os.path.join('uploads')
             os.makedirs(uploads_dir, exist_ok=True)
             filepath = os.path.join(uploads_dir, filename)
@@ -418,6 +382,7 @@ def generate_requirements_route(project_id):
         
         # Now save generated requirements to database with correct source_file_id
         saved_count = 0
+        duplicates = DuplicateDetector(project_id)
         for req_data in generated_reqs:
             # Try to find title and description from various column names
             # Try common variations for title
@@ -457,27 +422,22 @@ def generate_requirements_route(project_id):
             # Check if requirement with this key already exists
             existing_req = Requirement.query.filter_by(project_id=project_id, key=key).first()
             
+            # Reworded titles get a new key - match them by text similarity instead
+            vector = text_vector(title, description)
             if not existing_req:
-                # Create new requirement
-                req = Requirement(project_id=project_id, key=key)
-                db.session.add(req)
-                db.session.flush()
-                version_index = 1
-                version_label = 'A'
+                duplicate_id = duplicates.find_duplicate(title, vector)
+                if duplicate_id:
+                    existing_req = Requirement.query.get(duplicate_id)
+            
+            if not existing_req:
+                # Create new requirement (or pick up one created concurrently)
+                req, _ = Requirement.create_or_get(project_id, key)
             else:
                 # Requirement exists - add new version
                 req = existing_req
-                
-                # Refresh the requirement to get latest versions (in case we added one in this loop)
-                db.session.refresh(req)
-                
-                # Find the highest version_index across ALL versions
-                if req.versions:
-                    max_version_index = max(v.version_index for v in req.versions)
-                    version_index = max_version_index + 1
-                else:
-                    version_index = 1
-                version_label = chr(ord('A') + (version_index - 1))
+            
+            # Atomic per-requirement counter, also covers versions added earlier in this loop
+            version_index = req.allocate_version_index()
             
             # Create requirement version
             # Try to get category from various column names
@@ -500,7 +460,7 @@ def generate_requirements_route(project_id):
             new_version = RequirementVersion(
                 requirement_id=req.id,
                 version_index=version_index,
-                version_label=version_label,
+                version_label=version_label(version_index),
                 title=title,
                 description=description,
                 category=category,
@@ -522,8 +482,10 @@ def generate_requirements_route(project_id):
             if custom_data:
                 new_version.set_custom_data(custom_data)
             
+            new_version.text_vector = vector_to_bytes(vector)
             db.session.add(new_version)
             db.session.flush()  # Flush immediately so next iteration sees this version
+            duplicates.add(req.id, vector)
             saved_count += 1
         
         db.session.commit()
@@ -538,7 +500,8 @@ def generate_requirements_route(project_id):
             'ok': True,
             'count': saved_count,
             'redirect': redirect_url,
-            'message': f'{saved_count} Anforderungen mit KI generiert.'
+            'message': f'{saved_count} Anforderungen mit KI generiert.',
+            'possible_duplicates': duplicates.flagged
         })
 
     
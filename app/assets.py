@@ -0,0 +1,67 @@
+"""
+Fingerprinted static assets.
+
+scripts/build_assets.py copies app/static/* to app/static/dist/ with a content
+hash in the filename and precompressed .gz/.br variants. asset_url() resolves
+names through the build manifest; without a build it falls back to the plain
+static file, so development works unchanged.
+"""
+
+import json
+import mimetypes
+import os
+
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+assets_bp = Blueprint('assets', __name__)
+
+MANIFEST_PATH = os.path.join('dist', 'manifest.json')
+# Fingerprinted files never change - cache for a year without revalidation
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Preferred first
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def load_manifest(app):
+    """Load {source name: built path} from the build manifest ({} if not built)."""
+    try:
+        with open(os.path.join(app.static_folder, MANIFEST_PATH), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(filename, **kwargs):
+    """url_for('static', filename=...) replacement that resolves fingerprinted names."""
+    manifest = current_app.extensions.get('asset_manifest', {})
+    return url_for('static', filename=manifest.get(filename, filename), **kwargs)
+
+
+@assets_bp.route('/static/dist/<path:filename>')
+def built_asset(filename):
+    """Serve a built asset, precompressed if the client accepts it."""
+    dist_dir = os.path.join(current_app.static_folder, 'dist')
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    response = None
+    for encoding, suffix in PRECOMPRESSED:
+        path = safe_join(dist_dir, filename + suffix)
+        if request.accept_encodings[encoding] and path and os.path.isfile(path):
+            response = send_from_directory(dist_dir, filename + suffix, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = send_from_directory(dist_dir, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_assets(app):
+    """Load the manifest and register asset_url() for the templates."""
+    app.extensions['asset_manifest'] = load_manifest(app)
+    app.add_template_global(asset_url)
+    app.register_blueprint(assets_bp)
@@ -0,0 +1,133 @@
+"""
+Conditional requests and response compression.
+
+Views that only depend on project data send a weak ETag built from the
+projects' revision counters (Project.revision, advanced by every flush that
+changes a project, its requirements, versions or files). A request whose
+If-None-Match still matches is answered with 304 right after the access
+check, before requirements are queried or a template is rendered.
+
+Text and JSON responses of at least COMPRESS_MIN_SIZE bytes are gzipped when
+the client accepts it.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from flask import current_app, request, session
+from flask_login import current_user
+
+# Add parent directory to path to import config
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import config
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+}
+
+
+def build_fingerprint(app):
+    """
+    Fingerprint of everything besides the data that shapes a response.
+
+    Templates and built assets change with a deployment, so ETags issued by
+    an older deployment stop matching without a database change.
+    """
+    digest = hashlib.sha1()
+    template_dir = os.path.join(app.root_path, app.template_folder or 'templates')
+    for root, _dirs, files in os.walk(template_dir):
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            digest.update(f"{name}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+    digest.update(json.dumps(app.extensions.get('asset_manifest', {}), sort_keys=True).encode())
+    return digest.hexdigest()[:12]
+
+
+def revision_etag(*revisions):
+    """
+    Build the ETag of the current request from project revisions.
+
+    Besides the revisions it covers the user (permissions, navigation), the
+    full path with query string and the deployment fingerprint.
+
+    Args:
+        *revisions: (project id, revision) pairs or other hashable values
+
+    Returns:
+        str | None: ETag value, or None if the response must not be cached
+    """
+    # A pending flash message is consumed by the next rendered page - that
+    # page must not be reused later
+    if session.get('_flashes'):
+        return None
+    parts = [
+        current_app.extensions.get('build_fingerprint', ''),
+        current_user.get_id(),
+        request.full_path,
+        repr(revisions),
+    ]
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:20]
+
+
+def not_modified(etag):
+    """
+    Return a 304 response if the client's cached copy matches `etag`.
+
+    Args:
+        etag (str | None): Value from revision_etag()
+
+    Returns:
+        Response | None: 304 response, or None to build the full response
+    """
+    if etag is None or not request.if_none_match.contains_weak(etag):
+        return None
+    return with_etag(current_app.response_class(status=304), etag)
+
+
+def with_etag(response, etag):
+    """Attach the ETag; clients must revalidate before reusing the response."""
+    if etag is not None:
+        response = current_app.make_response(response)
+        response.set_etag(etag, weak=True)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response
+
+
+def compress_response(response):
+    """gzip text responses if the client accepts it (after_request hook)."""
+    if (
+        config.COMPRESS_LEVEL <= 0
+        or response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip']:
+        return response
+    data = response.get_data()
+    if len(data) < config.COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=config.COMPRESS_LEVEL, mtime=0))
+    response.headers['Content-Encoding'] = 'gzip'
+    # A strong ETag identifies the exact bytes, which differ from the original now
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-gzip")
+    return response
+
+
+def init_http_cache(app):
+    """Register response compression (call after init_assets)."""
+    app.extensions['build_fingerprint'] = build_fingerprint(app)
+    app.after_request(compress_response)
@@ -1,52 +1,91 @@
 from flask import Blueprint, current_app
 from . import db
-import re
+from .models import normalize_key
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
 migration_bp = Blueprint('migration', __name__)
 
-def normalize_key(title: str) -> str:
-    """Creates a stable, lowercase key from a title string."""
-    if not title:
-        return ""
-    s = title.strip().lower()
-    s = re.sub(r"\s+", " ", s)
-    return s
+
+def rekey_requirements(conn):
+    """
+    Recompute requirement.key from the title of each requirement's first version.
+
+    If several requirements of a project end up with the same key, the oldest
+    one keeps it and the others get "<key>~<id>", which no title normalizes
+    to. The caller drops uq_requirement_project_key before and recreates it
+    afterwards; it would reject intermediate states of the update.
+
+    Args:
+        conn (Connection): Connection the UPDATE runs on (not committed)
+
+    Returns:
+        tuple: (number of requirements, number of updated keys, number of collisions)
+    """
+    rows = conn.execute(db.text("""
+        SELECT r.id, r.project_id, r.key, v.title
+        FROM requirement r
+        LEFT JOIN requirement_version v
+          ON v.requirement_id = r.id
+         AND v.version_index = (
+             SELECT MIN(version_index) FROM requirement_version WHERE requirement_id = r.id
+         )
+        ORDER BY r.id
+    """)).fetchall()
+
+    taken = set()  # (project_id, key)
+    params = []
+    collisions = 0
+    for requirement_id, project_id, old_key, title in rows:
+        if title is not None:
+            key = normalize_key(title)
+        elif old_key is not None:
+            key = normalize_key(old_key)
+        else:
+            continue  # No versions and no key - nothing to match by
+        if (project_id, key) in taken:
+            key = f"{key}~{requirement_id}"
+            collisions += 1
+        taken.add((project_id, key))
+        if key != old_key:
+            params.append({'id': requirement_id, 'key': key})
+
+    if params:
+        conn.execute(db.text("UPDATE requirement SET key = :key WHERE id = :id"), params)
+    return len(rows), len(params), collisions
+
 
 @migration_bp.route('/migrate-now')
 def migrate():
     logging.info("Migration route called.")
     try:
-        # Check if the column already exists
-        logging.info("Checking for 'key' column...")
-        result = db.engine.execute("PRAGMA table_info(requirement)").fetchall()
-        columns = [row[1] for row in result]
-        if 'key' in columns:
-            logging.info("'key' column already exists.")
-            return "Migration already performed. The 'key' column already exists."
-
-        # Add the 'key' column
-        logging.info("Adding 'key' column...")
-        db.engine.execute('ALTER TABLE requirement ADD COLUMN "key" VARCHAR(200)')
-        logging.info("'key' column added.")
-        
-        # Populate the 'key' column
-        logging.info("Populating 'key' column...")
-        from .models import Requirement, RequirementVersion
-        requirements = Requirement.query.all()
-        logging.info(f"Found {len(requirements)} requirements to migrate.")
-        for req in requirements:
-            # Get the latest version to get the title
-            latest_version = RequirementVersion.query.filter_by(requirement_id=req.id).order_by(RequirementVersion.version_index.desc()).first()
-            if latest_version:
-                req.key = normalize_key(latest_version.title)
-                logging.info(f"  - Migrating req {req.id}, key: {req.key}")
-        db.session.commit()
-        logging.info("Population complete.")
+        with db.engine.connect() as conn:
+            # Check if the column already exists
+            logging.info("Checking for 'key' column...")
+            result = conn.execute(db.text("PRAGMA table_info(requirement)")).fetchall()
+            columns = [row[1] for row in result]
+            if 'key' in columns:
+                logging.info("'key' column already exists.")
+                return "Migration already performed. The 'key' column already exists."
+
+            # Add the 'key' column
+            logging.info("Adding 'key' column...")
+            conn.execute(db.text('ALTER TABLE requirement ADD COLUMN "key" VARCHAR(200)'))
+            logging.info("'key' column added.")
+
+            # Populate the 'key' column like scripts/rekey_requirements.py
+            logging.info("Populating 'key' column...")
+            conn.execute(db.text("DROP INDEX IF EXISTS uq_requirement_project_key"))
+            total, updated, collisions = rekey_requirements(conn)
+            logging.info(f"Found {total} requirements, set {updated} keys ({collisions} collisions resolved).")
+            conn.execute(db.text(
+                "CREATE UNIQUE INDEX uq_requirement_project_key ON requirement (project_id, key)"
+            ))
+            conn.commit()
+            logging.info("Population complete.")
 
         return "Migration successful! The 'key' column has been added and populated."
     except Exception as e:
         logging.error(f"An error occurred during migration: {e}")
-        return f"An error occurred during migration: {e}"
\ No newline at end of file
+        return f"An error occurred during migration: {e}"
@@ -1,24 +1,103 @@
+import re
+import unicodedata
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from itertools import chain
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session
 from . import db
 
 def version_label(n: int) -> str:
-    """Generates a letter-based version label (1 -> A, 2 -> B, ...)."""
+    """Generates a letter-based version label (1 -> A, ..., 26 -> Z, 27 -> AA, ...).
+    
+    Bijective base-26 like spreadsheet columns. Labels do not sort
+    alphabetically beyond Z ("AA" < "B"), so always order by version_index.
+    """
     if n <= 0:
         return ""
-    return chr(ord('A') + (n - 1))
+    letters = []
+    while n > 0:
+        n, remainder = divmod(n - 1, 26)
+        letters.append(chr(ord('A') + remainder))
+    return "".join(reversed(letters))
+
+def version_index_from_label(label: str) -> int:
+    """Inverse of version_label ("A" -> 1, "AA" -> 27). Returns 0 for invalid labels."""
+    n = 0
+    for char in (label or "").upper():
+        if not 'A' <= char <= 'Z':
+            return 0
+        n = n * 26 + (ord(char) - ord('A') + 1)
+    return n
+
+KEY_MAX_LENGTH = 100
+_KEY_TRANSLITERATION = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+_KEY_SEPARATORS = re.compile(r'[^\w\-]+')
+_KEY_UNDERSCORES = re.compile(r'_{2,}')
+
+def normalize_key(title: str) -> str:
+    """Normalize a requirement title to the key it is matched by across imports.
+    
+    The title is NFKC-normalized and case-folded; German umlauts and ß are
+    transliterated (ä -> ae), letters and digits of any script are kept and
+    everything else collapses to a single underscore. Keys are unique per
+    project (uq_requirement_project_key).
+    
+    Args:
+        title (str): The requirement title
+    
+    Returns:
+        str: Normalized key (max KEY_MAX_LENGTH chars, no leading/trailing underscores)
+    """
+    if not title:
+        return ""
+    key = unicodedata.normalize('NFKC', str(title)).casefold().translate(_KEY_TRANSLITERATION)
+    key = _KEY_SEPARATORS.sub('_', key)
+    key = _KEY_UNDERSCORES.sub('_', key)
+    return key[:KEY_MAX_LENGTH].strip('_')
+
+def content_fingerprint(title, description, category, status, custom_data) -> str:
+    """SHA-1 of the normalized content of a requirement version.
+
+    Title, description and category edited in the table live in custom_data
+    and take precedence over the columns, like in the export. Whitespace is
+    collapsed, empty custom values are ignored and custom data is compared
+    independent of key order, so a row re-imported with the same text
+    yields the same fingerprint as the stored version.
+    """
+    import hashlib
+    import json
+
+    def normalize(value):
+        return " ".join(str(value).split()) if value is not None else ""
+
+    custom_data = custom_data or {}
+    fixed = [normalize(custom_data.get(name) or value)
+             for name, value in (('title', title), ('description', description), ('category', category))]
+    custom = {
+        normalize(key): normalize(value)
+        for key, value in custom_data.items()
+        if key not in ('title', 'description', 'category') and normalize(value)
+    }
+    payload = json.dumps(
+        fixed + [normalize(status), custom],
+        ensure_ascii=False, sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
 
 # Association table for project sharing (many-to-many)
 project_user_association = db.Table('project_user_association',
     db.Column('project_id', db.Integer, db.ForeignKey('project.id'), primary_key=True),
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    # The primary key covers lookups by project; this one covers "shared with user"
+    db.Index('ix_project_user_association_user_id', 'user_id')
 )
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     projects = db.relationship('Project', backref='user', lazy=True)
@@ -27,10 +106,17 @@ class User(UserMixin, db.Model):
         return f'<User {self.email}>'
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        from .services.password_service import hash_password
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        from .services.password_service import verify_password
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """Check if the stored hash uses other parameters than PASSWORD_HASH_METHOD."""
+        from .services.password_service import needs_rehash
+        return needs_rehash(self.password_hash)
 
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -39,6 +125,9 @@ class Project(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # JSON field to store dynamic column configuration
     custom_columns = db.Column(db.Text, default='[]')  # Stores list of column names as JSON
+    # Advanced by every flush that changes the project or its requirements,
+    # versions or files; used for ETags (see http_cache.py)
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     requirements = db.relationship("Requirement", backref="project", lazy=True, cascade="all, delete-orphan")
 
@@ -66,17 +155,44 @@ class Project(db.Model):
         self.custom_columns = json.dumps(columns)
     
     def is_accessible_by(self, user):
-        """Check if user can access this project (owner or shared)."""
-        return self.user_id == user.id or user in self.shared_with
+        """Check if user can access this project (owner or shared).
+        
+        Shared access is confirmed with a single EXISTS query on the
+        association table instead of loading the whole shared_with list.
+        The project ids cached with the logged-in user only skip that query
+        when they say "no": a cached "yes" may be stale after an unshare in
+        another process, so it is never trusted on its own.
+        """
+        if self.user_id == user.id:
+            return True
+        can_access_project = getattr(user, 'can_access_project', None)
+        if can_access_project is not None and not can_access_project(self.id):
+            return False
+        return db.session.query(
+            db.exists().where(
+                project_user_association.c.project_id == self.id,
+                project_user_association.c.user_id == user.id
+            )
+        ).scalar()
+    
+    @classmethod
+    def accessible_by(cls, user_id):
+        """Query all projects a user owns or that are shared with them."""
+        shared_ids = db.select(project_user_association.c.project_id).where(
+            project_user_association.c.user_id == user_id
+        )
+        return cls.query.filter(db.or_(cls.user_id == user_id, cls.id.in_(shared_ids)))
 
 class Requirement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
-    # A stable key to match requirements across different generation runs
-    key = db.Column(db.String(200), index=True, nullable=True)
+    # A stable key to match requirements across different generation runs (normalize_key)
+    key = db.Column(db.String(200), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # Soft delete flag
     is_deleted = db.Column(db.Boolean, default=False)
+    # Highest version_index handed out so far (see allocate_version_index)
+    version_counter = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     versions = db.relationship(
         "RequirementVersion",
@@ -86,28 +202,93 @@ class Requirement(db.Model):
         order_by="RequirementVersion.version_index.asc()"
     )
 
+    __table_args__ = (
+        # Exact index hit for key lookups; a key identifies one requirement per project
+        db.Index('uq_requirement_project_key', 'project_id', 'key', unique=True),
+    )
+
     def __repr__(self):
         return f'<Requirement {self.id} (Key: {self.key})>'
     
+    @classmethod
+    def create_or_get(cls, project_id, key):
+        """Create a requirement with this key, or return the one that already has it.
+        
+        A single INSERT ... ON CONFLICT DO NOTHING on uq_requirement_project_key,
+        so a concurrent import that created the same key first is picked up
+        instead of failing the transaction.
+        
+        Returns:
+            tuple: (Requirement, True if it was created)
+        """
+        from sqlalchemy.dialects.sqlite import insert
+        result = db.session.execute(
+            insert(cls)
+            .values(project_id=project_id, key=key)
+            .on_conflict_do_nothing(index_elements=['project_id', 'key'])
+        )
+        requirement = cls.query.filter_by(project_id=project_id, key=key).one()
+        return requirement, result.rowcount == 1
+    
     def get_latest_version(self):
         """Get the latest version of this requirement."""
         if not self.versions:
             return None
         return self.versions[-1]
+    
+    def allocate_version_index(self):
+        """
+        Reserve the next version_index for this requirement.
+        
+        The counter row is incremented with a single UPDATE, so concurrent
+        transactions adding versions to the same requirement wait for each
+        other's commit instead of both computing the same max + 1. Other
+        requirements are not blocked (on databases with row locks). The counter
+        never falls behind existing versions, so rows created before the
+        counter existed need no backfill.
+        """
+        table = Requirement.__table__
+        highest = (
+            db.select(db.func.coalesce(db.func.max(RequirementVersion.version_index), 0))
+            .where(RequirementVersion.requirement_id == self.id)
+            .scalar_subquery()
+        )
+        counter = db.func.coalesce(table.c.version_counter, 0)
+        db.session.execute(
+            table.update()
+            .where(table.c.id == self.id)
+            .values(version_counter=db.case((counter >= highest, counter), else_=highest) + 1)
+        )
+        index = db.session.execute(
+            db.select(table.c.version_counter).where(table.c.id == self.id)
+        ).scalar_one()
+        db.session.expire(self, ['version_counter'])
+        return index
 
 class RequirementVersion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     requirement_id = db.Column(db.Integer, db.ForeignKey('requirement.id'), nullable=False)
     version_index = db.Column(db.Integer, nullable=False)     # 1, 2, 3, ...
-    version_label = db.Column(db.String(4), nullable=False)   # A, B, C, ...
+    version_label = db.Column(db.String(8), nullable=False)   # A, B, ..., Z, AA, AB, ... (sort by version_index)
 
     title = db.Column(db.String(160), nullable=False)
-    description = db.Column(db.String(2000), nullable=False)
+    # Stored text; use the description property (materializes delta-encoded versions)
+    _description = db.Column('description', db.String(2000), nullable=False)
     category = db.Column(db.String(80))
     status = db.Column(db.String(30), nullable=False, default="Offen")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # JSON field to store dynamic column values
-    custom_data = db.Column(db.Text, default='{}')  # Stores {column_name: value} as JSON
+    _custom_data = db.Column('custom_data', db.Text, default='{}')  # Stores {column_name: value} as JSON
+    
+    # Compressed patch against the next version (VERSION_STORAGE='delta');
+    # description and custom_data are then empty in the database
+    delta = db.Column(db.LargeBinary, nullable=True)
+    
+    # Hashed n-gram vector of title + description for duplicate detection
+    text_vector = db.Column(db.LargeBinary, nullable=True)
+    
+    # content_fingerprint() of the version, kept current on every flush
+    fingerprint = db.Column(db.String(40), nullable=True)
     
     # Link to source file (for tracking which upload/generation created this version)
     source_file_id = db.Column(db.Integer, db.ForeignKey('project_file.id'), nullable=True)
@@ -134,6 +315,47 @@ class RequirementVersion(db.Model):
     def __repr__(self):
         return f'<RequirementVersion {self.id} ({self.version_label}) for Req {self.requirement_id}>'
     
+    @hybrid_property
+    def description(self):
+        if self.delta is None:
+            return self._description
+        from .services.version_storage import materialize
+        return materialize(self)[0]
+    
+    @description.setter
+    def description(self, value):
+        self._store_text(description=value)
+    
+    @description.expression
+    def description(cls):
+        return cls._description
+    
+    @hybrid_property
+    def custom_data(self):
+        if self.delta is None:
+            return self._custom_data
+        from .services.version_storage import materialize
+        return materialize(self)[1]
+    
+    @custom_data.setter
+    def custom_data(self, value):
+        self._store_text(custom_data=value)
+    
+    @custom_data.expression
+    def custom_data(cls):
+        return cls._custom_data
+    
+    def _store_text(self, **values):
+        """Write description/custom_data, storing this version in full."""
+        if all(getattr(self, name) == value for name, value in values.items()):
+            return
+        from .services.version_storage import store_full, thaw_previous_version
+        # The previous version may be a delta against the current text
+        thaw_previous_version(self)
+        store_full(self)
+        for name, value in values.items():
+            setattr(self, '_' + name, value)
+    
     def get_custom_data(self):
         """Get custom column data as dictionary."""
         import json
@@ -156,6 +378,18 @@ class RequirementVersion(db.Model):
         import json
         self.custom_data = json.dumps(data)
     
+    def compute_fingerprint(self):
+        """Fingerprint of the content (see content_fingerprint)."""
+        return content_fingerprint(self.title, self.description, self.category,
+                                   self.status or 'Offen', self.get_custom_data())
+    
+    def update_text_vector(self):
+        """Recompute the similarity vector from title and description and return it."""
+        from .services.similarity_service import text_vector, vector_to_bytes
+        vector = text_vector(self.title, self.description)
+        self.text_vector = vector_to_bytes(vector)
+        return vector
+    
     def get_status_color(self):
         """Get color code for status badge."""
         status_colors = {
@@ -191,9 +425,103 @@ class ProjectFile(db.Model):
     file_type = db.Column(db.String(50), nullable=False)  # 'upload' or 'export'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    # Project.revision an export was built from (exports only)
+    content_version = db.Column(db.Integer, nullable=True)
+    # SHA-256 of the uploaded file (uploads only)
+    content_hash = db.Column(db.String(64), nullable=True)
     
     # Relationship for user who created the file
     created_by = db.relationship('User', foreign_keys=[created_by_id], backref='uploaded_files')
 
     def __repr__(self):
         return f'<ProjectFile {self.filename} ({self.file_type})>'
+
+    @staticmethod
+    def version_counts(project_id):
+        """Number of versions created from each file of a project, in one GROUP BY query.
+
+        Returns:
+            dict: {file id: version count}; files without versions are missing
+        """
+        rows = (
+            db.session.query(RequirementVersion.source_file_id, db.func.count(RequirementVersion.id))
+            .join(ProjectFile, ProjectFile.id == RequirementVersion.source_file_id)
+            .filter(ProjectFile.project_id == project_id)
+            .group_by(RequirementVersion.source_file_id)
+            .all()
+        )
+        return dict(rows)
+
+@event.listens_for(Session, 'before_flush')
+def _keep_version_deltas_consistent(session, flush_context, instances):
+    """Encode predecessors of new versions and thaw predecessors of deleted ones."""
+    from .services.version_storage import before_flush
+    before_flush(session)
+
+
+_FINGERPRINT_ATTRIBUTES = ('title', '_description', 'category', 'status', '_custom_data')
+
+
+@event.listens_for(Session, 'before_flush')
+def _update_version_fingerprints(session, flush_context, instances):
+    """Recompute the fingerprint of new versions and of versions edited in place.
+
+    Delta-encoded versions are skipped: encoding and thawing change how the
+    text is stored, not the content.
+    """
+    from sqlalchemy import inspect
+
+    for version in chain(session.new, session.dirty):
+        if not isinstance(version, RequirementVersion) or version.delta is not None:
+            continue
+        state = inspect(version)
+        if state.pending or any(state.attrs[name].history.has_changes() for name in _FINGERPRINT_ATTRIBUTES):
+            version.fingerprint = version.compute_fingerprint()
+
+
+_REVISED_PROJECTS_KEY = 'revised_project_ids'
+
+
+@event.listens_for(Session, 'after_flush')
+def _advance_project_revisions(session, flush_context):
+    """Advance Project.revision of every project whose data was just flushed."""
+    project_ids, requirement_ids = set(), set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Project):
+            project_ids.add(obj.id)
+        elif isinstance(obj, ProjectFile):
+            # Exports are derived from the content and not shown on project pages
+            if obj.file_type != 'export':
+                project_ids.add(obj.project_id)
+        elif isinstance(obj, Requirement):
+            project_ids.add(obj.project_id)
+        elif isinstance(obj, RequirementVersion):
+            requirement_ids.add(obj.requirement_id)
+
+    connection = session.connection()
+    if requirement_ids:
+        project_ids.update(connection.execute(
+            db.select(Requirement.project_id).where(Requirement.id.in_(requirement_ids))
+        ).scalars())
+    project_ids.discard(None)
+    if not project_ids:
+        return
+
+    table = Project.__table__
+    connection.execute(
+        table.update()
+        .where(table.c.id.in_(project_ids))
+        .values(revision=table.c.revision + 1)
+    )
+    session.info.setdefault(_REVISED_PROJECTS_KEY, set()).update(project_ids)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _expire_project_revisions(session, flush_context):
+    """Reload the revision of loaded projects on next access."""
+    for project_id in session.info.pop(_REVISED_PROJECTS_KEY, ()):
+        project = session.identity_map.get(Session.identity_key(Project, project_id))
+        if project is not None:
+            session.expire(project, ['revision'])
@@ -1,19 +1,38 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, jsonify
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, abort, jsonify
 from flask_login import login_required, current_user
 from sqlalchemy import func, and_
 import json
 import os
 from datetime import datetime
 from . import db
-from .models import Project, Requirement, RequirementVersion, ProjectFile
+from .models import Project, Requirement, RequirementVersion, ProjectFile, normalize_key, version_label
 from .services.ai_client import generate_requirements
+from .services.similarity_service import (
+    DuplicateDetector, cached_project_index, latest_versions_query, text_vector, vector_to_bytes
+)
+from .services.embedding_index import EmbeddingIndex, format_related_requirements
+from .services.diff_service import HISTORY_PAGE_SIZE, diff_versions, render_version_diff
+from .services.fragment_cache import fragment_cache
+from .http_cache import revision_etag, not_modified, with_etag
 
 bp = Blueprint('main', __name__)
 
+@bp.app_errorhandler(413)
+def upload_too_large(error):
+    """Requests above MAX_CONTENT_LENGTH are rejected before the body is read"""
+    limit = current_app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    message = f"Die Datei ist zu groß (maximal {limit} MB)."
+    # The upload page sends its form with fetch() and expects JSON
+    if request.blueprint == 'agent':
+        return jsonify({'ok': False, 'error': message}), 413
+    flash(message, "danger")
+    return redirect(request.referrer or url_for('main.home'))
+
 @bp.route("/")
 @login_required
 def home():
-    projects = Project.query.filter_by(user_id=current_user.id).all()
+    # Owned and shared projects in one query
+    projects = Project.accessible_by(current_user.id).order_by(Project.created_at, Project.id).all()
     return render_template("start.html", projects=projects)
 
 @bp.route("/create", methods=['GET', 'POST'])
@@ -34,7 +53,7 @@ def create():
 @login_required
 def manage_project(project_id):
     project = Project.query.get_or_404(project_id)
-    if project.user_id != current_user.id and current_user not in project.shared_with:
+    if not project.is_accessible_by(current_user):
         abort(403)
     
     # Show entry page with two options: generate or upload
@@ -45,9 +64,15 @@ def manage_project(project_id):
 @login_required
 def project_overview(project_id):
     project = Project.query.get_or_404(project_id)
-    if project.user_id != current_user.id and current_user not in project.shared_with:
+    if not project.is_accessible_by(current_user):
         abort(403)
 
+    # Unchanged since the client's last load: skip the queries and rendering
+    etag = revision_etag(project.id, project.revision)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     # Read explicit active_tab (e.g. 'files') from query string. If not provided
     # but a file_id is present, default to the requirements tab so the user can
     # immediately edit the imported/generated requirements.
@@ -117,8 +142,21 @@ def project_overview(project_id):
     source_file = None
     if focus_file_id:
         source_file = ProjectFile.query.get(focus_file_id)
-    
-    return render_template(
+
+    # Sections that only change with uploads, deletes and shares are cached
+    # per project revision
+    shared_users_html = fragment_cache.get_or_render('shared_users', project, lambda: render_template(
+        "fragments/shared_users.html", project=project
+    ))
+    archive_html = None
+    if show_archive:
+        archive_html = fragment_cache.get_or_render('archive', project, lambda: render_template(
+            "fragments/project_archive.html",
+            project=project,
+            version_counts=ProjectFile.version_counts(project.id)
+        ))
+    
+    return with_etag(render_template(
         "create.html", 
         project=project, 
         req_with_versions=req_with_versions,
@@ -128,13 +166,24 @@ def project_overview(project_id):
         focus_file_id=focus_file_id,
         show_archive=show_archive,
         source_file=source_file,
-        generated_req_count=generated_req_count
-    )
+        generated_req_count=generated_req_count,
+        shared_users_html=shared_users_html,
+        archive_html=archive_html
+    ), etag)
 
 @bp.route("/deleted_requirements")
 @login_required
 def deleted_requirements_overview():
     """Show all deleted requirements across all user's projects."""
+    # The page covers all own projects: revalidate against all their revisions
+    revisions = db.session.query(Project.id, Project.revision).filter_by(
+        user_id=current_user.id
+    ).order_by(Project.id).all()
+    etag = revision_etag(*(tuple(row) for row in revisions))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     projects = Project.query.filter_by(user_id=current_user.id).all()
     
     # Collect deleted requirements from all projects
@@ -154,10 +203,10 @@ def deleted_requirements_overview():
                     'version': latest_version
                 })
     
-    return render_template(
+    return with_etag(render_template(
         "deleted_requirements_overview.html",
         deleted_items=all_deleted
-    )
+    ), etag)
 
 @bp.route("/requirement/<int:rid>/history")
 @login_required
@@ -167,9 +216,32 @@ def requirement_history(rid):
     if req.project.user_id != current_user.id:
         abort(403)
     
-    # The 'versions' relationship is already ordered by version_index
-    versions = req.versions
-    return render_template("requirement_history.html", req=req, versions=versions)
+    # One page of versions, newest first: only the shown versions (and the
+    # predecessor of the oldest one, for its diff) are loaded and materialized
+    query = RequirementVersion.query.filter_by(requirement_id=req.id)
+    before = request.args.get('before', type=int)
+    if before is not None:
+        query = query.filter(RequirementVersion.version_index < before)
+    window = query.order_by(RequirementVersion.version_index.desc()).limit(HISTORY_PAGE_SIZE + 1).all()
+    window.reverse()
+    
+    has_older = len(window) > HISTORY_PAGE_SIZE
+    versions = window[1:] if has_older else window
+    
+    # Changes of each version against its predecessor (None for the first one)
+    changes = [render_version_diff(prev, ver) for prev, ver in zip(window, window[1:])]
+    if versions and not has_older:
+        changes.insert(0, None)
+    
+    older_url = None
+    if has_older:
+        older_url = url_for('main.requirement_history', rid=req.id, before=versions[0].version_index)
+    newer_url = None
+    if before is not None:
+        newer_url = url_for('main.requirement_history', rid=req.id)
+    
+    return render_template("requirement_history.html", req=req, versions=versions, changes=changes,
+                           older_url=older_url, newer_url=newer_url)
 
 
 @bp.route('/project/<int:project_id>/file/<int:file_id>')
@@ -177,7 +249,7 @@ def requirement_history(rid):
 def view_project_file(project_id, file_id):
     """Show a detail page for a specific ProjectFile (preview columns / data)."""
     project = Project.query.get_or_404(project_id)
-    if project.user_id != current_user.id and current_user not in project.shared_with:
+    if not project.is_accessible_by(current_user):
         abort(403)
 
     project_file = ProjectFile.query.get_or_404(file_id)
@@ -189,10 +261,11 @@ def view_project_file(project_id, file_id):
     try:
         # Only attempt to parse Excel uploads
         if project_file.filepath and project_file.filename.endswith(('.xlsx', '.xls')) and project_file.file_type == 'upload':
-            preview = parse_excel_to_data(project_file.filepath)
-            # preview expected as list of dicts; derive columns from keys of first row
-            if preview and isinstance(preview, list) and len(preview) > 0:
-                columns = list(preview[0].keys())
+            from .services.exel_service import PREVIEW_ROWS, parse_workbook_sheets
+            # First rows as the upload ingested them (all sheets, tagged with their name)
+            preview = parse_workbook_sheets(project_file.filepath, max_rows=PREVIEW_ROWS)
+            # Sheets may have different headers: columns of all rows, in order of appearance
+            columns = list(dict.fromkeys(col for row in preview for col in row))
     except Exception:
         preview = None
 
@@ -205,9 +278,12 @@ def download_file(file_id):
     project = project_file.project
     
     # Authorization check
-    if project.user_id != current_user.id and current_user not in project.shared_with:
+    if not project.is_accessible_by(current_user):
         abort(403)
     
+    if project_file.file_type == 'export':
+        return _send_export(project_file)
+
     # Check if file exists
     if not os.path.exists(project_file.filepath):
         abort(404)
@@ -237,8 +313,11 @@ def delete_project_file(file_id):
         except Exception:
             pass  # Silently ignore file deletion errors
     
-    # Delete all requirement versions associated with this file
-    RequirementVersion.query.filter_by(source_file_id=file_id).delete()
+    # Delete all requirement versions associated with this file. Through the
+    # session (not a bulk DELETE), so delta-encoded predecessors are stored
+    # in full first (see version_storage.before_flush)
+    for version in RequirementVersion.query.filter_by(source_file_id=file_id):
+        db.session.delete(version)
     
     # Delete the ProjectFile entry
     db.session.delete(project_file)
@@ -257,6 +336,7 @@ def delete_project(project_id):
     
     db.session.delete(project)
     db.session.commit()
+    fragment_cache.invalidate(project_id)
     flash(f"Project '{project.name}' has been deleted.", "success")
     return redirect(url_for('main.home'))
 
@@ -355,6 +435,61 @@ def update_status(version_id):
     
     return redirect(url_for('main.manage_project', project_id=version.requirement.project_id))
 
+# Route to apply several requirement mutations at once
+@bp.route("/project/<int:project_id>/requirements/batch", methods=['POST'])
+@login_required
+def batch_update_requirements(project_id):
+    """Apply a list of operations (JSON) in one transaction, with a result per operation"""
+    from .services.batch_service import BatchError, apply_batch
+    
+    project = Project.query.get_or_404(project_id)
+    # Authorization check - once for all operations
+    if project.user_id != current_user.id:
+        abort(403)
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        results = apply_batch(project, data.get('operations'), current_user.id)
+    except BatchError as e:
+        return jsonify({'ok': False, 'error': str(e)}), 400
+    
+    db.session.commit()
+    applied = sum(1 for result in results if result['ok'])
+    return jsonify({'ok': applied == len(results), 'applied': applied, 'results': results})
+
+# AJAX route to apply the queued inline edits of the project table
+@bp.route("/project/<int:project_id>/requirements/custom_data", methods=['POST'])
+@login_required
+def patch_custom_data(project_id):
+    """Apply JSON merge patches to the custom data of several versions in one write"""
+    from .services.batch_service import (SHARED_PATCH_COLUMNS, BatchError, PatchConflict,
+                                         apply_custom_data_patches, patched_columns, version_state)
+    
+    project = Project.query.get_or_404(project_id)
+    # Authorization check
+    if not project.is_accessible_by(current_user):
+        abort(403)
+    
+    data = request.get_json(silent=True) or {}
+    # Users the project is shared with may only mark requirements as quantifiable
+    allowed_values = None
+    if project.user_id != current_user.id:
+        if not patched_columns(data.get('versions')) <= SHARED_PATCH_COLUMNS.keys():
+            abort(403)
+        allowed_values = SHARED_PATCH_COLUMNS
+    try:
+        versions = apply_custom_data_patches(project, data.get('versions'), allowed_values)
+    except BatchError as e:
+        return jsonify({'ok': False, 'error': str(e)}), 400
+    except PatchConflict as e:
+        return jsonify({'ok': False, 'error': str(e), 'conflicts': e.conflicts}), 409
+    
+    for version in versions:
+        if db.session.is_modified(version):
+            version.last_modified_by_id = current_user.id
+    db.session.commit()
+    return jsonify({'ok': True, 'versions': [version_state(version) for version in versions]})
+
 # AJAX route to get all versions of a requirement
 @bp.route("/requirement/<int:req_id>/versions_json")
 @login_required
@@ -363,23 +498,129 @@ def requirement_versions_json(req_id):
     # Authorization check
     if req.project.user_id != current_user.id:
         abort(403)
+
+    etag = revision_etag(req.project.id, req.project.revision)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
-    versions_data = []
-    for ver in req.versions:
-        versions_data.append({
+    versions_data = [version_to_dict(ver) for ver in req.versions]
+    
+    return with_etag(jsonify(versions_data), etag)
+
+def version_to_dict(ver):
+    """Serialize a requirement version for the JSON endpoints."""
+    return {
+        'id': ver.id,
+        'version_index': ver.version_index,
+        'version_label': ver.version_label,
+        'title': ver.title,
+        'description': ver.description,
+        'category': ver.category,
+        'status': ver.status,
+        'status_color': ver.get_status_color(),
+        'custom_data': ver.get_custom_data(),
+        'fingerprint': ver.fingerprint or ver.compute_fingerprint(),
+        'created_at': ver.created_at.strftime('%Y-%m-%d %H:%M')
+    }
+
+# AJAX route to get the word-level diff between two versions of a requirement
+@bp.route("/requirement/<int:req_id>/diff")
+@login_required
+def requirement_diff(req_id):
+    req = Requirement.query.get_or_404(req_id)
+    # Authorization check
+    if req.project.user_id != current_user.id:
+        abort(403)
+    
+    versions = req.versions
+    if len(versions) < 2 and not request.args.get('from'):
+        return jsonify({'ok': False, 'error': 'Mindestens zwei Versionen erforderlich.'}), 400
+    
+    # Default: latest version against its predecessor
+    from_id = request.args.get('from', type=int) or versions[-2].id
+    to_id = request.args.get('to', type=int) or versions[-1].id
+    
+    by_id = {ver.id: ver for ver in versions}
+    if from_id not in by_id or to_id not in by_id:
+        abort(404)
+    
+    return jsonify(diff_versions(by_id[from_id], by_id[to_id]))
+
+# AJAX route to get all versions of a requirement as one full version plus deltas
+@bp.route("/requirement/<int:req_id>/versions_delta_json")
+@login_required
+def requirement_versions_delta_json(req_id):
+    req = Requirement.query.get_or_404(req_id)
+    # Authorization check
+    if req.project.user_id != current_user.id:
+        abort(403)
+    
+    versions = req.versions
+    if not versions:
+        return jsonify({'base': None, 'deltas': []})
+    
+    deltas = []
+    for prev, ver in zip(versions, versions[1:]):
+        diff = diff_versions(prev, ver)
+        deltas.append({
             'id': ver.id,
             'version_index': ver.version_index,
             'version_label': ver.version_label,
-            'title': ver.title,
-            'description': ver.description,
-            'category': ver.category,
-            'status': ver.status,
             'status_color': ver.get_status_color(),
-            'custom_data': ver.get_custom_data(),
-            'created_at': ver.created_at.strftime('%Y-%m-%d %H:%M')
+            'created_at': ver.created_at.strftime('%Y-%m-%d %H:%M'),
+            'fields': diff['fields'],
+            'custom_data': diff['custom_data']
         })
     
-    return jsonify(versions_data)
+    return jsonify({'base': version_to_dict(versions[0]), 'deltas': deltas})
+
+# AJAX route to find requirements similar to a given one
+@bp.route("/requirement/<int:req_id>/similar")
+@login_required
+def similar_requirements(req_id):
+    req = Requirement.query.get_or_404(req_id)
+    project = req.project
+    # Authorization check
+    if not project.is_accessible_by(current_user):
+        abort(403)
+    
+    latest_version = req.get_latest_version()
+    if not latest_version:
+        return jsonify([])
+    
+    top_k = min(request.args.get('limit', 5, type=int), 50)
+    min_score = request.args.get('min_score', 0.5, type=float)
+    
+    index = cached_project_index(project)
+    matches = index.query(
+        text_vector(latest_version.title, latest_version.description),
+        top_k=top_k,
+        min_score=min_score,
+        exclude_id=req.id
+    )
+    
+    # Latest versions of all matches in one query
+    match_versions = {
+        version.requirement_id: version
+        for version in latest_versions_query(project.id)
+        .filter(RequirementVersion.requirement_id.in_([match_id for match_id, _ in matches]))
+    } if matches else {}
+    
+    similar = []
+    for match_id, score in matches:
+        match_version = match_versions.get(match_id)
+        if match_version is None:
+            continue
+        similar.append({
+            'requirement_id': match_id,
+            'version_id': match_version.id,
+            'version_label': match_version.version_label,
+            'title': match_version.title,
+            'score': round(score, 3)
+        })
+    
+    return jsonify(similar)
 
 # Route to update requirement version data
 @bp.route("/requirement_version/<int:version_id>/update", methods=['POST'])
@@ -405,6 +646,7 @@ def update_requirement_version(version_id):
     version.title = title
     version.description = description
     version.category = category
+    version.update_text_vector()
     
     # Update status based on save type
     if save_type == 'intermediate':
@@ -539,6 +781,20 @@ def regenerate_requirement(req_id):
             "custom_data": latest_version.get_custom_data()
         }
         
+        # Retrieve sibling requirements so the alternative does not duplicate them
+        import config
+        related_index = EmbeddingIndex.build(
+            req.project_id,
+            cache_dir=config.VECTOR_INDEX_DIR
+        )
+        related = related_index.related(
+            latest_version.title,
+            latest_version.description,
+            top_k=config.RAG_TOP_K,
+            exclude_requirement_id=req.id
+        )
+        context["related_requirements"] = format_related_requirements(related, config.RAG_TOKEN_BUDGET)
+        
         # Build complete columns list: title, description, custom columns, category
         columns = ["title", "description"] + custom_columns + ["category"]
         
@@ -550,8 +806,8 @@ def regenerate_requirement(req_id):
             return redirect(request.referrer or url_for('main.manage_project', project_id=req.project_id))
         
         # Calculate next version
-        next_index = latest_version.version_index + 1
-        next_label = chr(ord('A') + (next_index - 1))
+        next_index = req.allocate_version_index()
+        next_label = version_label(next_index)
         
         # Create new version
         new_version = RequirementVersion(
@@ -577,6 +833,7 @@ def regenerate_requirement(req_id):
         if custom_data:
             new_version.set_custom_data(custom_data)
         
+        new_version.update_text_vector()
         db.session.add(new_version)
         db.session.commit()
         
@@ -590,6 +847,15 @@ def regenerate_requirement(req_id):
 def generate_single_requirement_alternative(context, columns):
     """Generate an alternative version of a requirement using AI."""
     try:
+        # Related requirements of the same project (retrieved by regenerate_requirement)
+        related_block = ""
+        if context.get('related_requirements'):
+            related_block = (
+                "\n        Verwandte Anforderungen im Projekt (NICHT duplizieren, nur abgrenzen):\n"
+                + "\n".join(f"        {line}" for line in context['related_requirements'].splitlines())
+                + "\n"
+            )
+        
         # Prepare prompt for AI - explicitly ask for a DIFFERENT alternative
         prompt = f"""
         Erstelle eine ALTERNATIVE Version der folgenden Anforderung.
@@ -605,7 +871,7 @@ def generate_single_requirement_alternative(context, columns):
         
         Zusätzliche Daten:
         {context['custom_data']}
-        
+        {related_block}
         Erstelle eine neue Version, die:
         1. Einen anderen Ansatz oder eine andere Perspektive verfolgt
         2. Andere technische Details oder Spezifikationen enthält
@@ -632,144 +898,120 @@ def generate_single_requirement_alternative(context, columns):
 @bp.route("/project/<int:project_id>/export_excel")
 @login_required
 def export_excel(project_id):
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment
-    from io import BytesIO
-    from flask import send_file
-    
+    return _serve_export(project_id, 'xlsx')
+
+@bp.route("/project/<int:project_id>/export_pdf")
+@login_required
+def export_pdf(project_id):
+    """PDF report of the latest versions (status colors, custom columns)."""
+    return _serve_export(project_id, 'pdf')
+
+def _serve_export(project_id, fmt):
+    """Send the project's export in `fmt`, or a progress page while it is being built."""
+    from flask import current_app
+    from .services.export_service import ensure_export, find_export
+    import config
+
     project = Project.query.get_or_404(project_id)
     if project.user_id != current_user.id:
         abort(403)
-    
-    # Get all non-deleted requirements with their latest versions
-    requirements = Requirement.query.filter_by(
-        project_id=project_id,
-        is_deleted=False
-    ).all()
-    
-    # Extract custom columns dynamically from all requirements
-    all_custom_columns = set()
-    for req in requirements:
-        latest_version = req.get_latest_version()
-        if latest_version:
-            custom_data = latest_version.get_custom_data()
-            if custom_data:
-                all_custom_columns.update(custom_data.keys())
-    
-    # Convert to sorted list for consistent display
-    custom_columns = sorted(list(all_custom_columns))
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Requirements"
-    
-    # Define headers: ID, title, description, category, dann custom columns (ohne diese 3), dann Version, Status
-    # Filter custom_columns to exclude title, description, category
-    filtered_custom_columns = [col for col in custom_columns if col not in ['title', 'description', 'category']]
-    headers = ["ID", "title", "description", "category"] + filtered_custom_columns + ["Version", "Status"]
-    
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num, value=header)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal="center", vertical="top")
-    
-    # Write data rows
-    row_num = 2
-    display_id = 1
-    
-    for req in requirements:
-        latest_version = req.get_latest_version()
-        if not latest_version:
-            continue
-        
-        # Previously we filtered to only export requirements with status "Fertig".
-        # Remove this filter so that all non-deleted requirements are exported
-        # regardless of their status. If you want a filter, add a query
-        # parameter and apply it before iterating requirements.
-        
-        custom_data = latest_version.get_custom_data()
-        
-        # Prepare row data: ID, title, description, category (from custom_data), custom columns, Version, Status
-        row_data = [
-            display_id,
-            custom_data.get('title', '–'),
-            custom_data.get('description', '–'),
-            custom_data.get('category', '–')
-        ]
-        
-        # Add other custom column values (excluding title, description, category)
-        for col in filtered_custom_columns:
-            row_data.append(custom_data.get(col, "–"))
-        
-        # Add version and status at the end
-        row_data.append(latest_version.version_label)
-        row_data.append(latest_version.status)
-        
-        # Write row
-        for col_num, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_num, column=col_num, value=value)
-            cell.alignment = Alignment(wrap_text=True, vertical="top")
-        
-        row_num += 1
-        display_id += 1
-    
-    # Set column widths
-    ws.column_dimensions['A'].width = 8   # ID
-    ws.column_dimensions['B'].width = 30  # title
-    ws.column_dimensions['C'].width = 50  # description
-    ws.column_dimensions['D'].width = 20  # category
-    
-    # Set widths for custom columns (start at column E)
-    col_letter_start = ord('E')
-    for i, col in enumerate(filtered_custom_columns):
-        col_letter = chr(col_letter_start + i)
-        ws.column_dimensions[col_letter].width = 20
-    
-    # Set width for version and status (after custom columns)
-    col_letter = chr(col_letter_start + len(filtered_custom_columns))
-    ws.column_dimensions[col_letter].width = 10  # Version
-    col_letter = chr(col_letter_start + len(filtered_custom_columns) + 1)
-    ws.column_dimensions[col_letter].width = 15  # Status
-    
-    # Generate filename with timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"requirements_{project.name.replace(' ', '_')}_{timestamp}.xlsx"
-
-    # Save file to uploads directory (use absolute path)
-    from flask import current_app
-    uploads_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
-    os.makedirs(uploads_dir, exist_ok=True)
-    filepath = os.path.join(uploads_dir, filename)
-    wb.save(filepath)
-
-    # Create database entry for exported file
-    project_file = ProjectFile(
-        project_id=project_id,
-        filename=filename,
-        filepath=filepath,
-        file_type='export',
-        created_by_id=current_user.id
-    )
-    db.session.add(project_file)
-    db.session.commit()
 
-    # Return file for download
+    # Unchanged projects reuse the last export; otherwise it is built in the background
+    project_file, job = ensure_export(current_app._get_current_object(), project, current_user.id, fmt)
+    if project_file is None and job.finished.wait(config.EXPORT_WAIT_SECONDS) and job.status == 'done':
+        project_file = find_export(project.id, job.revision, fmt)
+
+    if project_file is None:
+        # Large project: show progress and download when ready
+        return render_template("export_status.html", project=project, job=job)
+
+    return _send_export(project_file)
+
+def _send_export(project_file):
+    """Send a stored export; eviction keeps the file until the response is closed."""
+    from flask import send_file
+    from .services.export_service import EXPORT_MIMETYPES, open_export
+
+    try:
+        stream = open_export(project_file)
+    except OSError:
+        abort(404)
     return send_file(
-        filepath,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        stream,
+        mimetype=EXPORT_MIMETYPES.get(project_file.filename.rsplit('.', 1)[-1]),
         as_attachment=True,
-        download_name=filename
+        download_name=project_file.filename,
+        etag=f"export-{project_file.id}"
+    )
+
+@bp.route("/project/<int:project_id>/export_status")
+@login_required
+def export_status(project_id):
+    """Progress of the project's export (starts it if necessary); ?format=xlsx|pdf."""
+    from flask import current_app
+    from .services.export_service import EXPORT_MIMETYPES, ensure_export
+
+    project = Project.query.get_or_404(project_id)
+    if project.user_id != current_user.id:
+        abort(403)
+
+    fmt = request.args.get('format', 'xlsx')
+    if fmt not in EXPORT_MIMETYPES:
+        abort(400)
+
+    project_file, job = ensure_export(
+        current_app._get_current_object(), project, current_user.id, fmt, restart_failed=False
     )
+    if project_file is not None:
+        return jsonify({
+            'status': 'done',
+            'download_url': url_for('main.download_file', file_id=project_file.id)
+        })
+    return jsonify(job.to_dict())
+
+@bp.route("/project/<int:project_id>/export_csv")
+@login_required
+def export_csv(project_id):
+    """Stream the project export as CSV (same columns as the Excel export)."""
+    from flask import Response, stream_with_context
+    from .services.table_formats import CSV_MIMETYPE, export_table, iter_csv
+
+    project = Project.query.get_or_404(project_id)
+    if project.user_id != current_user.id:
+        abort(403)
+
+    headers, _, rows = export_table(project_id)
+    filename = f"requirements_{project.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    response = Response(stream_with_context(iter_csv(headers, rows)), mimetype=CSV_MIMETYPE)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@bp.route("/project/<int:project_id>/export_columnar")
+@login_required
+def export_columnar(project_id):
+    """Download the project export in the columnar .rqc format."""
+    from io import BytesIO
+    from flask import send_file
+    from .services.table_formats import COLUMNAR_MIMETYPE, export_table, write_columnar
+
+    project = Project.query.get_or_404(project_id)
+    if project.user_id != current_user.id:
+        abort(403)
+
+    headers, _, rows = export_table(project_id)
+    buffer = BytesIO()
+    write_columnar(headers, rows, buffer)
+    buffer.seek(0)
+    filename = f"requirements_{project.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.rqc"
+    return send_file(buffer, mimetype=COLUMNAR_MIMETYPE, as_attachment=True, download_name=filename)
 
 # Route to import requirements from Excel
 @bp.route("/project/<int:project_id>/import_excel", methods=['POST'])
 @login_required
 def import_excel(project_id):
-    from openpyxl import load_workbook
-    from werkzeug.utils import secure_filename
-    import os
+    from .services.import_service import ColumnMapping, latest_fingerprint, preview_import, read_import_rows
+    from .services.table_formats import TABLE_EXTENSIONS, read_table
+    from .services.upload_service import UploadError, spool_upload
     
     project = Project.query.get_or_404(project_id)
     if project.user_id != current_user.id:
@@ -786,119 +1028,103 @@ def import_excel(project_id):
         flash("Keine Datei ausgewählt.", "danger")
         return redirect(url_for('main.manage_project', project_id=project_id))
     
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        flash("Bitte laden Sie eine Excel-Datei (.xlsx oder .xls) hoch.", "danger")
+    if not file.filename.lower().endswith(TABLE_EXTENSIONS):
+        flash("Bitte laden Sie eine Excel-, CSV- oder .rqc-Datei (.xlsx, .xls, .csv, .rqc) hoch.", "danger")
         return redirect(url_for('main.manage_project', project_id=project_id))
     
+    # Copy the upload to a temporary file instead of parsing it from memory
     try:
-        # Load workbook
-        wb = load_workbook(file, data_only=True)
-        ws = wb.active
-        
-        # Get custom columns for this project
-        custom_columns = project.get_custom_columns()
-        
-        # Read header row to map columns
-        headers = []
-        for cell in ws[1]:
-            if cell.value:
-                headers.append(str(cell.value).strip())
+        upload = spool_upload(file)
+    except UploadError as e:
+        flash(str(e), "danger")
+        return redirect(url_for('main.manage_project', project_id=project_id))
+    
+    fileobj = open(upload.path, 'rb')
+    try:
+        # Excel, CSV or columnar - same column layout
+        header_row, data_rows = read_table(fileobj, file.filename)
         
-        # Find column indices
-        title_idx = None
-        description_idx = None
-        category_idx = None
-        status_idx = None
-        custom_col_indices = {}
+        # Map the header row to requirement fields and custom columns
+        mapping = ColumnMapping.from_headers(header_row, project.get_custom_columns())
+        if not mapping.complete:
+            flash("Die Datei muss mindestens 'Title' und 'Beschreibung' Spalten enthalten.", "danger")
+            return redirect(url_for('main.manage_project', project_id=project_id))
         
-        for idx, header in enumerate(headers):
-            header_lower = header.lower()
-            if header_lower in ['title', 'titel']:
-                title_idx = idx
-            elif header_lower in ['description', 'beschreibung']:
-                description_idx = idx
-            elif header_lower in ['category', 'kategorie']:
-                category_idx = idx
-            elif header_lower in ['status']:
-                status_idx = idx
-            elif header in custom_columns:
-                custom_col_indices[header] = idx
+        rows = read_import_rows(data_rows, mapping)
         
-        if title_idx is None or description_idx is None:
-            flash("Excel-Datei muss mindestens 'Title' und 'Beschreibung' Spalten enthalten.", "danger")
-            return redirect(url_for('main.manage_project', project_id=project_id))
+        # Dry run: validate and resolve every row, write nothing
+        if request.form.get('dry_run') == '1':
+            report = preview_import(project_id, rows, mapping.ignored)
+            return render_template('import_preview.html', project=project, report=report, filename=file.filename)
         
-        # Import rows (skip header)
-        imported_count = 0
-        for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            if not row or len(row) <= title_idx:
-                continue
-            
-            title = row[title_idx]
-            if not title or str(title).strip() == '':
-                continue
-            
-            title = str(title).strip()
-            description = str(row[description_idx]).strip() if description_idx < len(row) and row[description_idx] else ""
-            
-            if not description:
+        created_count = updated_count = unchanged_count = 0
+        duplicates = DuplicateDetector(project_id)
+        for item in rows:
+            # Rows without title or description are skipped
+            if item.errors:
                 continue
             
-            category = str(row[category_idx]).strip() if category_idx is not None and category_idx < len(row) and row[category_idx] else ""
-            status = str(row[status_idx]).strip() if status_idx is not None and status_idx < len(row) and row[status_idx] else "Offen"
-            
-            # Validate status
-            if status not in ['Offen', 'In Arbeit', 'Fertig']:
-                status = 'Offen'
-            
             # Create requirement
-            from .agent import normalize_key
-            key = normalize_key(title)
+            key = normalize_key(item.title)
             
             req = Requirement.query.filter_by(project_id=project_id, key=key).first()
             
+            # Reworded titles get a new key - match them by text similarity instead
+            vector = text_vector(item.title, item.description)
+            if not req:
+                duplicate_id = duplicates.find_duplicate(item.title, vector)
+                if duplicate_id:
+                    req = Requirement.query.get(duplicate_id)
+            
+            created = False
             if not req:
-                req = Requirement(project_id=project_id, key=key)
-                db.session.add(req)
-                db.session.flush()
-                version_index = 1
-                version_label = 'A'
+                req, created = Requirement.create_or_get(project_id, key)
+            
+            if created:
+                created_count += 1
+            elif latest_fingerprint(req.id) == item.fingerprint:
+                # Same content as the latest version - no new version
+                unchanged_count += 1
+                continue
             else:
-                # Create new version
-                last_version = req.versions[-1] if req.versions else None
-                version_index = last_version.version_index + 1 if last_version else 1
-                version_label = chr(ord('A') + (version_index - 1))
+                updated_count += 1
+            
+            # Reserve the next version index (atomic per requirement)
+            version_index = req.allocate_version_index()
             
             # Create version
             new_version = RequirementVersion(
                 requirement_id=req.id,
                 version_index=version_index,
-                version_label=version_label,
-                title=title,
-                description=description,
-                category=category,
-                status=status,
+                version_label=version_label(version_index),
+                title=item.title,
+                description=item.description,
+                category=item.category,
+                status=item.status,
                 created_by_id=current_user.id
             )
             
             # Add custom column data
-            custom_data = {}
-            for col_name, col_idx in custom_col_indices.items():
-                if col_idx < len(row) and row[col_idx]:
-                    custom_data[col_name] = str(row[col_idx]).strip()
-            
-            if custom_data:
-                new_version.set_custom_data(custom_data)
+            if item.custom_data:
+                new_version.set_custom_data(item.custom_data)
             
+            new_version.text_vector = vector_to_bytes(vector)
             db.session.add(new_version)
-            imported_count += 1
+            duplicates.add(req.id, vector)
         
         db.session.commit()
-        flash(f"{imported_count} Anforderungen erfolgreich importiert!", "success")
+        flash(f"Import abgeschlossen: {created_count} neu, {updated_count} aktualisiert, "
+              f"{unchanged_count} unverändert.", "success")
+        if duplicates.flagged:
+            titles = ", ".join(f"'{flagged['title']}'" for flagged in duplicates.flagged[:5])
+            flash(f"{len(duplicates.flagged)} mögliche Duplikate erkannt: {titles}", "warning")
         
     except Exception as e:
         db.session.rollback()
         flash(f"Fehler beim Importieren: {str(e)}", "danger")
+    finally:
+        fileobj.close()
+        upload.remove()
     
     return redirect(url_for('main.manage_project', project_id=project_id))
 
@@ -998,7 +1224,7 @@ def update_quantifizierbar(version_id):
     project = version.requirement.project
     
     # Authorization check
-    if project.user_id != current_user.id and current_user not in project.shared_with:
+    if not project.is_accessible_by(current_user):
         abort(403)
     
     # Get value from request
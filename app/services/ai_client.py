@@ -1,14 +1,19 @@
 import os
 import json
+import logging
 import re
 import sys
 from pathlib import Path
-from openai import OpenAI
+from openai import OpenAI, BadRequestError
+
+from .prompt_registry import prompt_registry
 
 # Add parent directory to path to import config
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 import config
 
+logger = logging.getLogger(__name__)
+
 
 class AIClient:
     """AI Client for requirements analysis and generation"""
@@ -157,25 +162,7 @@ def generate_new_requirements(user_description: str | None, inputs: dict, column
     # ===== PROMPT 1: NEU-GENERIERUNG =====
     # Dieser Prompt ist NUR für die Erstellung NEUER Anforderungen
     # NICHT für die Optimierung bestehender Excel-Anforderungen
-    system_prompt = """Du bist ein erfahrener Requirements Engineer. 
-Deine Aufgabe: NEUE Anforderungen VON GRUND AUF erstellen.
-
-PHASE 1 & 2 (Analyse/Struktur): 
-- Verstehe die Beschreibung des Users
-- Identifiziere die benötigten Anforderungs-Kategorien
-- Strukturiere die Anforderungen logisch
-
-PHASE 3 (Neu-Erstellung): 
-- Formuliere KOMPLETT NEUE Anforderungen
-- Nutze die Satzschablone "Das System muss..."
-- Stelle sicher: SMART, normenkonform, präzise
-- MINDESTENS 5 unterschiedliche Anforderungen
-
-PHASE 4 (Review): 
-- Qualitätscheck für jede Anforderung
-- Messbar, akzeptabel, testbar
-
-WICHTIG: Antworte NUR mit JSON. Kein zusätzlicher Text."""
+    system_prompt = prompt_registry.render("generate_system")
 
     client = OpenAI(api_key=api_key)
 
@@ -193,55 +180,24 @@ WICHTIG: Antworte NUR mit JSON. Kein zusätzlicher Text."""
     user_message = "\n".join(user_message_parts) if user_message_parts else "Bitte generiere allgemeine Software-Anforderungen."
 
     # Build developer message
-    if columns and isinstance(columns, list):
-        json_fields = [f'      "{col}": "Passender Wert für {col}"' for col in columns]
-        json_example = "{\n" + ",\n".join(json_fields) + "\n    }"
-        
-        developer_message = f"""Du musst ausschließlich mit gültigem JSON antworten.
-Das JSON-Format muss exakt dieser Struktur folgen:
-{{
-  "requirements": [
-    {json_example}
-  ]
-}}
-
-WICHTIG: 
-- Verwende EXAKT diese Spaltennamen: {', '.join(columns)}
-- Fülle ALLE Spalten mit sinnvollen Werten
-- Behalte die Struktur und Spaltennamen EXAKT bei
-- Generiere MINDESTENS 5 verschiedene Anforderungen
-- Antworte NUR mit diesem JSON, ohne zusätzlichen Text davor oder danach."""
-    else:
-        developer_message = """Du musst ausschließlich mit gültigem JSON antworten.
-Das JSON-Format muss exakt dieser Struktur folgen:
-{
-  "requirements": [
-    {
-      "title": "Kurzer, prägnanter Titel",
-      "description": "Detaillierte Beschreibung mit Akzeptanzkriterien",
-      "category": "Kategorie (z.B. Funktional, Nicht-Funktional, etc.)",
-      "status": "Offen"
-    }
-  ]
-}
-
-WICHTIG:
-- Generiere MINDESTENS 5 verschiedene Anforderungen
-- Antworte NUR mit diesem JSON, ohne zusätzlichen Text davor oder danach."""
+    developer_message = prompt_registry.render(
+        "generate_developer",
+        columns if columns and isinstance(columns, list) else None
+    )
 
     try:
-        response = client.chat.completions.create(
-            model=model,
+        response_text = _request_requirements_json(
+            client,
+            model,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "developer", "content": developer_message},
                 {"role": "user", "content": user_message}
             ],
+            columns=columns,
             temperature=0.2,
             max_tokens=2000
         )
-
-        response_text = response.choices[0].message.content.strip()
         requirements = _parse_json_response(response_text, columns)
         return requirements
 
@@ -277,27 +233,7 @@ def optimize_excel_requirements(existing_requirements: list[dict], columns: list
     # ===== PROMPT 2: EXCEL-OPTIMIERUNG =====
     # Dieser Prompt ist NUR für die Optimierung bestehender Excel-Anforderungen
     # NICHT für die Erstellung neuer Anforderungen
-    system_prompt = """Du bist ein erfahrener Requirements Engineer.
-Deine Aufgabe: BESTEHENDE Excel-Anforderungen OPTIMIEREN und VERBESSERN.
-
-PHASE 1 & 2 (Analyse/Struktur): 
-- Analysiere die übergebenen Anforderungen aus der Excel-Datei
-- Verstehe Kontext und vorhandene Struktur
-- Identifiziere Verbesserungspotenzial
-
-PHASE 3 (Optimierung): 
-- Verbessere JEDE einzelne Anforderung inhaltlich
-- Präzisiere Formulierungen
-- Stelle SMART-Kriterien sicher
-- Verbessere Normenkonformität
-- WICHTIG: GLEICHE ANZAHL beibehalten (keine neuen hinzufügen!)
-- WICHTIG: Spaltenstruktur EXAKT beibehalten
-
-PHASE 4 (Review): 
-- Qualitätscheck für jede optimierte Anforderung
-- Präzise, messbar, normenkonform
-
-WICHTIG: Antworte NUR mit den OPTIMIERTEN Anforderungen im gleichen JSON-Format. Kein zusätzlicher Text."""
+    system_prompt = prompt_registry.render("optimize_system")
 
     client = OpenAI(api_key=api_key)
 
@@ -312,38 +248,21 @@ WICHTIG: Antworte NUR mit den OPTIMIERTEN Anforderungen im gleichen JSON-Format.
     user_message = "\n".join(user_message_parts)
 
     # Build developer message
-    json_fields = [f'      "{col}": "Optimierter Wert für {col}"' for col in columns]
-    json_example = "{\n" + ",\n".join(json_fields) + "\n    }"
-    
-    developer_message = f"""Du musst ausschließlich mit gültigem JSON antworten.
-Das JSON-Format muss exakt dieser Struktur folgen:
-{{
-  "requirements": [
-    {json_example}
-  ]
-}}
-
-KRITISCH WICHTIG: 
-- Verwende EXAKT diese Spaltennamen: {', '.join(columns)}
-- KEINE zusätzlichen Spalten hinzufügen
-- KEINE Spalten entfernen
-- Behalte die GLEICHE ANZAHL an Anforderungen wie im Input
-- Optimiere nur den INHALT, nicht die Struktur
-- Antworte NUR mit diesem JSON, ohne zusätzlichen Text davor oder danach."""
+    developer_message = prompt_registry.render("optimize_developer", columns)
 
     try:
-        response = client.chat.completions.create(
-            model=model,
+        response_text = _request_requirements_json(
+            client,
+            model,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "developer", "content": developer_message},
                 {"role": "user", "content": user_message}
             ],
+            columns=columns,
             temperature=0.2,
             max_tokens=3000  # Increased for larger Excel files
         )
-
-        response_text = response.choices[0].message.content.strip()
         requirements = _parse_json_response(response_text, columns)
         return requirements
 
@@ -371,9 +290,117 @@ def generate_requirements(user_description: str | None, inputs: dict, columns: l
         return generate_new_requirements(user_description, inputs, columns)
 
 
+# Fields used when no project columns are given (see _validate_and_normalize_requirements)
+DEFAULT_REQUIREMENT_FIELDS = ["title", "description", "category", "status"]
+
+
+def _build_requirements_schema(columns: list = None) -> dict:
+    """
+    Build a strict JSON schema for the {"requirements": [...]} response.
+
+    Args:
+        columns (list): Optional list of column names for the project.
+
+    Returns:
+        dict: JSON schema with one string property per column.
+    """
+    fields = list(dict.fromkeys(columns)) if columns and isinstance(columns, list) else DEFAULT_REQUIREMENT_FIELDS
+    return {
+        "type": "object",
+        "properties": {
+            "requirements": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {field: {"type": "string"} for field in fields},
+                    "required": fields,
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["requirements"],
+        "additionalProperties": False
+    }
+
+
+def _build_response_format(model: str, columns: list = None) -> dict | None:
+    """
+    Build the response_format parameter for a model, if it supports one.
+
+    Args:
+        model (str): The AI model to use.
+        columns (list): Optional list of column names for the project.
+
+    Returns:
+        dict | None: response_format for chat.completions.create or None.
+    """
+    mode = config.get_response_format_mode(model)
+    if mode == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "requirements",
+                "strict": True,
+                "schema": _build_requirements_schema(columns)
+            }
+        }
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+def _is_response_format_error(error: BadRequestError) -> bool:
+    """Return True if a 400 error rejects the response_format (not e.g. the context length)."""
+    param = getattr(error, 'param', None) or ''
+    if param.startswith(('response_format', 'json_schema')):
+        return True
+    message = str(getattr(error, 'message', '') or error).lower()
+    return 'response_format' in message or 'json_schema' in message
+
+
+def _request_requirements_json(client: OpenAI, model: str, messages: list, columns: list = None, **params) -> str:
+    """
+    Request a requirements response, using JSON mode / Structured Outputs when available.
+
+    Falls back to a plain request if the model has no JSON mode or the API
+    rejects the response_format, so _parse_json_response can still extract
+    the JSON from free text. Other errors are raised; the mode of a model can
+    be switched off in AVAILABLE_AI_MODELS (config.get_response_format_mode).
+
+    Args:
+        client (OpenAI): OpenAI client instance.
+        model (str): The AI model to use.
+        messages (list): Chat messages.
+        columns (list): Optional list of column names for the schema.
+        **params: Additional parameters for chat.completions.create.
+
+    Returns:
+        str: Raw response text from OpenAI.
+    """
+    response_format = _build_response_format(model, columns)
+    if response_format:
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                response_format=response_format,
+                **params
+            )
+            return (response.choices[0].message.content or "").strip()
+        except BadRequestError as e:
+            if not _is_response_format_error(e):
+                raise
+            # Model snapshot does not support this response_format - use the plain request
+            logger.warning("Model %s rejected response_format %s, retrying without it: %s",
+                           model, response_format['type'], e)
+
+    response = client.chat.completions.create(model=model, messages=messages, **params)
+    return (response.choices[0].message.content or "").strip()
+
+
 def _parse_json_response(response_text: str, columns: list = None) -> list[dict]:
     """
-    Robustly parse JSON response from OpenAI, with fallback to regex extraction.
+    Robustly parse JSON response from OpenAI, with fallback to a single-pass block scanner.
 
     Args:
         response_text (str): Raw response text from OpenAI.
@@ -390,40 +417,116 @@ def _parse_json_response(response_text: str, columns: list = None) -> list[dict]
         data = json.loads(response_text)
         if isinstance(data, dict) and "requirements" in data:
             return _validate_and_normalize_requirements(data["requirements"], columns)
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, RecursionError):
         pass
 
-    # Fallback: Extract JSON block using regex
-    # Look for JSON object that contains "requirements"
-    json_pattern = r'\{[^{}]*"requirements"[^{}]*\[[^\]]*\][^{}]*\}'
-    # More robust pattern that handles nested structures
-    json_pattern = r'\{(?:[^{}]|\{[^{}]*\})*"requirements"(?:[^{}]|\{[^{}]*\})*\[(?:[^\[\]]|\[[^\[\]]*\])*\](?:[^{}]|\{[^{}]*\})*\}'
-    
-    matches = re.findall(json_pattern, response_text, re.DOTALL)
-    
-    for match in matches:
+    # Fallback: scan the text once for balanced JSON blocks. Objects that
+    # contain "requirements" are decoded first, in document order (outermost
+    # first); only if none of them decodes is the first array of objects used.
+    fallback_list = None
+    failed_decodes = 0
+    candidates = sorted(
+        _find_json_candidates(response_text),
+        key=lambda candidate: (not candidate[2], candidate[0], -candidate[1])
+    )
+
+    for start, end, has_requirements in candidates:
+        if not has_requirements and fallback_list is not None:
+            break
         try:
-            data = json.loads(match)
-            if isinstance(data, dict) and "requirements" in data:
-                return _validate_and_normalize_requirements(data["requirements"], columns)
-        except json.JSONDecodeError:
+            data = json.loads(response_text[start:end])
+        except (ValueError, RecursionError):
+            failed_decodes += 1
+            if failed_decodes >= _MAX_DECODE_ATTEMPTS:
+                break
             continue
+        if isinstance(data, dict) and "requirements" in data:
+            return _validate_and_normalize_requirements(data["requirements"], columns)
+        if isinstance(data, list) and fallback_list is None:
+            fallback_list = data
 
-    # If still no valid JSON found, try to extract just the array
-    array_pattern = r'\[\s*\{[^\]]+\}\s*\]'
-    array_matches = re.findall(array_pattern, response_text, re.DOTALL)
-    
-    for match in array_matches:
-        try:
-            data = json.loads(match)
-            if isinstance(data, list):
-                return _validate_and_normalize_requirements(data, columns)
-        except json.JSONDecodeError:
-            continue
+    if fallback_list is not None:
+        return _validate_and_normalize_requirements(fallback_list, columns)
 
     raise RuntimeError("Invalid JSON response from model: Could not parse requirements structure.")
 
 
+# Upper bound for failed json.loads() calls on scanner candidates. Together
+# with the single-pass scanner this keeps parsing linear in the length of the
+# response; successful decodes end the search (or, for arrays, the array phase).
+_MAX_DECODE_ATTEMPTS = 16
+
+_REQUIREMENTS_TOKEN = '"requirements"'
+_OBJECT_START = re.compile(r'\s*\{')
+_SCAN_TOKENS = re.compile(r'[{}\[\]"\\]')
+
+
+def _find_json_candidates(text: str) -> list[tuple[int, int, bool]]:
+    """
+    Find spans of balanced JSON blocks that may hold requirements.
+
+    The text is scanned exactly once. Braces and brackets inside JSON strings
+    are ignored, mismatched closers discard the current block and unclosed
+    blocks are dropped, so prose around or inside the model output cannot
+    cause backtracking.
+
+    Args:
+        text (str): Raw response text from OpenAI.
+
+    Returns:
+        list[tuple[int, int, bool]]: (start, end, has_requirements) spans of
+                                     objects containing a "requirements" key
+                                     (True) and of arrays of objects (False).
+    """
+    candidates = []
+    # Each frame: [expected closer, start index, contains "requirements"]
+    stack = []
+    in_string = False
+    string_start = 0
+    skip_to = 0
+
+    for match in _SCAN_TOKENS.finditer(text):
+        i = match.start()
+        if i < skip_to:
+            continue
+        ch = match.group()
+
+        if in_string:
+            if ch == '\\':
+                skip_to = i + 2  # Skip the escaped character
+            elif ch == '"':
+                in_string = False
+                if text[string_start:i + 1] == _REQUIREMENTS_TOKEN:
+                    stack[-1][2] = True
+            continue
+
+        if ch == '"':
+            # Quotes only start strings inside a block; prose may contain them freely
+            if stack:
+                in_string = True
+                string_start = i
+        elif ch == '{':
+            stack.append(['}', i, False])
+        elif ch == '[':
+            stack.append([']', i, False])
+        elif ch in '}]':
+            if not stack:
+                continue
+            closer, start, has_key = stack.pop()
+            if ch != closer:
+                stack.clear()
+                continue
+            if has_key:
+                if stack:
+                    stack[-1][2] = True
+                if closer == '}':
+                    candidates.append((start, i + 1, True))
+            if closer == ']' and _OBJECT_START.match(text, start + 1):
+                candidates.append((start, i + 1, False))
+
+    return candidates
+
+
 def _validate_and_normalize_requirements(requirements: list, columns: list = None) -> list[dict]:
     """
     Validate and normalize requirements list with support for dynamic columns.
@@ -0,0 +1,287 @@
+"""
+Batch Service Module
+Several requirement mutations of one project applied in a single transaction.
+
+The single-item routes (update_status, update_custom_data, toggle_block,
+delete, restore) each load one object and commit. A batch loads every
+referenced version and requirement of the project with one query each,
+applies the operations in order and leaves a single commit to the caller.
+Operations that fail validation are reported per item and skipped; the
+others are applied.
+
+Operation format (JSON objects):
+    {"op": "update_status", "version_id": 12, "status": "Fertig"}
+    {"op": "update_custom_data", "version_id": 12, "column_name": "Prio", "value": "hoch"}
+    {"op": "toggle_block", "version_id": 12, "blocked": true}   # "blocked" optional: toggles
+    {"op": "delete", "requirement_id": 5}                        # soft delete
+    {"op": "restore", "requirement_id": 5}
+
+Inline edits of custom data use apply_custom_data_patches() instead: one
+JSON merge patch (RFC 7386, flat: null removes a column) per version,
+guarded by the fingerprint the client last saw. If any version changed in
+the meantime, nothing is applied and PatchConflict carries the current
+state of the changed versions. Users a project is shared with may only
+patch the SHARED_PATCH_COLUMNS, and only with their allowed values: the
+caller checks the columns with patched_columns() and passes the mapping as
+`allowed_values`.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .import_service import VALID_STATUSES
+
+BATCH_MAX_OPERATIONS = 500
+
+VERSION_OPERATIONS = ('update_status', 'update_custom_data', 'toggle_block')
+REQUIREMENT_OPERATIONS = ('delete', 'restore')
+# Custom data columns users a project is shared with may edit -> allowed values
+SHARED_PATCH_COLUMNS = {'quantifizierbar': ('ja', 'nein')}
+
+
+class BatchError(ValueError):
+    """Raised if the batch as a whole is invalid"""
+
+
+class PatchConflict(Exception):
+    """Raised if patched versions changed since the client loaded them"""
+
+    def __init__(self, conflicts: List[Dict[str, Any]]):
+        super().__init__(
+            f"{len(conflicts)} Version(en) wurden zwischenzeitlich geändert, gelöscht oder blockiert."
+        )
+        self.conflicts = conflicts
+
+
+def _object_id(operation: Dict[str, Any], field: str) -> int:
+    value = operation.get(field)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"'{field}' fehlt oder ist keine Zahl")
+    return value
+
+
+def apply_batch(project, operations: List[Dict[str, Any]], user_id: int) -> List[Dict[str, Any]]:
+    """
+    Apply requirement mutations of one project without committing.
+
+    Authorization is the caller's job (once for the project); objects of
+    other projects are reported as not found.
+
+    Args:
+        project (Project): Project all operations refer to
+        operations (list): Operation dictionaries (see module docstring)
+        user_id (int): User applying the batch (recorded when blocking)
+
+    Returns:
+        list: One result per operation: {'index', 'ok'} or {'index', 'ok', 'error'}
+
+    Raises:
+        BatchError: If `operations` is not a list or too long
+    """
+    from ..models import Requirement, RequirementVersion
+
+    if not isinstance(operations, list) or not operations:
+        raise BatchError("'operations' muss eine nicht leere Liste sein.")
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise BatchError(f"Höchstens {BATCH_MAX_OPERATIONS} Operationen pro Anfrage.")
+
+    version_ids, requirement_ids = set(), set()
+    for operation in operations:
+        if isinstance(operation, dict):
+            if isinstance(operation.get('version_id'), int):
+                version_ids.add(operation['version_id'])
+            if isinstance(operation.get('requirement_id'), int):
+                requirement_ids.add(operation['requirement_id'])
+
+    # One query per object type, restricted to the project
+    versions = {
+        version.id: version
+        for version in RequirementVersion.query.join(Requirement)
+        .filter(Requirement.project_id == project.id, RequirementVersion.id.in_(version_ids))
+    } if version_ids else {}
+    requirements = {
+        requirement.id: requirement
+        for requirement in Requirement.query
+        .filter(Requirement.project_id == project.id, Requirement.id.in_(requirement_ids))
+    } if requirement_ids else {}
+
+    # Custom data is parsed and written once per version, however many cells change
+    custom_updates = {}
+    results = []
+    for index, operation in enumerate(operations):
+        try:
+            if not isinstance(operation, dict):
+                raise ValueError("Operation muss ein Objekt sein")
+            op = operation.get('op')
+
+            if op in VERSION_OPERATIONS:
+                version = versions.get(_object_id(operation, 'version_id'))
+                if version is None:
+                    raise ValueError("Version nicht gefunden")
+
+                if op == 'update_status':
+                    status = operation.get('status')
+                    if status not in VALID_STATUSES:
+                        raise ValueError(f"Ungültiger Status: {status}")
+                    version.status = status
+
+                elif op == 'update_custom_data':
+                    column_name = operation.get('column_name')
+                    if not isinstance(column_name, str) or not column_name.strip():
+                        raise ValueError("'column_name' fehlt")
+                    value = operation.get('value')
+                    if version.id not in custom_updates:
+                        custom_updates[version.id] = (version, version.get_custom_data())
+                    custom_updates[version.id][1][column_name] = str(value).strip() if value is not None else ''
+
+                else:  # toggle_block
+                    blocked = operation.get('blocked', not version.is_blocked)
+                    if not isinstance(blocked, bool):
+                        raise ValueError("'blocked' muss true oder false sein")
+                    version.is_blocked = blocked
+                    version.blocked_by_id = user_id if blocked else None
+                    version.blocked_at = datetime.utcnow() if blocked else None
+
+            elif op in REQUIREMENT_OPERATIONS:
+                requirement = requirements.get(_object_id(operation, 'requirement_id'))
+                if requirement is None:
+                    raise ValueError("Anforderung nicht gefunden")
+                requirement.is_deleted = op == 'delete'
+
+            else:
+                raise ValueError(f"Unbekannte Operation: {op}")
+
+            results.append({'index': index, 'ok': True})
+        except ValueError as e:
+            results.append({'index': index, 'ok': False, 'error': str(e)})
+
+    for version, custom_data in custom_updates.values():
+        version.set_custom_data(custom_data)
+    return results
+
+
+def merge_patch(custom_data: Dict[str, str], patch: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Apply a JSON merge patch to flat custom data.
+
+    Args:
+        custom_data (dict): Current custom data of a version
+        patch (dict): Column -> new value; None removes the column
+
+    Returns:
+        dict: The patched copy
+    """
+    merged = dict(custom_data)
+    for column, value in patch.items():
+        if value is None:
+            merged.pop(column, None)
+        else:
+            merged[column] = str(value).strip()
+    return merged
+
+
+def version_state(version) -> Dict[str, Any]:
+    """Current custom data and fingerprint of a version, as sent to the client"""
+    return {
+        'version_id': version.id,
+        'fingerprint': version.fingerprint or version.compute_fingerprint(),
+        'custom_data': version.get_custom_data(),
+        'blocked': bool(version.is_blocked),
+    }
+
+
+def _validate_patch(item: Any, allowed_values: Optional[Dict[str, Tuple[str, ...]]] = None) -> Dict[str, Any]:
+    if not isinstance(item, dict):
+        raise BatchError("Jeder Eintrag muss ein Objekt sein.")
+    version_id = item.get('version_id')
+    if isinstance(version_id, bool) or not isinstance(version_id, int):
+        raise BatchError("'version_id' fehlt oder ist keine Zahl.")
+    if not isinstance(item.get('fingerprint'), str):
+        raise BatchError(f"Version {version_id}: 'fingerprint' fehlt.")
+    patch = item.get('patch')
+    if not isinstance(patch, dict) or not patch:
+        raise BatchError(f"Version {version_id}: 'patch' muss ein nicht leeres Objekt sein.")
+    for column, value in patch.items():
+        if not column.strip():
+            raise BatchError(f"Version {version_id}: leerer Spaltenname.")
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int, float))):
+            raise BatchError(f"Version {version_id}: Wert für '{column}' muss Text, Zahl oder null sein.")
+        if allowed_values and column in allowed_values and value not in allowed_values[column]:
+            raise BatchError(
+                f"Version {version_id}: Wert für '{column}' muss einer von {', '.join(allowed_values[column])} sein."
+            )
+    return item
+
+
+def patched_columns(patches: Any) -> Set[str]:
+    """Return the columns the well-formed entries of `patches` change (malformed ones are rejected later)."""
+    if not isinstance(patches, list):
+        return set()
+    return {
+        column
+        for item in patches if isinstance(item, dict) and isinstance(item.get('patch'), dict)
+        for column in item['patch']
+    }
+
+
+def apply_custom_data_patches(project, patches: List[Dict[str, Any]],
+                              allowed_values: Optional[Dict[str, Tuple[str, ...]]] = None) -> List[Any]:
+    """
+    Apply merge patches to the custom data of several versions, all or none.
+
+    Each patch is {"version_id": 12, "fingerprint": "...", "patch": {"Prio": "hoch", "Alt": null}}.
+    The fingerprint is the one the client loaded the version with; a version
+    whose content changed since, that is blocked or that no longer exists is
+    a conflict. Nothing is committed.
+
+    Args:
+        project (Project): Project all versions belong to
+        patches (list): Patch dictionaries, at most one per version
+        allowed_values (dict, optional): Column -> allowed values; other values
+            of these columns (including null) are rejected
+
+    Returns:
+        list: The patched RequirementVersion objects, in request order
+
+    Raises:
+        BatchError: If `patches` is malformed, too long or has a value not in `allowed_values`
+        PatchConflict: If any version changed; no version is modified then
+    """
+    from ..models import Requirement, RequirementVersion
+
+    if not isinstance(patches, list) or not patches:
+        raise BatchError("'versions' muss eine nicht leere Liste sein.")
+    if len(patches) > BATCH_MAX_OPERATIONS:
+        raise BatchError(f"Höchstens {BATCH_MAX_OPERATIONS} Versionen pro Anfrage.")
+    patches = [_validate_patch(item, allowed_values) for item in patches]
+    version_ids = [item['version_id'] for item in patches]
+    if len(set(version_ids)) != len(version_ids):
+        raise BatchError("Jede Version darf nur einmal vorkommen.")
+
+    versions = {
+        version.id: version
+        for version in RequirementVersion.query.join(Requirement)
+        .filter(Requirement.project_id == project.id, RequirementVersion.id.in_(version_ids))
+    }
+
+    conflicts = []
+    for item in patches:
+        version = versions.get(item['version_id'])
+        if version is None:
+            conflicts.append({'version_id': item['version_id'], 'missing': True})
+            continue
+        state = version_state(version)
+        if state['blocked'] or state['fingerprint'] != item['fingerprint']:
+            conflicts.append(state)
+    if conflicts:
+        raise PatchConflict(conflicts)
+
+    patched = []
+    for item in patches:
+        version = versions[item['version_id']]
+        custom_data = version.get_custom_data()
+        merged = merge_patch(custom_data, item['patch'])
+        if merged != custom_data:
+            version.set_custom_data(merged)
+        patched.append(version)
+    return patched
@@ -0,0 +1,256 @@
+"""
+Diff Service Module
+Word-level diffs between requirement versions.
+
+A patch is a list of compact operations against the old text:
+    ["=", n]      keep the next n characters
+    ["-", text]   text removed from the old version
+    ["+", text]   text added in the new version
+apply_patch(old, patch) reconstructs the new text, so a client holding one
+full version can materialize the others from a chain of patches.
+"""
+
+import difflib
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from markupsafe import Markup, escape
+
+_TOKEN_PATTERN = re.compile(r'\w+|\s+|[^\w\s]')
+
+# Fields of RequirementVersion that are compared in addition to custom_data
+DIFF_FIELDS = ('title', 'description', 'category', 'status')
+
+DIFF_CACHE_SIZE = 1024
+
+# Versions shown per page of the history view
+HISTORY_PAGE_SIZE = 20
+
+
+def diff_text(old: Optional[str], new: Optional[str]) -> List[list]:
+    """
+    Compute a word-level patch between two texts.
+
+    Args:
+        old (str): Old text
+        new (str): New text
+
+    Returns:
+        List[list]: Compact patch (see module docstring); [] if the texts are equal
+    """
+    old = old or ""
+    new = new or ""
+    if old == new:
+        return []
+
+    old_tokens = _TOKEN_PATTERN.findall(old)
+    new_tokens = _TOKEN_PATTERN.findall(new)
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+
+    patch = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            _append(patch, "=", sum(len(t) for t in old_tokens[i1:i2]))
+            continue
+        if i2 > i1:
+            _append(patch, "-", "".join(old_tokens[i1:i2]))
+        if j2 > j1:
+            _append(patch, "+", "".join(new_tokens[j1:j2]))
+    return patch
+
+
+def _append(patch: List[list], op: str, value) -> None:
+    """Append an operation, merging it with the previous one of the same kind."""
+    if patch and patch[-1][0] == op:
+        patch[-1][1] += value
+    else:
+        patch.append([op, value])
+
+
+def apply_patch(old: Optional[str], patch: List[list]) -> str:
+    """
+    Apply a patch produced by diff_text to the old text.
+
+    Args:
+        old (str): Old text
+        patch (List[list]): Patch from diff_text; "-" ops may carry the
+            removed length instead of the text (see compact_patch)
+
+    Returns:
+        str: New text
+    """
+    old = old or ""
+    if not patch:
+        return old
+
+    pos = 0
+    parts = []
+    for op, value in patch:
+        if op == "=":
+            parts.append(old[pos:pos + value])
+            pos += value
+        elif op == "-":
+            pos += value if isinstance(value, int) else len(value)
+        elif op == "+":
+            parts.append(value)
+    return "".join(parts)
+
+
+def compact_patch(patch: List[list]) -> List[list]:
+    """
+    Replace removed texts by their length.
+
+    The result can still be applied with apply_patch but no longer rendered;
+    it is meant for storage where the old text is always available.
+
+    Args:
+        patch (List[list]): Patch from diff_text
+
+    Returns:
+        List[list]: Patch with ["-", n] operations
+    """
+    return [[op, len(value)] if op == "-" else [op, value] for op, value in patch]
+
+
+def render_patch_html(old: Optional[str], patch: List[list], context: int = 60) -> Markup:
+    """
+    Render a patch as HTML with <del>/<ins> markup.
+
+    Unchanged runs longer than 2 * context characters are shortened to their
+    start and end.
+
+    Args:
+        old (str): Old text
+        patch (List[list]): Patch from diff_text
+        context (int): Characters of unchanged text to show around changes
+
+    Returns:
+        Markup: Escaped HTML
+    """
+    old = old or ""
+    pos = 0
+    html = []
+    for op, value in patch:
+        if op == "=":
+            text = old[pos:pos + value]
+            pos += value
+            if len(text) > 2 * context:
+                html.append(escape(text[:context]) + Markup("<span class=\"text-muted\"> … </span>") + escape(text[-context:]))
+            else:
+                html.append(escape(text))
+        elif op == "-":
+            pos += len(value)
+            html.append(Markup("<del class=\"text-danger\">%s</del>") % value)
+        elif op == "+":
+            html.append(Markup("<ins class=\"text-success\">%s</ins>") % value)
+    return Markup("").join(html)
+
+
+def _fingerprint(version) -> int:
+    """Cheap content checksum so cached diffs are dropped when a version is edited in place."""
+    content = "\x1f".join(str(getattr(version, field) or "") for field in DIFF_FIELDS)
+    return zlib.crc32(f"{content}\x1e{version.custom_data or ''}".encode('utf-8'))
+
+
+class DiffCache:
+    """Thread-safe LRU cache of version diffs keyed by version-id pair and content"""
+
+    def __init__(self, maxsize: int = DIFF_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+_diff_cache = DiffCache()
+
+
+def diff_versions(old_version, new_version) -> Dict:
+    """
+    Diff two RequirementVersion rows.
+
+    Only changed fields are included. Results are cached per version-id pair
+    (and content checksum, so in-place edits invalidate the entry).
+
+    Args:
+        old_version (RequirementVersion): Base version
+        new_version (RequirementVersion): Target version
+
+    Returns:
+        Dict: {'from': id, 'to': id, 'fields': {field: patch},
+               'custom_data': {column: patch}}
+    """
+    key = (old_version.id, new_version.id, _fingerprint(old_version), _fingerprint(new_version))
+    cached = _diff_cache.get(key)
+    if cached is not None:
+        return cached
+
+    fields = {}
+    for field in DIFF_FIELDS:
+        patch = diff_text(getattr(old_version, field), getattr(new_version, field))
+        if patch:
+            fields[field] = patch
+
+    old_data = old_version.get_custom_data()
+    new_data = new_version.get_custom_data()
+    custom_data = {}
+    for column in sorted(set(old_data) | set(new_data)):
+        patch = diff_text(
+            "" if old_data.get(column) is None else str(old_data.get(column)),
+            "" if new_data.get(column) is None else str(new_data.get(column))
+        )
+        if patch:
+            custom_data[column] = patch
+
+    result = {
+        'from': old_version.id,
+        'to': new_version.id,
+        'fields': fields,
+        'custom_data': custom_data
+    }
+    _diff_cache.put(key, result)
+    return result
+
+
+def render_version_diff(old_version, new_version) -> Dict:
+    """
+    Render the diff between two versions as HTML.
+
+    Fields and custom columns are kept apart, so a custom column named like
+    a field (e.g. 'title') cannot hide the field's change.
+
+    Args:
+        old_version (RequirementVersion): Base version
+        new_version (RequirementVersion): Target version
+
+    Returns:
+        Dict: {'fields': {field: Markup}, 'custom_data': {column: Markup}}
+    """
+    diff = diff_versions(old_version, new_version)
+    old_data = old_version.get_custom_data()
+    return {
+        'fields': {
+            field: render_patch_html(getattr(old_version, field), patch)
+            for field, patch in diff['fields'].items()
+        },
+        'custom_data': {
+            column: render_patch_html("" if old_data.get(column) is None else str(old_data.get(column)), patch)
+            for column, patch in diff['custom_data'].items()
+        }
+    }
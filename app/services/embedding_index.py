@@ -0,0 +1,319 @@
+"""
+Embedding Index Module
+Local vector index over a project's requirements for retrieval-augmented prompts.
+
+The embedding function is pluggable (see get_embedder). The default hashing
+embedder is deterministic and works offline; the OpenAI embedder gives better
+recall for paraphrases. Indexes can be persisted as .npy files and opened as
+memory maps, so rows of unchanged versions are never embedded twice. Without
+an index directory, rows of API embedders are kept in memory per process.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+from openai import OpenAI
+
+# Add parent directory to path to import config
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import config
+
+from .similarity_service import (
+    SimilarityIndex, latest_versions_query, text_vector, vector_from_bytes, VECTOR_DIM, VECTOR_DTYPE
+)
+
+# Rough size of a token for budget estimates (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+# Projects whose rows are kept in memory when no index directory is set
+MEMORY_CACHE_PROJECTS = 32
+
+_memory_rows = OrderedDict()  # (project id, embedder name) -> {version_id: vector}
+_memory_rows_lock = threading.Lock()
+
+
+class HashingEmbedder:
+    """Deterministic local embedder based on hashed character n-grams"""
+
+    name = "hashing"
+    dim = VECTOR_DIM
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=VECTOR_DTYPE)
+        for idx, text in enumerate(texts):
+            matrix[idx] = text_vector(text)
+        return matrix
+
+
+class OpenAIEmbedder:
+    """Embedder using the OpenAI embeddings API"""
+
+    DIMENSIONS = {
+        "text-embedding-3-small": 1536,
+        "text-embedding-3-large": 3072,
+        "text-embedding-ada-002": 1536,
+    }
+
+    def __init__(self, model: Optional[str] = None):
+        if not config.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY environment variable must be set.")
+        self.model = model or config.EMBEDDING_MODEL
+        self.name = f"openai-{self.model}"
+        self.dim = self.DIMENSIONS.get(self.model, 1536)
+        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=VECTOR_DTYPE)
+        if not texts:
+            return matrix
+        response = self.client.embeddings.create(model=self.model, input=list(texts))
+        for item in response.data:
+            matrix[item.index] = item.embedding
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+EMBEDDERS = {
+    "hashing": HashingEmbedder,
+    "openai": OpenAIEmbedder,
+}
+
+
+def get_embedder(name: Optional[str] = None) -> Callable[[Sequence[str]], np.ndarray]:
+    """
+    Create the configured embedder.
+
+    Args:
+        name (str, optional): 'hashing' or 'openai'. Defaults to config.EMBEDDING_BACKEND.
+
+    Returns:
+        Embedder with `name`, `dim` and __call__(texts) -> (n, dim) normalized matrix
+
+    Raises:
+        ValueError: If the embedder name is unknown
+    """
+    name = name or config.EMBEDDING_BACKEND or "hashing"
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedding backend: {name}. Available: {', '.join(EMBEDDERS)}")
+    return EMBEDDERS[name]()
+
+
+def version_text(title: str, description: str) -> str:
+    """Text that is embedded for a requirement version."""
+    return f"{title or ''}\n{description or ''}"
+
+
+class EmbeddingIndex:
+    """Vector index over the latest versions of a project's requirements"""
+
+    def __init__(self, embedder, requirement_ids, version_ids, matrix, texts):
+        self.embedder = embedder
+        self.version_ids = np.asarray(version_ids, dtype=np.int64)
+        self.texts = texts
+        self.index = SimilarityIndex(requirement_ids, matrix, dim=embedder.dim)
+
+    def __len__(self):
+        return len(self.index)
+
+    @classmethod
+    def build(cls, project_id: int, embedder=None, cache_dir: Optional[str] = None) -> "EmbeddingIndex":
+        """
+        Build the index for a project.
+
+        If cache_dir is set, the matrix is stored there and opened as a memory
+        map; rows of versions that are already in the cached index are reused.
+        Without cache_dir, rows of embedders other than the hashing one (whose
+        vectors are stored per version) are reused from a per-process cache.
+
+        Args:
+            project_id (int): Project id
+            embedder: Embedding function (defaults to get_embedder())
+            cache_dir (str, optional): Directory for the on-disk index
+
+        Returns:
+            EmbeddingIndex: Index keyed by requirement id
+        """
+        from ..models import RequirementVersion
+
+        embedder = embedder or get_embedder()
+        rows = latest_versions_query(project_id).with_entities(
+            RequirementVersion.id,
+            RequirementVersion.requirement_id,
+            RequirementVersion.title,
+            RequirementVersion.description,
+            RequirementVersion.text_vector
+        ).order_by(RequirementVersion.id).all()
+
+        version_ids = [row[0] for row in rows]
+        requirement_ids = [row[1] for row in rows]
+        texts = {row[1]: (row[2], row[3]) for row in rows}
+
+        use_memory = not cache_dir and embedder.name != HashingEmbedder.name
+        if cache_dir:
+            cached = _load_cached_rows(cache_dir, project_id, embedder)
+        elif use_memory:
+            cached = _memory_cached_rows(project_id, embedder)
+        else:
+            cached = {}
+        matrix = np.zeros((len(rows), embedder.dim), dtype=VECTOR_DTYPE)
+
+        missing = []
+        for idx, (version_id, _, title, description, data) in enumerate(rows):
+            if version_id in cached:
+                matrix[idx] = cached[version_id]
+                continue
+            # Hashing vectors are already stored per version
+            stored = vector_from_bytes(data) if embedder.name == HashingEmbedder.name else None
+            if stored is not None:
+                matrix[idx] = stored
+            else:
+                missing.append(idx)
+
+        if missing:
+            embedded = embedder([version_text(rows[i][2], rows[i][3]) for i in missing])
+            matrix[missing] = embedded
+
+        if use_memory:
+            _remember_rows(project_id, embedder, version_ids, matrix)
+        elif cache_dir:
+            reused = sum(1 for version_id in version_ids if version_id in cached)
+            unchanged = reused == len(version_ids) == len(cached)
+            # Release the old memory map before the file is replaced
+            cached = None
+            if unchanged:
+                matrix = np.load(_cache_paths(cache_dir, project_id, embedder)[0], mmap_mode='r')
+            else:
+                matrix = _save_cached_rows(cache_dir, project_id, embedder, version_ids, matrix)
+
+        return cls(embedder, requirement_ids, version_ids, matrix, texts)
+
+    def related(self, title: str, description: str, top_k: int = 5, min_score: float = 0.0,
+                exclude_requirement_id: Optional[int] = None) -> List[dict]:
+        """
+        Find the requirements most related to a text.
+
+        Returns:
+            List[dict]: {'requirement_id', 'title', 'description', 'score'}, best first
+        """
+        query = self.embedder([version_text(title, description)])[0]
+        matches = self.index.query(query, top_k=top_k, min_score=min_score, exclude_id=exclude_requirement_id)
+        return [
+            {
+                'requirement_id': req_id,
+                'title': self.texts[req_id][0],
+                'description': self.texts[req_id][1],
+                'score': score
+            }
+            for req_id, score in matches
+        ]
+
+
+def _cache_paths(cache_dir: str, project_id: int, embedder):
+    base = os.path.join(cache_dir, f"project_{project_id}_{embedder.name}")
+    return base + ".npy", base + ".json"
+
+
+def _memory_cached_rows(project_id: int, embedder) -> dict:
+    """Rows {version_id: vector} kept in memory for a project."""
+    key = (project_id, embedder.name)
+    with _memory_rows_lock:
+        rows = _memory_rows.get(key)
+        if rows is None:
+            return {}
+        _memory_rows.move_to_end(key)
+        return rows
+
+
+def _remember_rows(project_id: int, embedder, version_ids: List[int], matrix: np.ndarray) -> None:
+    """Keep the rows of the current versions in memory (replaces older rows of the project)."""
+    key = (project_id, embedder.name)
+    rows = {version_id: matrix[idx] for idx, version_id in enumerate(version_ids)}
+    with _memory_rows_lock:
+        _memory_rows[key] = rows
+        _memory_rows.move_to_end(key)
+        while len(_memory_rows) > MEMORY_CACHE_PROJECTS:
+            _memory_rows.popitem(last=False)
+
+
+def _load_cached_rows(cache_dir: str, project_id: int, embedder) -> dict:
+    """Load {version_id: vector} from an on-disk index (memory-mapped)."""
+    matrix_path, meta_path = _cache_paths(cache_dir, project_id, embedder)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        matrix = np.load(matrix_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return {}
+    if meta.get('dim') != embedder.dim or len(meta.get('version_ids', [])) != matrix.shape[0]:
+        return {}
+    return {version_id: matrix[idx] for idx, version_id in enumerate(meta['version_ids'])}
+
+
+def _save_cached_rows(cache_dir: str, project_id: int, embedder, version_ids: List[int], matrix: np.ndarray) -> np.ndarray:
+    """Write the index to disk atomically and reopen it as a memory map."""
+    matrix_path, meta_path = _cache_paths(cache_dir, project_id, embedder)
+    tmp_paths = []
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Unique temp names: concurrent writers of the same project must not
+        # overwrite each other's file before it is moved into place
+        fd, tmp_matrix = tempfile.mkstemp(dir=cache_dir, suffix=".npy.tmp")
+        tmp_paths.append(tmp_matrix)
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, matrix)
+        os.replace(tmp_matrix, matrix_path)
+
+        fd, tmp_meta = tempfile.mkstemp(dir=cache_dir, suffix=".json.tmp")
+        tmp_paths.append(tmp_meta)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'dim': embedder.dim, 'version_ids': version_ids}, f)
+        os.replace(tmp_meta, meta_path)
+
+        return np.load(matrix_path, mmap_mode='r')
+    except OSError:
+        # File still mapped by another request (Windows) - serve from memory this time
+        for path in tmp_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return matrix
+
+
+def format_related_requirements(related: List[dict], token_budget: int) -> str:
+    """
+    Format related requirements for a prompt within a token budget.
+
+    Requirements are added best-first; descriptions are shortened to fit and
+    the list stops once the budget is used up.
+
+    Args:
+        related (List[dict]): Output of EmbeddingIndex.related()
+        token_budget (int): Approximate number of tokens available
+
+    Returns:
+        str: Bullet list, or "" if nothing fits
+    """
+    remaining = token_budget * CHARS_PER_TOKEN
+    lines = []
+    for item in related:
+        prefix = f"- {item['title']}: "
+        if len(prefix) + 20 > remaining:
+            break
+        description = " ".join((item['description'] or "").split())
+        room = remaining - len(prefix)
+        if len(description) > room:
+            description = description[:max(room - 3, 0)].rstrip() + "..."
+        line = prefix + description
+        lines.append(line)
+        remaining -= len(line) + 1
+    return "\n".join(lines)
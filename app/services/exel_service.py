@@ -6,6 +6,75 @@ Provides functions for parsing and processing Excel files.
 from openpyxl import load_workbook
 from typing import List, Dict, Any, Optional
 import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import config
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import config
+
+# Column with the sheet name of each row when several sheets are read
+SHEET_COLUMN = 'Blatt'
+# Rows shown in the preview of an uploaded file
+PREVIEW_ROWS = 10
+
+
+def _sheet_to_data(ws, max_rows: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Convert one worksheet to a list of row dictionaries (first row = headers).
+
+    Reading stops after `max_rows` data rows if given.
+
+    Raises:
+        ValueError: If the first row has no headers
+    """
+    rows = ws.iter_rows(values_only=True)
+
+    # Read header row - only include non-empty headers
+    headers = []
+    header_indices = []  # Track which column indices have valid headers
+    for idx, value in enumerate(next(rows, ())):
+        if value and str(value).strip():
+            headers.append(str(value).strip())
+            header_indices.append(idx)
+
+    if not headers:
+        raise ValueError("Excel file has no headers in the first row")
+
+    # Read data rows
+    data = []
+    for row in rows:
+        if not row or all(cell is None or str(cell).strip() == '' for cell in row):
+            continue  # Skip completely empty rows
+
+        row_dict = {}
+        # Only process columns that have headers
+        for header, col_idx in zip(headers, header_indices):
+            if col_idx < len(row):
+                value = row[col_idx]
+                # Convert value to string and strip whitespace
+                if value is not None and str(value).strip():
+                    row_dict[header] = str(value).strip()
+                else:
+                    row_dict[header] = ""
+            else:
+                row_dict[header] = ""
+
+        # Only add row if it has at least one non-empty value (excluding system columns)
+        if any(v for k, v in row_dict.items() if v and k.lower() not in ['version', 'id']):
+            data.append(row_dict)
+            if max_rows is not None and len(data) >= max_rows:
+                break
+
+    return data
+
+
+def _check_excel_path(file_path: str) -> None:
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Excel file not found: {file_path}")
+
+    if not file_path.endswith(('.xlsx', '.xls')):
+        raise ValueError(f"Invalid file format. Expected .xlsx or .xls, got: {file_path}")
 
 
 def parse_excel_to_data(file_path: str, sheet_name: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -24,62 +93,120 @@ def parse_excel_to_data(file_path: str, sheet_name: Optional[str] = None) -> Lis
         FileNotFoundError: If the file doesn't exist
         ValueError: If the file format is invalid or cannot be read
     """
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"Excel file not found: {file_path}")
+    _check_excel_path(file_path)
     
-    if not file_path.endswith(('.xlsx', '.xls')):
-        raise ValueError(f"Invalid file format. Expected .xlsx or .xls, got: {file_path}")
+    try:
+        # Read-only mode streams the rows instead of building every cell object
+        wb = load_workbook(file_path, data_only=True, read_only=True)
+        try:
+            # Get worksheet
+            if sheet_name:
+                if sheet_name not in wb.sheetnames:
+                    raise ValueError(f"Sheet '{sheet_name}' not found in workbook. Available sheets: {wb.sheetnames}")
+                ws = wb[sheet_name]
+            else:
+                ws = wb.active
+            return _sheet_to_data(ws)
+        finally:
+            wb.close()
     
+    except Exception as e:
+        raise ValueError(f"Error parsing Excel file: {str(e)}")
+
+
+def _parse_sheet_in_process(file_path: str, sheet_name: str) -> List[Dict[str, Any]]:
+    # Runs in a worker process: open the workbook there and parse one sheet
+    wb = load_workbook(file_path, data_only=True, read_only=True)
     try:
-        # Load workbook
-        wb = load_workbook(file_path, data_only=True)
-        
-        # Get worksheet
-        if sheet_name:
-            if sheet_name not in wb.sheetnames:
-                raise ValueError(f"Sheet '{sheet_name}' not found in workbook. Available sheets: {wb.sheetnames}")
-            ws = wb[sheet_name]
+        return _sheet_to_data(wb[sheet_name])
+    except ValueError:
+        return []  # Sheet without headers (e.g. an empty or notes sheet)
+    finally:
+        wb.close()
+
+
+def parse_workbook_sheets(file_path: str, sheet_names: Optional[List[str]] = None,
+                          processes: Optional[int] = None,
+                          max_rows: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Parse several sheets of a workbook into one list of row dictionaries.
+
+    Sheets without a header row are skipped. If more than one sheet is read,
+    every row gets the name of its sheet in the SHEET_COLUMN column, which
+    ends up in the requirement's custom_data.
+
+    Args:
+        file_path (str): Path to the Excel file
+        sheet_names (List[str], optional): Sheets to read (default: all, in workbook order)
+        processes (int, optional): Parse sheets in up to this many worker processes.
+            Default: EXCEL_SHEET_PROCESSES for files of at least
+            EXCEL_PARALLEL_MIN_BYTES, otherwise a single read-only pass.
+        max_rows (int, optional): Stop after this many rows in total (e.g. for
+            a preview); always read in a single pass in this process.
+
+    Returns:
+        List[Dict[str, Any]]: Rows of all sheets, sheet by sheet
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If a sheet is unknown or no sheet contains data
+    """
+    _check_excel_path(file_path)
+
+    try:
+        wb = load_workbook(file_path, data_only=True, read_only=True)
+    except Exception as e:
+        raise ValueError(f"Error parsing Excel file: {str(e)}")
+
+    try:
+        available = wb.sheetnames
+        unknown = [name for name in sheet_names or [] if name not in available]
+        if unknown:
+            raise ValueError(f"Sheet '{unknown[0]}' not found in workbook. Available sheets: {available}")
+        selected = list(sheet_names) if sheet_names else available
+
+        if max_rows is not None:
+            processes = 1
+        elif processes is None:
+            large = os.path.getsize(file_path) >= config.EXCEL_PARALLEL_MIN_BYTES
+            processes = config.EXCEL_SHEET_PROCESSES if large else 1
+        processes = min(processes, len(selected))
+
+        if processes > 1:
+            wb.close()
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                sheets = list(pool.map(_parse_sheet_in_process, [file_path] * len(selected), selected))
         else:
-            ws = wb.active
-        
-        # Read header row - only include non-empty headers
-        headers = []
-        header_indices = []  # Track which column indices have valid headers
-        for idx, cell in enumerate(ws[1]):
-            if cell.value and str(cell.value).strip():
-                headers.append(str(cell.value).strip())
-                header_indices.append(idx)
-        
-        if not headers:
-            raise ValueError("Excel file has no headers in the first row")
-        
-        # Read data rows
-        data = []
-        for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            if not row or all(cell is None or str(cell).strip() == '' for cell in row):
-                continue  # Skip completely empty rows
-            
-            row_dict = {}
-            # Only process columns that have headers
-            for header, col_idx in zip(headers, header_indices):
-                if col_idx < len(row):
-                    value = row[col_idx]
-                    # Convert value to string and strip whitespace
-                    if value is not None and str(value).strip():
-                        row_dict[header] = str(value).strip()
-                    else:
-                        row_dict[header] = ""
-                else:
-                    row_dict[header] = ""
-            
-            # Only add row if it has at least one non-empty value (excluding system columns)
-            if any(v for k, v in row_dict.items() if v and k.lower() not in ['version', 'id']):
-                data.append(row_dict)
-        
-        return data
-    
+            # One read-only pass over the selected sheets
+            sheets = []
+            remaining = max_rows
+            for name in selected:
+                if remaining == 0:
+                    break
+                try:
+                    sheets.append(_sheet_to_data(wb[name], remaining))
+                except ValueError:
+                    sheets.append([])  # Sheet without headers
+                if remaining is not None:
+                    remaining -= len(sheets[-1])
+    except ValueError:
+        raise
     except Exception as e:
         raise ValueError(f"Error parsing Excel file: {str(e)}")
+    finally:
+        wb.close()
+
+    tag = len(selected) > 1
+    data = []
+    for name, rows in zip(selected, sheets):
+        for row in rows:
+            if tag:
+                row[SHEET_COLUMN] = name
+            data.append(row)
+    if not data:
+        raise ValueError("Excel file has no headers in the first row")
+    return data
 
 
 def validate_excel_structure(file_path: str, required_columns: List[str]) -> tuple[bool, str]:
@@ -0,0 +1,320 @@
+"""
+Export Service Module
+Excel and PDF exports built in the background and reused while the project is unchanged.
+
+Every export is stored as a ProjectFile of type 'export' together with the
+project revision it was built from (ProjectFile.content_version); the format
+is the file extension. Requesting an export of an unchanged project returns
+that file right away; otherwise a single background job per (project,
+revision, format) builds it, and concurrent requests wait for the same job.
+Failed jobs are kept so their error can be shown, until a job for a newer
+revision of the project starts or EXPORT_FAILED_TTL seconds have passed.
+Exports older than EXPORT_MAX_AGE_DAYS and all but the EXPORT_KEEP newest
+exports of a project and format are deleted after each new export; files
+this process is still sending (opened with open_export() and not yet closed) are
+kept until the next eviction. Files are written to the app's EXPORT_DIR.
+"""
+
+import io
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+# Add parent directory to path to import config
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import config
+
+logger = logging.getLogger(__name__)
+
+EXPORT_MIMETYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+# Progress is published every this many rows
+PROGRESS_STEP = 50
+
+_executor = ThreadPoolExecutor(max_workers=config.EXPORT_WORKERS, thread_name_prefix='export')
+
+
+@dataclass
+class ExportJob:
+    """State of a running or failed export"""
+    project_id: int
+    revision: int
+    fmt: str = 'xlsx'          # key of EXPORT_MIMETYPES
+    status: str = 'pending'    # 'pending', 'running', 'done', 'failed'
+    done: int = 0
+    total: int = 0
+    error: Optional[str] = None
+    failed_at: Optional[float] = None  # time.monotonic() of the failure
+    finished: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self) -> Dict:
+        return {
+            'status': self.status,
+            'done': self.done,
+            'total': self.total,
+            'error': self.error
+        }
+
+
+_jobs: Dict[Tuple[int, int, str], ExportJob] = {}
+_jobs_lock = threading.Lock()
+
+# Export paths with responses still streaming them -> number of responses
+_serving: Dict[str, int] = {}
+_serving_lock = threading.Lock()
+
+
+def build_workbook(project_id: int, progress: Optional[Callable[[int, int], None]] = None):
+    """
+    Build the export workbook from the latest version of every active requirement.
+
+    Columns: ID, title, description, category, remaining custom columns,
+    Version, Status.
+
+    Args:
+        project_id (int): Project to export
+        progress (Callable): Called as progress(done, total) while writing rows
+
+    Returns:
+        Workbook: openpyxl workbook
+    """
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment
+    from openpyxl.utils import get_column_letter
+    from .table_formats import export_table
+
+    headers, total, rows = export_table(project_id)
+    if progress:
+        progress(0, total)
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Requirements"
+
+    for col_num, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col_num, value=header)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal="center", vertical="top")
+
+    for display_id, row_data in enumerate(rows, 1):
+        for col_num, value in enumerate(row_data, 1):
+            cell = ws.cell(row=display_id + 1, column=col_num, value=value)
+            cell.alignment = Alignment(wrap_text=True, vertical="top")
+
+        if progress and display_id % PROGRESS_STEP == 0:
+            progress(display_id, total)
+
+    # Column widths: ID, title, description, category, custom columns, Version, Status
+    widths = [8, 30, 50, 20] + [20] * (len(headers) - 6) + [10, 15]
+    for col_num, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+
+    if progress:
+        progress(total, total)
+    return wb
+
+
+def write_xlsx(project_id: int, filepath: str, progress: Optional[Callable[[int, int], None]] = None) -> None:
+    """Build the export workbook and save it to `filepath`."""
+    build_workbook(project_id, progress).save(filepath)
+
+
+def _writer(fmt: str):
+    if fmt == 'pdf':
+        from .pdf_report import write_pdf_report
+        return write_pdf_report
+    return write_xlsx
+
+
+def find_export(project_id: int, revision: int, fmt: str = 'xlsx'):
+    """Return the stored export of a project revision, if its file still exists."""
+    from ..models import ProjectFile
+
+    project_file = ProjectFile.query.filter_by(
+        project_id=project_id, file_type='export', content_version=revision
+    ).filter(ProjectFile.filename.endswith(f'.{fmt}')).order_by(ProjectFile.id.desc()).first()
+    if project_file and os.path.exists(project_file.filepath):
+        return project_file
+    return None
+
+
+class _ExportStream(io.FileIO):
+    """Export file opened for a response; closing it lets evict_exports() delete the file."""
+
+    def close(self):
+        if not self.closed:
+            with _serving_lock:
+                remaining = _serving.get(self.name, 0) - 1
+                if remaining > 0:
+                    _serving[self.name] = remaining
+                else:
+                    _serving.pop(self.name, None)
+        super().close()
+
+
+def open_export(project_file):
+    """
+    Open an export file for sending; evict_exports() keeps it until the file is closed.
+
+    send_file() closes the file when the response is finished.
+
+    Args:
+        project_file (ProjectFile): Export to send
+
+    Returns:
+        file: Binary file object
+
+    Raises:
+        OSError: If the file was deleted in the meantime
+    """
+    with _serving_lock:
+        stream = _ExportStream(project_file.filepath, 'rb')
+        _serving[stream.name] = _serving.get(stream.name, 0) + 1
+    return stream
+
+
+def ensure_export(app, project, user_id: int, fmt: str = 'xlsx', restart_failed: bool = True):
+    """
+    Return the current export of a project or start building it.
+
+    Args:
+        app (Flask): Application (for the background job's app context)
+        project (Project): Project to export
+        user_id (int): User requesting the export (recorded as creator)
+        fmt (str): 'xlsx' or 'pdf'
+        restart_failed (bool): Start a new job if the last one failed
+
+    Returns:
+        tuple: (ProjectFile, None) if the export is ready,
+               otherwise (None, ExportJob) of the running or failed job
+    """
+    revision = project.revision
+    project_file = find_export(project.id, revision, fmt)
+    if project_file is not None:
+        return project_file, None
+
+    key = (project.id, revision, fmt)
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is None:
+            # The job may have finished between the first lookup and taking the lock
+            project_file = find_export(project.id, revision, fmt)
+            if project_file is not None:
+                return project_file, None
+        if job is None or (restart_failed and job.status == 'failed'):
+            _drop_failed_jobs(project.id, revision)
+            job = ExportJob(project.id, revision, fmt)
+            _jobs[key] = job
+            _executor.submit(_run_export, app, job, project.name, user_id)
+    return None, job
+
+
+def _drop_failed_jobs(project_id: int, revision: int) -> None:
+    # Called with _jobs_lock held: failed jobs of older revisions of this
+    # project and expired failed jobs of all projects
+    cutoff = time.monotonic() - config.EXPORT_FAILED_TTL
+    for key, job in list(_jobs.items()):
+        if job.status == 'failed' and ((key[0] == project_id and key[1] < revision) or job.failed_at < cutoff):
+            del _jobs[key]
+
+
+def _run_export(app, job: ExportJob, project_name: str, user_id: int) -> None:
+    from .. import db
+    from ..models import ProjectFile
+
+    def progress(done, total):
+        job.done, job.total = done, total
+
+    job.status = 'running'
+    with app.app_context():
+        try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f"requirements_{project_name.replace(' ', '_')}_{timestamp}.{job.fmt}"
+            export_dir = app.config['EXPORT_DIR']
+            os.makedirs(export_dir, exist_ok=True)
+            filepath = os.path.join(export_dir, f"r{job.revision}_{filename}")
+            _writer(job.fmt)(job.project_id, filepath, progress)
+
+            db.session.add(ProjectFile(
+                project_id=job.project_id,
+                filename=filename,
+                filepath=filepath,
+                file_type='export',
+                content_version=job.revision,
+                created_by_id=user_id
+            ))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Export of project %s failed", job.project_id)
+            job.failed_at, job.error, job.status = time.monotonic(), str(e), 'failed'
+            job.finished.set()
+            return
+
+        # The database row is the cache from now on
+        with _jobs_lock:
+            _jobs.pop((job.project_id, job.revision, job.fmt), None)
+        job.status = 'done'
+        job.finished.set()
+
+        try:
+            evict_exports(job.project_id, job.fmt)
+        except Exception:
+            db.session.rollback()
+            logger.exception("Evicting exports of project %s failed", job.project_id)
+
+
+def evict_exports(project_id: int, fmt: str = 'xlsx') -> int:
+    """
+    Delete a project's stale exports of one format (files and rows).
+
+    Keeps the EXPORT_KEEP newest exports and deletes everything older than
+    EXPORT_MAX_AGE_DAYS except the newest one. Exports that are still being
+    sent are skipped and deleted by a later eviction.
+
+    Args:
+        project_id (int): Project id
+        fmt (str): Export format
+
+    Returns:
+        int: Number of deleted exports
+    """
+    from .. import db
+    from ..models import ProjectFile
+
+    exports = (
+        ProjectFile.query
+        .filter_by(project_id=project_id, file_type='export')
+        .filter(ProjectFile.filename.endswith(f'.{fmt}'))
+        .order_by(ProjectFile.created_at.desc(), ProjectFile.id.desc())
+        .all()
+    )
+    cutoff = datetime.utcnow() - timedelta(days=config.EXPORT_MAX_AGE_DAYS)
+    stale = [
+        f for position, f in enumerate(exports)
+        if position > 0 and (position >= config.EXPORT_KEEP or (f.created_at and f.created_at < cutoff))
+    ]
+    deleted = 0
+    # Holding the lock keeps open_export() from opening a file while it is removed
+    with _serving_lock:
+        for project_file in stale:
+            if project_file.filepath in _serving:
+                continue
+            try:
+                os.remove(project_file.filepath)
+            except OSError:
+                pass  # Already gone
+            db.session.delete(project_file)
+            deleted += 1
+    if deleted:
+        db.session.commit()
+    return deleted
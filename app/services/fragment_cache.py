@@ -0,0 +1,63 @@
+"""
+Fragment Cache Module
+Per-process cache of rendered template fragments of a project page.
+
+Entries are stored per (fragment name, project id) together with the
+project's revision (Project.revision). Uploads, file deletions, sharing and
+every other flush that changes the project advance the revision, so the
+next lookup re-renders and replaces the stale entry.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from markupsafe import Markup
+
+FRAGMENT_CACHE_SIZE = 512
+
+
+class FragmentCache:
+    """Thread-safe LRU cache of rendered HTML keyed by fragment and project"""
+
+    def __init__(self, maxsize: int = FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, name: str, project, render: Callable[[], str]) -> Markup:
+        """
+        Return the cached fragment, rendering it if the project changed since.
+
+        Args:
+            name (str): Fragment name, e.g. 'archive'
+            project (Project): Project the fragment shows
+            render (Callable): Renders the fragment HTML on a miss
+
+        Returns:
+            Markup: Rendered HTML, safe to insert into the page
+        """
+        key = (name, project.id)
+        revision = project.revision
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == revision:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        html = Markup(render())
+        with self._lock:
+            self._entries[key] = (revision, html)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return html
+
+    def invalidate(self, project_id: int) -> None:
+        """Drop all fragments of a project."""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == project_id]:
+                del self._entries[key]
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,324 @@
+"""
+Import Service Module
+Row mapping and validation of imported tables, shared by the import and its dry run.
+
+import_excel maps the header row once (ColumnMapping) and reads the data
+rows through read_import_rows(); the Excel upload turns its parsed records
+into the same ImportRow objects with record_to_row(). A dry run
+(preview_import) walks these rows without writing anything: every row is
+resolved the way the import would resolve it - same key, same similarity
+check - and the report says whether it would create a requirement, add a
+version, leave it unchanged or skip the row, and why.
+
+Rows whose content fingerprint equals the latest version of the matched
+requirement are unchanged and do not create a version.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .table_formats import EMPTY_CELL
+
+VALID_STATUSES = ('Offen', 'In Arbeit', 'Fertig')
+DEFAULT_STATUS = 'Offen'
+
+TITLE_HEADERS = ('title', 'titel')
+DESCRIPTION_HEADERS = ('description', 'beschreibung')
+CATEGORY_HEADERS = ('category', 'kategorie')
+STATUS_HEADERS = ('status',)
+# Columns of the export layout that are not imported
+SYSTEM_COLUMNS = ('id', 'version')
+
+# Rows with messages listed in a dry-run report (the counts cover all rows)
+PREVIEW_MAX_ROWS = 200
+
+
+@dataclass
+class ImportRow:
+    """One data row of an import, mapped to requirement fields"""
+    row: int                       # Row number in the file (header = 1) or record number
+    title: str = ''
+    description: str = ''
+    category: str = ''
+    status: str = DEFAULT_STATUS
+    custom_data: Dict[str, str] = field(default_factory=dict)
+    sheet: Optional[str] = None
+    errors: List[str] = field(default_factory=list)    # the row is skipped
+    warnings: List[str] = field(default_factory=list)  # the row is imported with adjustments
+
+    @property
+    def fingerprint(self) -> str:
+        """Content fingerprint, comparable with RequirementVersion.fingerprint."""
+        from ..models import content_fingerprint
+        return content_fingerprint(self.title, self.description, self.category, self.status, self.custom_data)
+
+
+@dataclass
+class ColumnMapping:
+    """Column indices of the requirement fields in an import file"""
+    title: Optional[int] = None
+    description: Optional[int] = None
+    category: Optional[int] = None
+    status: Optional[int] = None
+    custom: Dict[str, int] = field(default_factory=dict)
+    ignored: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_headers(cls, header_row: Sequence[Any], custom_columns: Sequence[str]) -> 'ColumnMapping':
+        """
+        Map a header row to requirement fields.
+
+        Args:
+            header_row (Sequence): Values of the first row
+            custom_columns (Sequence[str]): Custom columns of the project
+
+        Returns:
+            ColumnMapping: Indices of the known columns; unknown headers in `ignored`
+        """
+        mapping = cls()
+        for idx, value in enumerate(header_row):
+            if value is None or not str(value).strip():
+                continue
+            header = str(value).strip()
+            header_lower = header.lower()
+            if header_lower in TITLE_HEADERS:
+                mapping.title = idx
+            elif header_lower in DESCRIPTION_HEADERS:
+                mapping.description = idx
+            elif header_lower in CATEGORY_HEADERS:
+                mapping.category = idx
+            elif header_lower in STATUS_HEADERS:
+                mapping.status = idx
+            elif header in custom_columns:
+                mapping.custom[header] = idx
+            elif header_lower not in SYSTEM_COLUMNS:
+                mapping.ignored.append(header)
+        return mapping
+
+    @property
+    def complete(self) -> bool:
+        """True if the required title and description columns were found."""
+        return self.title is not None and self.description is not None
+
+
+def _cell(row: Sequence[Any], idx: Optional[int]) -> str:
+    if idx is None or idx >= len(row) or row[idx] is None:
+        return ''
+    value = str(row[idx]).strip()
+    # Placeholder the export writes for missing values
+    return '' if value == EMPTY_CELL else value
+
+
+def _checked_status(value: str, item: ImportRow) -> str:
+    if not value:
+        return DEFAULT_STATUS
+    if value not in VALID_STATUSES:
+        item.warnings.append(f"Unbekannter Status '{value}' – wird als '{DEFAULT_STATUS}' importiert")
+        return DEFAULT_STATUS
+    return value
+
+
+def read_import_rows(data_rows: Iterable[Sequence[Any]], mapping: ColumnMapping,
+                     start: int = 2) -> Iterator[ImportRow]:
+    """
+    Map the data rows of an import file; completely empty rows are left out.
+
+    Args:
+        data_rows (Iterable): Row tuples after the header row
+        mapping (ColumnMapping): Column mapping of the header row
+        start (int): Row number of the first data row
+
+    Yields:
+        ImportRow: Mapped row, with errors if it cannot be imported
+    """
+    for row_number, row in enumerate(data_rows, start=start):
+        if not row or all(_cell(row, idx) == '' for idx in range(len(row))):
+            continue
+
+        item = ImportRow(
+            row=row_number,
+            title=_cell(row, mapping.title),
+            description=_cell(row, mapping.description),
+            category=_cell(row, mapping.category),
+        )
+        if not item.title:
+            item.errors.append("Titel fehlt")
+        if not item.description:
+            item.errors.append("Beschreibung fehlt")
+        item.status = _checked_status(_cell(row, mapping.status), item)
+
+        for col_name, col_idx in mapping.custom.items():
+            value = _cell(row, col_idx)
+            if value:
+                item.custom_data[col_name] = value
+        yield item
+
+
+def _first_value(record: Dict[str, Any], keys: Sequence[str]) -> str:
+    for key in keys:
+        value = record.get(key)
+        if value is not None and str(value).strip():
+            return str(value).strip()
+    return ''
+
+
+def record_to_row(number: int, record: Dict[str, Any]) -> ImportRow:
+    """
+    Map a parsed Excel record (header -> value) like the Excel upload does.
+
+    Title and description fall back to other values of the record; all
+    non-system values are kept as custom data.
+
+    Args:
+        number (int): Record number (1-based)
+        record (dict): Row dictionary, e.g. from parse_workbook_sheets()
+
+    Returns:
+        ImportRow: Mapped row
+    """
+    item = ImportRow(row=number, sheet=record.get('Blatt') or None)
+
+    item.title = _first_value(record, ['title', 'Title', 'titel', 'Titel', 'name', 'Name'])
+    if not item.title:
+        item.title = _first_value(record, list(record))
+        if item.title:
+            item.warnings.append("Kein Titel – der erste Wert wird als Titel verwendet")
+        else:
+            item.errors.append("Titel fehlt")
+
+    item.description = _first_value(record, ['description', 'Description', 'beschreibung', 'Beschreibung', 'text', 'Text'])
+    if not item.description:
+        values = [str(v).strip() for v in record.values() if v and str(v).strip() and str(v).strip() != item.title]
+        item.description = values[0] if values else "Keine Beschreibung"
+        item.warnings.append("Keine Beschreibung – ersatzweise übernommen")
+
+    item.category = _first_value(record, ['category', 'Category', 'kategorie', 'Kategorie', 'cat', 'Cat'])
+    item.status = _checked_status(_first_value(record, ['status', 'Status']), item)
+
+    for col, value in record.items():
+        if col.lower() not in SYSTEM_COLUMNS and value and str(value).strip():
+            item.custom_data[col] = str(value).strip()
+    return item
+
+
+def latest_fingerprint(requirement_id: int) -> Optional[str]:
+    """
+    Content fingerprint of a requirement's latest version.
+
+    Returns:
+        str | None: Fingerprint, or None if the requirement has no versions
+    """
+    from ..models import RequirementVersion
+
+    version = (
+        RequirementVersion.query.filter_by(requirement_id=requirement_id)
+        .order_by(RequirementVersion.version_index.desc()).first()
+    )
+    if version is None:
+        return None
+    # Versions from before the fingerprint column are hashed on the fly
+    return version.fingerprint or version.compute_fingerprint()
+
+
+def preview_import(project_id: int, rows: Iterable[ImportRow], ignored_columns: Sequence[str] = (),
+                   max_rows: int = PREVIEW_MAX_ROWS) -> Dict[str, Any]:
+    """
+    Dry run of an import: validate and resolve every row without writing.
+
+    Rows are matched like the import matches them - by key, then by text
+    similarity - including rows earlier in the same file, and compared with
+    the latest version by content fingerprint.
+
+    Args:
+        project_id (int): Target project
+        rows (Iterable[ImportRow]): Mapped rows (consumed once)
+        ignored_columns (Sequence[str]): Headers the import does not use
+        max_rows (int): Maximum number of rows listed in the report
+
+    Returns:
+        dict: {'counts': {...}, 'rows': [...], 'truncated': bool, 'ignored_columns': [...]}
+              rows only lists rows with messages
+    """
+    from .. import db
+    from ..models import Requirement, normalize_key
+    from .similarity_service import DuplicateDetector, text_vector
+
+    # Keys are unique per project (uq_requirement_project_key)
+    key_targets = dict(
+        db.session.query(Requirement.key, Requirement.id).filter_by(project_id=project_id)
+    )
+    duplicates = DuplicateDetector(project_id)
+    counts = {'rows': 0, 'new_requirements': 0, 'new_versions': 0, 'unchanged': 0, 'skipped': 0, 'warnings': 0}
+    report_rows = []
+    truncated = False
+    key_rows = {}          # key -> first row in the file that uses it
+    placeholder_rows = {}  # negative placeholder id -> row of a would-be new requirement
+    fingerprints = {}      # requirement or placeholder id -> fingerprint after the rows so far
+
+    def describe(requirement_id):
+        if requirement_id in placeholder_rows:
+            return f"Zeile {placeholder_rows[requirement_id]} dieser Datei"
+        return f"Anforderung #{requirement_id}"
+
+    for item in rows:
+        counts['rows'] += 1
+        messages = item.errors + item.warnings
+
+        if item.errors:
+            action = 'skip'
+            counts['skipped'] += 1
+        else:
+            key = normalize_key(item.title)
+            target = key_targets.get(key)
+            if target is not None and key in key_rows:
+                messages.append(f"Gleicher Schlüssel wie Zeile {key_rows[key]}")
+            vector = None
+            if target is None:
+                vector = text_vector(item.title, item.description)
+                flagged_before = len(duplicates.flagged)
+                target = duplicates.find_duplicate(item.title, vector)
+                if target:
+                    messages.append(f"Fast gleich wie {describe(target)}")
+                else:
+                    for flagged in duplicates.flagged[flagged_before:]:
+                        messages.append(f"Mögliches Duplikat von {describe(flagged['similar_requirement_id'])}")
+                    target = -(len(placeholder_rows) + 1)
+                    placeholder_rows[target] = item.row
+                    key_targets[key] = target
+                    duplicates.add(target, vector)
+
+            if target in placeholder_rows and placeholder_rows[target] == item.row:
+                action = 'new'
+            else:
+                if target not in fingerprints:
+                    fingerprints[target] = latest_fingerprint(target)
+                action = 'unchanged' if fingerprints[target] == item.fingerprint else 'version'
+                if action == 'version':
+                    # Later rows are compared against the new text, as in the import
+                    if vector is None:
+                        vector = text_vector(item.title, item.description)
+                    duplicates.add(target, vector)
+            fingerprints[target] = item.fingerprint
+            key_rows.setdefault(key, item.row)
+            counts[{'new': 'new_requirements', 'version': 'new_versions', 'unchanged': 'unchanged'}[action]] += 1
+            if item.warnings:
+                counts['warnings'] += 1
+
+        if messages:
+            if len(report_rows) < max_rows:
+                report_rows.append({
+                    'row': item.row,
+                    'sheet': item.sheet,
+                    'title': item.title,
+                    'action': action,
+                    'messages': messages,
+                })
+            else:
+                truncated = True
+
+    return {
+        'counts': counts,
+        'rows': report_rows,
+        'truncated': truncated,
+        'ignored_columns': list(ignored_columns),
+    }
@@ -0,0 +1,123 @@
+"""
+Password Service Module
+Configurable password hashing with rehash on login.
+
+Hashes use PASSWORD_HASH_METHOD (any Werkzeug method string, e.g.
+'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'). Stored hashes carry their
+own parameters, so existing hashes keep verifying after the setting changes;
+they are upgraded the next time the user logs in.
+
+All hashing runs on a small dedicated pool (PASSWORD_HASH_WORKERS threads;
+scrypt and PBKDF2 release the GIL). hash_password() and verify_password()
+still block the calling request until the hash is done: the pool only bounds
+how many hashes run at once, so during login bursts the extra logins queue
+there instead of occupying every CPU core. Only the rehash after a
+successful login is truly off the request's path; it runs in the background
+instead of doubling the cost of that request.
+"""
+
+import logging
+import os
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Add parent directory to path to import config
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import config
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=config.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    thread_name_prefix='password-hash'
+)
+
+# Parameter prefix of hashes created with the configured method, e.g. 'scrypt:32768:8:1'
+_configured_prefix: Optional[str] = None
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password with the configured method.
+
+    Runs on the hashing pool and waits for the result, so it bounds
+    concurrency but takes as long as hashing in the request thread.
+
+    Args:
+        password (str): Plain-text password
+
+    Returns:
+        str: Werkzeug hash string ("method$salt$hash")
+    """
+    return _executor.submit(
+        generate_password_hash, password, config.PASSWORD_HASH_METHOD
+    ).result()
+
+
+def verify_password(pwhash: str, password: str) -> bool:
+    """
+    Check a password against a stored hash.
+
+    Runs on the hashing pool and waits for the result, so it bounds
+    concurrency but takes as long as hashing in the request thread.
+
+    Args:
+        pwhash (str): Stored hash
+        password (str): Plain-text password
+
+    Returns:
+        bool: True if the password matches
+    """
+    if not pwhash:
+        return False
+    return _executor.submit(check_password_hash, pwhash, password).result()
+
+
+def needs_rehash(pwhash: str) -> bool:
+    """Check whether a stored hash was created with other parameters than configured."""
+    global _configured_prefix
+    if _configured_prefix is None:
+        # Werkzeug fills in defaults (e.g. 'pbkdf2' -> 'pbkdf2:sha256:600000'),
+        # so take the canonical prefix from a real hash once per process
+        _configured_prefix = hash_password("").split("$", 1)[0]
+    return (pwhash or "").split("$", 1)[0] != _configured_prefix
+
+
+def schedule_rehash(app, user_id: int, old_hash: str, password: str) -> Future:
+    """
+    Upgrade a user's hash to the configured parameters in the background.
+
+    The update only applies if the stored hash is still `old_hash`, so a
+    password change in the meantime is never overwritten.
+
+    Args:
+        app (Flask): Application (for the database context)
+        user_id (int): User id
+        old_hash (str): Hash that was just verified
+        password (str): The verified plain-text password
+
+    Returns:
+        Future: Resolves to True if the hash was replaced
+    """
+    def rehash():
+        from .. import db
+        from ..models import User
+
+        new_hash = generate_password_hash(password, config.PASSWORD_HASH_METHOD)
+        with app.app_context():
+            try:
+                updated = User.query.filter_by(id=user_id, password_hash=old_hash).update(
+                    {User.password_hash: new_hash}, synchronize_session=False
+                )
+                db.session.commit()
+                return updated == 1
+            except Exception:
+                db.session.rollback()
+                logger.exception("Password rehash for user %s failed", user_id)
+                return False
+
+    return _executor.submit(rehash)
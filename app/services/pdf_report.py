@@ -0,0 +1,170 @@
+"""
+PDF Report Module
+Project report of the latest requirement versions, built with reportlab platypus.
+
+Flowables are produced lazily from a streamed query: platypus lays out its
+flowable list from the front through DocTemplate.handle_flowable(), and the
+document template refills the list to FLOWABLE_WINDOW entries after each
+flowable. Memory stays bounded by that window (plus reportlab's compressed
+page streams) instead of growing with the number of requirements.
+"""
+
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Flowable, KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# Flowables kept in memory ahead of the layout engine
+FLOWABLE_WINDOW = 200
+# Progress is published every this many requirements
+PROGRESS_STEP = 25
+
+_styles = getSampleStyleSheet()
+TITLE_STYLE = _styles['Title']
+HEADING_STYLE = ParagraphStyle('RequirementHeading', parent=_styles['Heading3'], spaceBefore=0, spaceAfter=2)
+BODY_STYLE = ParagraphStyle('RequirementBody', parent=_styles['BodyText'], fontSize=9, leading=12)
+CELL_STYLE = ParagraphStyle('RequirementCell', parent=BODY_STYLE, fontSize=8, leading=10)
+META_STYLE = ParagraphStyle('ReportMeta', parent=_styles['Normal'], fontSize=9, textColor=colors.grey)
+
+
+class _StreamingDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate that lays out the flowables of a generator through a bounded list"""
+
+    def __init__(self, filename, source: Iterator[Flowable], window: int = FLOWABLE_WINDOW, **kwargs):
+        super().__init__(filename, **kwargs)
+        self._source = source
+        self._window = window
+        self._flowables = []
+
+    def _fill(self):
+        while len(self._flowables) < self._window:
+            flowable = next(self._source, None)
+            if flowable is None:
+                break
+            self._flowables.append(flowable)
+
+    def build(self, **kwargs):
+        """Lay out all flowables of the generator (keyword arguments as SimpleDocTemplate.build)."""
+        self._fill()
+        super().build(self._flowables, **kwargs)
+
+    def handle_flowable(self, flowables):
+        super().handle_flowable(flowables)
+        # build() lays out its list until it is empty; refilling it after each
+        # flowable keeps it non-empty until the generator ends. Other lists
+        # (e.g. flowables reportlab holds back for the next page) are left alone.
+        if flowables is self._flowables:
+            self._fill()
+
+
+def _text(value) -> str:
+    """Escape a value for a Paragraph (keeps line breaks)."""
+    return escape(str(value)).replace('\n', '<br/>')
+
+
+def requirement_flowables(display_id: int, version, custom_columns) -> list:
+    """
+    Flowables of one requirement: heading with status badge, description and custom columns.
+
+    Args:
+        display_id (int): Running number in the report
+        version (RequirementVersion): Latest version of the requirement
+        custom_columns (list): Custom columns to show (in this order)
+
+    Returns:
+        list: Flowables
+    """
+    custom_data = version.get_custom_data()
+    title = custom_data.get('title') or version.title
+    description = custom_data.get('description') or version.description
+    category = custom_data.get('category') or version.category or '–'
+
+    status_color = colors.HexColor(version.get_status_color())
+    header = Table(
+        [[
+            Paragraph(f"{display_id}. {_text(title)}", HEADING_STYLE),
+            Paragraph(f"Version {_text(version.version_label)}", CELL_STYLE),
+            Paragraph(f'<font color="white"><b>{_text(version.status)}</b></font>', CELL_STYLE),
+        ]],
+        colWidths=[None, 22 * mm, 24 * mm],
+    )
+    header.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BACKGROUND', (2, 0), (2, 0), status_color),
+        ('LEFTPADDING', (0, 0), (0, 0), 0),
+    ]))
+
+    details = [[Paragraph('<b>Kategorie</b>', CELL_STYLE), Paragraph(_text(category), CELL_STYLE)]]
+    for column in custom_columns:
+        value = custom_data.get(column)
+        if value not in (None, ''):
+            details.append([Paragraph(f'<b>{_text(column)}</b>', CELL_STYLE), Paragraph(_text(value), CELL_STYLE)])
+    details_table = Table(details, colWidths=[40 * mm, None])
+    details_table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ('BACKGROUND', (0, 0), (0, -1), colors.whitesmoke),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+
+    # Heading and description stay on one page; long detail tables may split
+    return [
+        KeepTogether([header, Paragraph(_text(description), BODY_STYLE)]),
+        Spacer(1, 2 * mm),
+        details_table,
+        Spacer(1, 6 * mm),
+    ]
+
+
+def write_pdf_report(project_id: int, filepath: str,
+                     progress: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    Write the PDF report of a project's latest requirement versions.
+
+    Args:
+        project_id (int): Project to report on
+        filepath (str): Output path
+        progress (Callable): Called as progress(done, total) while building
+    """
+    from .. import db
+    from ..models import Project, RequirementVersion
+    from .similarity_service import latest_versions_query
+    from .table_formats import custom_columns_of
+
+    project = db.session.get(Project, project_id)
+    query = latest_versions_query(project_id).order_by(RequirementVersion.requirement_id)
+    custom_columns, total = custom_columns_of(query)
+    if progress:
+        progress(0, total)
+
+    def flowables():
+        yield Paragraph(_text(f"Anforderungen: {project.name}"), TITLE_STYLE)
+        yield Paragraph(
+            f"Stand {datetime.now().strftime('%d.%m.%Y %H:%M')} &nbsp;|&nbsp; {total} Anforderungen "
+            f"(jeweils neueste Version)", META_STYLE
+        )
+        yield Spacer(1, 8 * mm)
+        for display_id, version in enumerate(query.yield_per(FLOWABLE_WINDOW), 1):
+            yield from requirement_flowables(display_id, version, custom_columns)
+            if progress and display_id % PROGRESS_STEP == 0:
+                progress(display_id, total)
+
+    def footer(canvas, doc):
+        canvas.saveState()
+        canvas.setFont('Helvetica', 8)
+        canvas.setFillColor(colors.grey)
+        canvas.drawString(doc.leftMargin, 10 * mm, project.name)
+        canvas.drawRightString(A4[0] - doc.rightMargin, 10 * mm, f"Seite {doc.page}")
+        canvas.restoreState()
+
+    doc = _StreamingDocTemplate(
+        filepath, flowables(), pagesize=A4, title=f"Anforderungen: {project.name}",
+        leftMargin=18 * mm, rightMargin=18 * mm, topMargin=18 * mm, bottomMargin=18 * mm,
+    )
+    doc.build(onFirstPage=footer, onLaterPages=footer)
+    if progress:
+        progress(total, total)
@@ -0,0 +1,291 @@
+"""
+Prompt Registry Module
+Loads prompt templates once and memoizes the prompts rendered for a column set.
+
+Rendered prompts are byte-identical for the same template and columns, which
+keeps the message prefix stable for provider-side prompt caching. Column sets
+are user-defined per project, so at most RENDER_CACHE_SIZE rendered prompts
+are kept (least recently used are dropped).
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+# Add parent directory to path to import config
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import config
+
+# Rendered prompts kept in memory (one per template and column set)
+RENDER_CACHE_SIZE = 256
+
+
+class PromptRegistry:
+    """Registry of named prompt templates with file reloads and render memoization"""
+
+    def __init__(self, maxsize: int = RENDER_CACHE_SIZE):
+        self._templates: Dict[str, str] = {}
+        self._file_templates: Dict[str, str] = {}
+        self._paths: Dict[str, str] = {}
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self._renderers: Dict[str, Callable[[str, Tuple[str, ...]], str]] = {}
+        self._rendered: Dict[Tuple[str, Tuple[str, ...]], str] = OrderedDict()
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+
+    def register(self, name: str, text: str = "", path: Optional[str] = None,
+                 renderer: Optional[Callable[[str, Tuple[str, ...]], str]] = None) -> None:
+        """
+        Register a prompt template.
+
+        Args:
+            name (str): Template name
+            text (str): Template text, used when no file is given or the file is missing
+            path (str, optional): File to load the template from (UTF-8). Reloaded when its mtime changes.
+            renderer (callable, optional): renderer(template, columns) -> prompt. Defaults to the template itself.
+        """
+        with self._lock:
+            self._templates[name] = text
+            self._file_templates.pop(name, None)
+            self._mtimes[name] = None
+            if path:
+                self._paths[name] = path
+            else:
+                self._paths.pop(name, None)
+            self._renderers[name] = renderer or (lambda template, columns: template)
+            self._drop_rendered(name)
+
+    def get(self, name: str) -> str:
+        """
+        Get the raw template text, reloading file-backed templates if the file changed.
+
+        Args:
+            name (str): Template name
+
+        Returns:
+            str: Template text
+
+        Raises:
+            KeyError: If no template with this name is registered
+        """
+        with self._lock:
+            return self._current_template(name)
+
+    def render(self, name: str, columns: Optional[Sequence[str]] = None) -> str:
+        """
+        Render a template for a column set. Results are memoized per column tuple (LRU).
+
+        Args:
+            name (str): Template name
+            columns (list, optional): Column names of the project
+
+        Returns:
+            str: Rendered prompt
+        """
+        key = (name, tuple(columns) if columns else ())
+        with self._lock:
+            template = self._current_template(name)
+            rendered = self._rendered.get(key)
+            if rendered is None:
+                rendered = self._renderers[name](template, key[1])
+                self._rendered[key] = rendered
+                if len(self._rendered) > self._maxsize:
+                    self._rendered.popitem(last=False)
+            else:
+                self._rendered.move_to_end(key)
+            return rendered
+
+    def _current_template(self, name: str) -> str:
+        if name not in self._templates:
+            raise KeyError(f"Unknown prompt template: {name}")
+
+        path = self._paths.get(name)
+        if not path:
+            return self._templates[name]
+
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+
+        if mtime != self._mtimes[name]:
+            if mtime is None:
+                self._file_templates.pop(name, None)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._file_templates[name] = f.read().strip()
+            self._mtimes[name] = mtime
+            self._drop_rendered(name)
+
+        return self._file_templates.get(name, self._templates[name])
+
+    def _drop_rendered(self, name: str) -> None:
+        for key in [k for k in self._rendered if k[0] == name]:
+            del self._rendered[key]
+
+
+def _json_example(columns: Tuple[str, ...], value_hint: str) -> str:
+    """Build the JSON skeleton of one requirement for the developer message."""
+    json_fields = [f'      "{col}": "{value_hint} {col}"' for col in columns]
+    return "{\n" + ",\n".join(json_fields) + "\n    }"
+
+
+def _column_hint(col: str) -> str:
+    """Describe the expected value of a column for the system prompt."""
+    col_lower = col.lower()
+    if col_lower in ['titel', 'title']:
+        return "Kurzer, prägnanter Titel"
+    if col_lower in ['beschreibung', 'description']:
+        return "Detaillierte Beschreibung mit Akzeptanzkriterien"
+    if col_lower in ['kategorie', 'category']:
+        return "Kategorie (z.B. Funktional, Nicht-Funktional, etc.)"
+    if col_lower in ['status']:
+        return "Offen"
+    return f"Passender Wert für {col}"
+
+
+def _render_system_prompt(template: str, columns: Tuple[str, ...]) -> str:
+    if not columns:
+        return template
+
+    json_fields = [f'"{col}": "{_column_hint(col)}"' for col in columns]
+    json_structure = "{\n      " + ",\n      ".join(json_fields) + "\n    }"
+
+    return f"""
+Du bist ein erfahrener Requirements Engineer.
+Erzeuge klare, testbare, präzise Software-Anforderungen im JSON-Format.
+
+Das Projekt verwendet folgende Spalten: {', '.join(columns)}
+
+Antworte ausschließlich mit gültigem JSON in folgender Struktur:
+{{
+  "requirements": [
+    {json_structure}
+  ]
+}}
+
+Regeln:
+- Maximiere Klarheit und Testbarkeit (Akzeptanzkriterien implizit in Beschreibung).
+- Verwende kurze, prägnante Titel.
+- Fülle ALLE angegebenen Spalten mit sinnvollen Werten.
+- Wenn Informationen fehlen, triff sinnvolle, konservative Annahmen.
+- Generiere mindestens 3 und maximal 10 Requirements.
+"""
+
+
+def _render_generate_developer(template: str, columns: Tuple[str, ...]) -> str:
+    if not columns:
+        return template
+
+    return f"""Du musst ausschließlich mit gültigem JSON antworten.
+Das JSON-Format muss exakt dieser Struktur folgen:
+{{
+  "requirements": [
+    {_json_example(columns, "Passender Wert für")}
+  ]
+}}
+
+WICHTIG: 
+- Verwende EXAKT diese Spaltennamen: {', '.join(columns)}
+- Fülle ALLE Spalten mit sinnvollen Werten
+- Behalte die Struktur und Spaltennamen EXAKT bei
+- Generiere MINDESTENS 5 verschiedene Anforderungen
+- Antworte NUR mit diesem JSON, ohne zusätzlichen Text davor oder danach."""
+
+
+def _render_optimize_developer(template: str, columns: Tuple[str, ...]) -> str:
+    return f"""Du musst ausschließlich mit gültigem JSON antworten.
+Das JSON-Format muss exakt dieser Struktur folgen:
+{{
+  "requirements": [
+    {_json_example(columns, "Optimierter Wert für")}
+  ]
+}}
+
+KRITISCH WICHTIG: 
+- Verwende EXAKT diese Spaltennamen: {', '.join(columns)}
+- KEINE zusätzlichen Spalten hinzufügen
+- KEINE Spalten entfernen
+- Behalte die GLEICHE ANZAHL an Anforderungen wie im Input
+- Optimiere nur den INHALT, nicht die Struktur
+- Antworte NUR mit diesem JSON, ohne zusätzlichen Text davor oder danach."""
+
+
+# ===== PROMPT 1: NEU-GENERIERUNG =====
+# Dieser Prompt ist NUR für die Erstellung NEUER Anforderungen
+GENERATE_SYSTEM_PROMPT = """Du bist ein erfahrener Requirements Engineer. 
+Deine Aufgabe: NEUE Anforderungen VON GRUND AUF erstellen.
+
+PHASE 1 & 2 (Analyse/Struktur): 
+- Verstehe die Beschreibung des Users
+- Identifiziere die benötigten Anforderungs-Kategorien
+- Strukturiere die Anforderungen logisch
+
+PHASE 3 (Neu-Erstellung): 
+- Formuliere KOMPLETT NEUE Anforderungen
+- Nutze die Satzschablone "Das System muss..."
+- Stelle sicher: SMART, normenkonform, präzise
+- MINDESTENS 5 unterschiedliche Anforderungen
+
+PHASE 4 (Review): 
+- Qualitätscheck für jede Anforderung
+- Messbar, akzeptabel, testbar
+
+WICHTIG: Antworte NUR mit JSON. Kein zusätzlicher Text."""
+
+GENERATE_DEVELOPER_PROMPT = """Du musst ausschließlich mit gültigem JSON antworten.
+Das JSON-Format muss exakt dieser Struktur folgen:
+{
+  "requirements": [
+    {
+      "title": "Kurzer, prägnanter Titel",
+      "description": "Detaillierte Beschreibung mit Akzeptanzkriterien",
+      "category": "Kategorie (z.B. Funktional, Nicht-Funktional, etc.)",
+      "status": "Offen"
+    }
+  ]
+}
+
+WICHTIG:
+- Generiere MINDESTENS 5 verschiedene Anforderungen
+- Antworte NUR mit diesem JSON, ohne zusätzlichen Text davor oder danach."""
+
+# ===== PROMPT 2: EXCEL-OPTIMIERUNG =====
+# Dieser Prompt ist NUR für die Optimierung bestehender Excel-Anforderungen
+OPTIMIZE_SYSTEM_PROMPT = """Du bist ein erfahrener Requirements Engineer.
+Deine Aufgabe: BESTEHENDE Excel-Anforderungen OPTIMIEREN und VERBESSERN.
+
+PHASE 1 & 2 (Analyse/Struktur): 
+- Analysiere die übergebenen Anforderungen aus der Excel-Datei
+- Verstehe Kontext und vorhandene Struktur
+- Identifiziere Verbesserungspotenzial
+
+PHASE 3 (Optimierung): 
+- Verbessere JEDE einzelne Anforderung inhaltlich
+- Präzisiere Formulierungen
+- Stelle SMART-Kriterien sicher
+- Verbessere Normenkonformität
+- WICHTIG: GLEICHE ANZAHL beibehalten (keine neuen hinzufügen!)
+- WICHTIG: Spaltenstruktur EXAKT beibehalten
+
+PHASE 4 (Review): 
+- Qualitätscheck für jede optimierte Anforderung
+- Präzise, messbar, normenkonform
+
+WICHTIG: Antworte NUR mit den OPTIMIERTEN Anforderungen im gleichen JSON-Format. Kein zusätzlicher Text."""
+
+
+prompt_registry = PromptRegistry()
+prompt_registry.register(
+    "system",
+    text=config.SYSTEM_PROMPT or config.DEFAULT_SYSTEM_PROMPT,
+    path=config.SYSTEM_PROMPT_PATH,
+    renderer=_render_system_prompt
+)
+prompt_registry.register("generate_system", text=GENERATE_SYSTEM_PROMPT)
+prompt_registry.register("generate_developer", text=GENERATE_DEVELOPER_PROMPT, renderer=_render_generate_developer)
+prompt_registry.register("optimize_system", text=OPTIMIZE_SYSTEM_PROMPT)
+prompt_registry.register("optimize_developer", renderer=_render_optimize_developer)
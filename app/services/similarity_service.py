@@ -0,0 +1,282 @@
+"""
+Similarity Service Module
+Detects near-duplicate requirements with hashed character n-gram vectors.
+
+Each requirement version stores a fixed-size, L2-normalized vector of its
+title and description (RequirementVersion.text_vector). Cosine similarity
+against all requirements of a project is then a single matrix-vector product.
+"""
+
+import re
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path to import config
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import config
+
+VECTOR_DIM = 256
+VECTOR_DTYPE = np.float32
+NGRAM_SIZE = 3
+INDEX_CACHE_SIZE = 64
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+def text_vector(title: str, description: str = "") -> np.ndarray:
+    """
+    Build a hashed n-gram vector for a requirement text.
+
+    Character trigrams of every word (padded with spaces) and the words
+    themselves are hashed into VECTOR_DIM buckets with a sign bit, so
+    rewordings that share most of their vocabulary end up close together.
+
+    Args:
+        title (str): Requirement title
+        description (str): Requirement description
+
+    Returns:
+        np.ndarray: L2-normalized float32 vector of length VECTOR_DIM
+    """
+    vector = np.zeros(VECTOR_DIM, dtype=VECTOR_DTYPE)
+    text = f"{title or ''} {description or ''}".lower()
+
+    for word in _WORD_PATTERN.findall(text):
+        padded = f" {word} "
+        grams = [padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)]
+        grams.append(word)
+        for gram in grams:
+            h = zlib.crc32(gram.encode('utf-8'))
+            vector[h % VECTOR_DIM] += 1.0 if h & 0x80000000 else -1.0
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def vector_to_bytes(vector: np.ndarray) -> bytes:
+    """Serialize a vector for the RequirementVersion.text_vector column."""
+    return np.asarray(vector, dtype=VECTOR_DTYPE).tobytes()
+
+
+def vector_from_bytes(data: Optional[bytes]) -> Optional[np.ndarray]:
+    """Deserialize a stored vector. Returns None for missing or foreign-sized data."""
+    if not data or len(data) != VECTOR_DIM * np.dtype(VECTOR_DTYPE).itemsize:
+        return None
+    return np.frombuffer(data, dtype=VECTOR_DTYPE)
+
+
+class SimilarityIndex:
+    """In-memory matrix of requirement vectors with batched cosine search"""
+
+    def __init__(self, requirement_ids: List[int] = None, matrix: np.ndarray = None, dim: int = VECTOR_DIM):
+        if matrix is None:
+            matrix = np.zeros((0, dim), dtype=VECTOR_DTYPE)
+        self._matrix = np.asarray(matrix, dtype=VECTOR_DTYPE)
+        self._ids = np.asarray(requirement_ids or [], dtype=np.int64)
+        self._size = len(self._ids)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[:self._size]
+
+    @property
+    def requirement_ids(self) -> np.ndarray:
+        return self._ids[:self._size]
+
+    def add(self, requirement_id: int, vector: np.ndarray) -> None:
+        """Append a vector. Capacity grows geometrically so bulk imports stay O(n)."""
+        if self._size == self._matrix.shape[0]:
+            capacity = max(16, self._size * 2)
+            matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=VECTOR_DTYPE)
+            matrix[:self._size] = self.matrix
+            ids = np.zeros(capacity, dtype=np.int64)
+            ids[:self._size] = self.requirement_ids
+            self._matrix, self._ids = matrix, ids
+        self._matrix[self._size] = vector
+        self._ids[self._size] = requirement_id
+        self._size += 1
+
+    def set(self, requirement_id: int, vector: np.ndarray) -> None:
+        """Replace the vector of a requirement, or append it if it is not indexed yet."""
+        rows = np.flatnonzero(self.requirement_ids == requirement_id)
+        if len(rows):
+            self._matrix[rows[0]] = vector
+        else:
+            self.add(requirement_id, vector)
+
+    def query(self, vector: np.ndarray, top_k: int = 5, min_score: float = 0.0,
+              exclude_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Find the most similar requirements.
+
+        Args:
+            vector (np.ndarray): Normalized query vector
+            top_k (int): Maximum number of results
+            min_score (float): Minimum cosine similarity
+            exclude_id (int, optional): Requirement id to skip (e.g. the query itself)
+
+        Returns:
+            List[Tuple[int, float]]: (requirement_id, score) pairs, best first
+        """
+        if not self._size or top_k <= 0:
+            return []
+
+        scores = self.matrix @ np.asarray(vector, dtype=VECTOR_DTYPE)
+        if exclude_id is not None:
+            scores[self.requirement_ids == exclude_id] = -1.0
+
+        k = min(top_k, self._size)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates])]
+
+        return [
+            (int(self._ids[idx]), float(scores[idx]))
+            for idx in candidates
+            if scores[idx] >= min_score
+        ]
+
+
+def latest_versions_query(project_id: int):
+    """Query the latest version of every non-deleted requirement in a project."""
+    from .. import db
+    from ..models import Requirement, RequirementVersion
+
+    latest = (
+        db.session.query(
+            RequirementVersion.requirement_id,
+            db.func.max(RequirementVersion.version_index).label('max_index')
+        )
+        .join(Requirement, Requirement.id == RequirementVersion.requirement_id)
+        .filter(Requirement.project_id == project_id, Requirement.is_deleted == False)
+        .group_by(RequirementVersion.requirement_id)
+        .subquery()
+    )
+    return (
+        RequirementVersion.query
+        .join(latest, db.and_(
+            RequirementVersion.requirement_id == latest.c.requirement_id,
+            RequirementVersion.version_index == latest.c.max_index
+        ))
+    )
+
+
+def build_project_index(project_id: int) -> SimilarityIndex:
+    """
+    Build a similarity index over the latest versions of a project's requirements.
+
+    Versions without a stored vector (created before vectors existed) are
+    vectorized on the fly.
+
+    Args:
+        project_id (int): Project id
+
+    Returns:
+        SimilarityIndex: Index keyed by requirement id
+    """
+    from ..models import RequirementVersion
+
+    rows = latest_versions_query(project_id).with_entities(
+        RequirementVersion.requirement_id,
+        RequirementVersion.title,
+        RequirementVersion.description,
+        RequirementVersion.text_vector
+    ).all()
+
+    matrix = np.zeros((len(rows), VECTOR_DIM), dtype=VECTOR_DTYPE)
+    requirement_ids = []
+    for idx, (req_id, title, description, data) in enumerate(rows):
+        vector = vector_from_bytes(data)
+        matrix[idx] = vector if vector is not None else text_vector(title, description)
+        requirement_ids.append(req_id)
+
+    return SimilarityIndex(requirement_ids, matrix)
+
+
+_index_cache = OrderedDict()  # project id -> (revision, SimilarityIndex)
+_index_cache_lock = threading.Lock()
+
+
+def cached_project_index(project) -> SimilarityIndex:
+    """
+    Similarity index of a project, shared per process until the project changes.
+
+    Entries are keyed by Project.revision like the fragment cache, so any
+    flush that changes a requirement of the project rebuilds the index on the
+    next lookup. The returned index must not be modified.
+
+    Args:
+        project (Project): Project to index
+
+    Returns:
+        SimilarityIndex: Index keyed by requirement id
+    """
+    revision = project.revision
+    with _index_cache_lock:
+        entry = _index_cache.get(project.id)
+        if entry is not None and entry[0] == revision:
+            _index_cache.move_to_end(project.id)
+            return entry[1]
+
+    index = build_project_index(project.id)
+    with _index_cache_lock:
+        _index_cache[project.id] = (revision, index)
+        _index_cache.move_to_end(project.id)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+class DuplicateDetector:
+    """Finds near-duplicates of incoming requirements during an import"""
+
+    def __init__(self, project_id: int):
+        self.index = build_project_index(project_id)
+        self.flag_threshold = config.SIMILARITY_FLAG_THRESHOLD
+        self.merge_threshold = config.SIMILARITY_MERGE_THRESHOLD
+        self.auto_merge = config.SIMILARITY_AUTO_MERGE
+        self.flagged = []
+
+    def find_duplicate(self, title: str, vector: np.ndarray) -> Optional[int]:
+        """
+        Check an incoming requirement against the project.
+
+        Matches above the merge threshold are returned for auto-merge (if
+        enabled); matches above the flag threshold are recorded in `flagged`.
+
+        Args:
+            title (str): Title of the incoming requirement
+            vector (np.ndarray): Its text vector
+
+        Returns:
+            int | None: Requirement id to add the new version to, or None
+        """
+        matches = self.index.query(vector, top_k=1, min_score=self.flag_threshold)
+        if not matches:
+            return None
+
+        req_id, score = matches[0]
+        if self.auto_merge and score >= self.merge_threshold:
+            return req_id
+
+        self.flagged.append({
+            'title': title,
+            'similar_requirement_id': req_id,
+            'score': round(score, 3)
+        })
+        return None
+
+    def add(self, requirement_id: int, vector: np.ndarray) -> None:
+        """Register the vector of an imported version so later rows are checked
+        against the latest text of its requirement (new or merged)."""
+        self.index.set(requirement_id, vector)
@@ -0,0 +1,199 @@
+"""
+Table Formats Module
+Bulk export and import of requirements as Excel, CSV or columnar binary.
+
+All formats share the Excel export layout: ID, title, description, category,
+the remaining custom columns, Version, Status. Files written in one format
+can be imported through the same header mapping as the others.
+
+- CSV (.csv): streamed row by row with the csv module, UTF-8 with BOM so
+  Excel detects the encoding.
+- Columnar (.rqc): a small Parquet-like container - a JSON header with the
+  column names followed by one zlib-compressed JSON array per column. Values
+  of one column compress much better together than interleaved rows, and
+  reading needs no spreadsheet library.
+"""
+
+import csv
+import io
+import json
+import struct
+import zlib
+from typing import IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+CSV_MIMETYPE = 'text/csv'
+COLUMNAR_MIMETYPE = 'application/octet-stream'
+COLUMNAR_MAGIC = b'RQCOL1\n'
+CSV_CHUNK_ROWS = 200
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+CSV_EXTENSIONS = ('.csv',)
+COLUMNAR_EXTENSIONS = ('.rqc',)
+TABLE_EXTENSIONS = EXCEL_EXTENSIONS + CSV_EXTENSIONS + COLUMNAR_EXTENSIONS
+
+# Columns with their own export column (not repeated as custom columns)
+FIXED_COLUMNS = ['title', 'description', 'category']
+# Written for missing values, skipped again on import
+EMPTY_CELL = '–'
+
+_LENGTH = struct.Struct('<I')
+
+
+def custom_columns_of(query) -> Tuple[List[str], int]:
+    """
+    Union of the custom columns in a version query, reading only the JSON column.
+
+    Returns:
+        tuple: (sorted custom columns without FIXED_COLUMNS, number of versions)
+    """
+    from ..models import RequirementVersion
+
+    all_custom_columns = set()
+    count = 0
+    for (raw,) in query.with_entities(RequirementVersion.custom_data):
+        count += 1
+        try:
+            all_custom_columns.update(json.loads(raw) if raw else {})
+        except ValueError:
+            pass
+    return [col for col in sorted(all_custom_columns) if col not in FIXED_COLUMNS], count
+
+
+def export_table(project_id: int, batch_size: int = 500) -> Tuple[List[str], int, Iterator[list]]:
+    """
+    Headers and rows of a project export, rows streamed in batches.
+
+    Args:
+        project_id (int): Project to export
+        batch_size (int): Versions loaded per database round trip
+
+    Returns:
+        tuple: (headers, row count, iterator over row lists)
+    """
+    from ..models import RequirementVersion
+    from .similarity_service import latest_versions_query
+
+    # Ordered by requirement id like the export has always been
+    query = latest_versions_query(project_id).order_by(RequirementVersion.requirement_id)
+    custom_columns, row_count = custom_columns_of(query)
+    headers = ["ID", "title", "description", "category"] + custom_columns + ["Version", "Status"]
+
+    def rows():
+        for display_id, version in enumerate(query.yield_per(batch_size), 1):
+            custom_data = version.get_custom_data()
+            # Values edited in the table live in custom_data, imported ones only in the columns
+            yield (
+                [display_id]
+                + [custom_data.get(col) or getattr(version, col) or EMPTY_CELL for col in FIXED_COLUMNS]
+                + [custom_data.get(col, EMPTY_CELL) for col in custom_columns]
+                + [version.version_label, version.status]
+            )
+
+    return headers, row_count, rows()
+
+
+def iter_csv(headers: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """
+    Encode a table as CSV chunk by chunk (for streaming responses).
+
+    Args:
+        headers (Sequence[str]): Header row
+        rows (Iterable): Data rows
+
+    Yields:
+        bytes: UTF-8 encoded CSV, starting with a BOM
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(headers)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        # Several rows per chunk keep the number of writes to the socket low
+        if count % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def write_columnar(headers: Sequence[str], rows: Iterable[Sequence], fileobj: IO[bytes]) -> int:
+    """
+    Write a table in the columnar format.
+
+    Layout: magic, length-prefixed JSON header {"columns", "rows"}, then per
+    column a length-prefixed zlib-compressed JSON array of its values.
+
+    Args:
+        headers (Sequence[str]): Column names
+        rows (Iterable): Data rows (JSON-serializable values)
+        fileobj: Binary file object
+
+    Returns:
+        int: Number of bytes written
+    """
+    columns = [[] for _ in headers]
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value)
+
+    header = json.dumps({'columns': list(headers), 'rows': len(columns[0]) if columns else 0}).encode('utf-8')
+    written = fileobj.write(COLUMNAR_MAGIC)
+    written += fileobj.write(_LENGTH.pack(len(header)) + header)
+    for column in columns:
+        data = zlib.compress(json.dumps(column, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+        written += fileobj.write(_LENGTH.pack(len(data)) + data)
+    return written
+
+
+def read_columnar(fileobj: IO[bytes]) -> Tuple[List[str], Iterator[tuple]]:
+    """
+    Read a table written by write_columnar().
+
+    Raises:
+        ValueError: If the data is not in the columnar format
+    """
+    def read_block():
+        size = fileobj.read(_LENGTH.size)
+        if len(size) != _LENGTH.size:
+            raise ValueError("Unerwartetes Dateiende")
+        return fileobj.read(_LENGTH.unpack(size)[0])
+
+    if fileobj.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError("Keine gültige .rqc-Datei")
+    header = json.loads(read_block())
+    headers = header['columns']
+    columns = [json.loads(zlib.decompress(read_block())) for _ in headers]
+    if any(len(column) != header['rows'] for column in columns):
+        raise ValueError("Beschädigte .rqc-Datei")
+    return headers, zip(*columns)
+
+
+def read_table(fileobj: IO[bytes], filename: str) -> Tuple[List[Optional[str]], Iterator[tuple]]:
+    """
+    Read header row and data rows of an uploaded table, chosen by extension.
+
+    Args:
+        fileobj: Binary file object (e.g. a Werkzeug FileStorage)
+        filename (str): Original file name
+
+    Returns:
+        tuple: (header values, iterator over data row tuples)
+
+    Raises:
+        ValueError: If the extension is not supported or the file is invalid
+    """
+    name = filename.lower()
+    if name.endswith(EXCEL_EXTENSIONS):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(fileobj, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        return list(next(rows, ())), rows
+    if name.endswith(CSV_EXTENSIONS):
+        text = io.TextIOWrapper(getattr(fileobj, 'stream', fileobj), encoding='utf-8-sig', newline='')
+        reader = csv.reader(text)
+        return list(next(reader, [])), (tuple(row) for row in reader)
+    if name.endswith(COLUMNAR_EXTENSIONS):
+        return read_columnar(fileobj)
+    raise ValueError(f"Nicht unterstütztes Dateiformat: {filename}")
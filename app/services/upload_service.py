@@ -0,0 +1,123 @@
+"""
+Upload Service Module
+Streamed handling of uploaded tables.
+
+Uploads are copied to a file on disk in chunks of UPLOAD_CHUNK_SIZE bytes
+while their SHA-256 is computed, so an upload is never held in memory as a
+whole. The first chunk is checked against the format the extension promises
+(.xlsx is a zip archive, .rqc starts with its magic, CSV is text) before
+anything else is written, and copying stops at config.MAX_CONTENT_LENGTH.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Add parent directory to path to import config
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import config
+
+from .table_formats import COLUMNAR_EXTENSIONS, COLUMNAR_MAGIC, CSV_EXTENSIONS, EXCEL_EXTENSIONS
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+ZIP_MAGIC = b'PK\x03\x04'
+# Legacy binary Excel (.xls), which openpyxl cannot read
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+
+class UploadError(ValueError):
+    """Raised for uploads that are too large or not in the expected format"""
+
+
+@dataclass
+class SpooledUpload:
+    """Uploaded file copied to disk"""
+    path: str
+    filename: str
+    size: int
+    sha256: str
+
+    def remove(self) -> None:
+        """Delete the spooled file (if it still exists)."""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def check_format(head: bytes, filename: str) -> None:
+    """
+    Check the first bytes of an upload against its file extension.
+
+    Args:
+        head (bytes): First chunk of the file
+        filename (str): Original file name
+
+    Raises:
+        UploadError: If the content does not match the extension
+    """
+    name = filename.lower()
+    if name.endswith(EXCEL_EXTENSIONS):
+        if head.startswith(OLE_MAGIC):
+            raise UploadError("Das alte Excel-Format (.xls) wird nicht unterstützt. Bitte als .xlsx speichern.")
+        if not head.startswith(ZIP_MAGIC):
+            raise UploadError("Die Datei ist keine gültige Excel-Datei (.xlsx).")
+    elif name.endswith(COLUMNAR_EXTENSIONS):
+        if not head.startswith(COLUMNAR_MAGIC):
+            raise UploadError("Die Datei ist keine gültige .rqc-Datei.")
+    elif name.endswith(CSV_EXTENSIONS):
+        if b'\x00' in head:
+            raise UploadError("Die Datei ist keine Textdatei (CSV).")
+    else:
+        raise UploadError(f"Nicht unterstütztes Dateiformat: {filename}")
+
+
+def spool_upload(file, directory: Optional[str] = None, max_bytes: Optional[int] = None) -> SpooledUpload:
+    """
+    Copy an uploaded file to disk chunk by chunk, checking format and size.
+
+    Args:
+        file (FileStorage): Uploaded file from request.files
+        directory (str): Target directory (default: system temp directory)
+        max_bytes (int): Size limit (default: config.MAX_CONTENT_LENGTH)
+
+    Returns:
+        SpooledUpload: Path, size and SHA-256 of the stored copy
+
+    Raises:
+        UploadError: If the file is empty, too large or not in the expected format
+    """
+    if max_bytes is None:
+        max_bytes = config.MAX_CONTENT_LENGTH
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    stream = getattr(file, 'stream', file)
+    head = stream.read(UPLOAD_CHUNK_SIZE)
+    if not head:
+        raise UploadError("Die hochgeladene Datei ist leer.")
+    check_format(head, file.filename)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(file.filename)[1].lower(), dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadError(f"Die Datei ist zu groß (maximal {max_bytes // (1024 * 1024)} MB).")
+                digest.update(chunk)
+                out.write(chunk)
+                chunk = stream.read(UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        os.remove(path)
+        raise
+
+    return SpooledUpload(path=path, filename=file.filename, size=size, sha256=digest.hexdigest())
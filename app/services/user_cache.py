@@ -0,0 +1,199 @@
+"""
+User Cache Module
+Per-process TTL cache of the identity flask_login needs on every request.
+
+load_user() otherwise queries the user table for every request, including
+each AJAX call. Cached entries hold the user's id, email and the ids of all
+projects the user can access (owned or shared). Entries are dropped after
+USER_CACHE_TTL seconds, and immediately after a commit that changes
+sharing, project ownership or the user's password. Other processes only
+see such changes once their own entry expires, so the cached project ids
+may only be used to deny access (see Project.is_accessible_by).
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import FrozenSet, Iterable, Optional
+
+from flask import g, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+# Add parent directory to path to import config
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import config
+
+USER_CACHE_SIZE = 10_000
+
+_PENDING_KEY = 'user_cache_invalidate'
+
+
+class CachedUser(UserMixin):
+    """Read-only identity of a logged-in user, shared between requests"""
+
+    def __init__(self, id: int, email: str, project_ids: Iterable[int]):
+        self.id = id
+        self.email = email
+        self.project_ids: FrozenSet[int] = frozenset(project_ids)
+
+    def can_access_project(self, project_id: int) -> bool:
+        """Check if the user owns or was granted access to the project."""
+        return project_id in self.project_ids
+
+    # UserMixin compares users by get_id(), so a CachedUser equals its User row
+    __hash__ = UserMixin.__hash__
+
+    def __getattr__(self, name):
+        # Anything beyond the cached identity (relationships etc.) comes from
+        # the database row, loaded once per request
+        if name.startswith('__') or not has_app_context():
+            raise AttributeError(name)
+        return getattr(self._db_user(), name)
+
+    def _db_user(self):
+        from .. import db
+        from ..models import User
+
+        users = g.setdefault('_cached_user_rows', {})
+        if self.id not in users:
+            users[self.id] = db.session.get(User, self.id)
+        return users[self.id]
+
+    def __repr__(self):
+        return f'<CachedUser {self.email}>'
+
+
+class UserCache:
+    """Thread-safe TTL cache of CachedUser entries keyed by user id"""
+
+    def __init__(self, ttl: float, maxsize: int = USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[CachedUser]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            return user
+
+    def put(self, user: CachedUser) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids: int) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(ttl=config.USER_CACHE_TTL)
+
+
+def accessible_project_ids(user_id: int) -> FrozenSet[int]:
+    """Ids of all projects the user owns or that are shared with them (one query)."""
+    from .. import db
+    from ..models import Project
+
+    return frozenset(db.session.execute(
+        Project.accessible_by(user_id).with_entities(Project.id).statement
+    ).scalars())
+
+
+def load_cached_user(user_id: int) -> Optional[CachedUser]:
+    """
+    Resolve the user for flask_login, from the cache if possible.
+
+    Args:
+        user_id (int): Id stored in the session
+
+    Returns:
+        CachedUser | None: None if the user does not exist
+    """
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    from .. import db
+    from ..models import User
+
+    row = db.session.execute(
+        db.select(User.id, User.email).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+
+    user = CachedUser(row.id, row.email, accessible_project_ids(row.id))
+    user_cache.put(user)
+    return user
+
+
+def invalidate_after_commit(target, *user_ids: int) -> None:
+    """
+    Drop cache entries once the session that changed `target` commits.
+
+    Invalidating before the commit would let a concurrent request re-cache
+    the old state; without a session the entries are dropped right away.
+    """
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    session = object_session(target)
+    if session is None:
+        user_cache.invalidate(*user_ids)
+        return
+    session.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+
+
+def register_invalidation_events() -> None:
+    """Hook cache invalidation into the model events (called once at startup)."""
+    from ..models import Project, User
+
+    if event.contains(Session, 'after_commit', _flush_invalidations):
+        return
+
+    @event.listens_for(Project.shared_with, 'append')
+    @event.listens_for(Project.shared_with, 'remove')
+    def _sharing_changed(project, user, initiator):
+        invalidate_after_commit(project, user.id)
+
+    @event.listens_for(Project, 'after_insert')
+    @event.listens_for(Project, 'after_delete')
+    def _project_created_or_deleted(mapper, connection, project):
+        # Only use an already loaded collection, no queries during the flush
+        shared_ids = [user.id for user in project.__dict__.get('shared_with', [])]
+        invalidate_after_commit(project, project.user_id, *shared_ids)
+
+    @event.listens_for(User.password_hash, 'set')
+    def _password_changed(user, value, oldvalue, initiator):
+        invalidate_after_commit(user, user.id)
+
+    event.listen(Session, 'after_commit', _flush_invalidations)
+    event.listen(Session, 'after_rollback', _discard_invalidations)
+
+
+def _flush_invalidations(session):
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if user_ids:
+        user_cache.invalidate(*user_ids)
+
+
+def _discard_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
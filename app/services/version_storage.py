@@ -0,0 +1,271 @@
+"""
+Version Storage Module
+Optional delta encoding of RequirementVersion text.
+
+With VERSION_STORAGE='delta', the description and custom_data of an older
+version are replaced by a zlib-compressed word-level patch against the next
+newer version of the same requirement once that newer version is added.
+Every VERSION_SNAPSHOT_INTERVAL-th version (and always the latest one) keeps
+its full text, so materializing a version applies at most interval - 1
+patches. The latest version is never delta-encoded, which keeps overview,
+export and search queries on plain columns.
+
+Materialization is transparent: RequirementVersion.description and
+RequirementVersion.custom_data decode on access (see models.py).
+"""
+
+import json
+import sys
+import zlib
+from pathlib import Path
+from typing import Optional, Tuple
+
+# Add parent directory to path to import config
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import config
+
+from .diff_service import apply_patch, compact_patch, diff_text
+
+
+def delta_storage_enabled() -> bool:
+    """Check whether new versions trigger delta encoding of their predecessor."""
+    return config.VERSION_STORAGE == 'delta'
+
+
+def encode_delta(newer: Tuple[str, Optional[str]], older: Tuple[str, Optional[str]]) -> bytes:
+    """
+    Encode an older version's text as a patch against the newer version.
+
+    Args:
+        newer (tuple): (description, custom_data JSON) of the newer version
+        older (tuple): (description, custom_data JSON) of the older version
+
+    Returns:
+        bytes: Compressed delta
+    """
+    payload = {
+        'd': compact_patch(diff_text(newer[0], older[0])),
+        'c': compact_patch(diff_text(newer[1], older[1])),
+        # Distinguish NULL custom_data from an empty string
+        'n': older[1] is None
+    }
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 9)
+
+
+def decode_delta(data: bytes, newer: Tuple[str, Optional[str]]) -> Tuple[str, Optional[str]]:
+    """
+    Reconstruct an older version's text from its delta.
+
+    Args:
+        data (bytes): Delta from encode_delta
+        newer (tuple): (description, custom_data JSON) of the newer version
+
+    Returns:
+        tuple: (description, custom_data JSON) of the older version
+    """
+    payload = json.loads(zlib.decompress(data).decode('utf-8'))
+    description = apply_patch(newer[0], payload['d'])
+    custom_data = None if payload.get('n') else apply_patch(newer[1], payload['c'])
+    return description, custom_data
+
+
+def _newer_versions(version, session=None):
+    """Query the versions after `version` in index order."""
+    from ..models import RequirementVersion
+
+    query = RequirementVersion.query.filter(
+        RequirementVersion.requirement_id == version.requirement_id,
+        RequirementVersion.version_index > version.version_index
+    ).order_by(RequirementVersion.version_index.asc())
+    if session is not None:
+        query = query.with_session(session)
+    return query
+
+
+def _previous_version(version, session=None):
+    """Query the closest version before `version`."""
+    from ..models import RequirementVersion
+
+    query = RequirementVersion.query.filter(
+        RequirementVersion.requirement_id == version.requirement_id,
+        RequirementVersion.version_index < version.version_index
+    ).order_by(RequirementVersion.version_index.desc())
+    if session is not None:
+        query = query.with_session(session)
+    return query.first()
+
+
+def materialize(version, session=None) -> Tuple[str, Optional[str]]:
+    """
+    Reconstruct the full text of a delta-encoded version.
+
+    Walks forward to the next full snapshot and applies the patches backwards.
+    Results are cached on every version of the walked chain.
+
+    Args:
+        version (RequirementVersion): Version with a delta
+        session: Session to query in (defaults to db.session)
+
+    Returns:
+        tuple: (description, custom_data JSON)
+
+    Raises:
+        ValueError: If no full snapshot follows the version
+    """
+    cached = getattr(version, '_materialized_cache', None)
+    if cached is not None and cached[0] is version.delta:
+        return cached[1]
+
+    from .. import db
+
+    with (session or db.session).no_autoflush:
+        # The loaded versions collection is usually enough; it can miss
+        # versions that were added by requirement_id after it was loaded
+        newer_versions = [v for v in version.requirement.versions if v.version_index > version.version_index]
+        chain, content = _walk_to_snapshot(version, newer_versions)
+        if content is None:
+            chain, content = _walk_to_snapshot(version, _newer_versions(version, session))
+    if content is None:
+        raise ValueError(f"Version {version.id} has a delta but no newer full version")
+
+    for item in reversed(chain):
+        content = decode_delta(item.delta, content)
+        item._materialized_cache = (item.delta, content)
+    return content
+
+
+def _walk_to_snapshot(version, newer_versions):
+    """Collect the delta chain from `version` up to the next full version."""
+    chain = [version]
+    for newer in newer_versions:
+        if newer.delta is None:
+            return chain, (newer._description, newer._custom_data)
+        chain.append(newer)
+    return chain, None
+
+
+def store_full(version, content: Optional[Tuple[str, Optional[str]]] = None) -> None:
+    """Replace a version's delta by its full text."""
+    if version.delta is None:
+        return
+    description, custom_data = content or materialize(version)
+    version._description = description
+    version._custom_data = custom_data
+    version.delta = None
+    version._materialized_cache = None
+
+
+def thaw_previous_version(version, session=None) -> None:
+    """
+    Store the version before `version` in full if it is a delta against it.
+
+    Must be called before `version` is edited or deleted, because the
+    previous version's delta is only valid against its current text.
+    """
+    if version.id is None or version.requirement_id is None:
+        return
+    from .. import db
+
+    with (session or db.session).no_autoflush:
+        previous = _previous_version(version, session)
+        if previous is not None and previous.delta is not None:
+            store_full(previous, materialize(previous, session))
+
+
+def encode_previous_version(version, previous, interval: Optional[int] = None) -> bool:
+    """
+    Delta-encode `previous` against the newer `version` if the interval allows it.
+
+    Args:
+        version (RequirementVersion): Next newer version
+        previous (RequirementVersion): Version directly before it
+        interval (int, optional): Snapshot interval (defaults to config)
+
+    Returns:
+        bool: True if `previous` was encoded
+    """
+    interval = interval or config.VERSION_SNAPSHOT_INTERVAL
+    if previous.delta is not None or interval <= 1 or previous.version_index % interval == 0:
+        return False
+
+    newer = (version._description, version._custom_data) if version.delta is None else materialize(version)
+    older = (previous._description, previous._custom_data)
+    previous.delta = encode_delta(newer, older)
+    previous._description = ""
+    previous._custom_data = None
+    previous._materialized_cache = (previous.delta, older)
+    return True
+
+
+def before_flush(session) -> None:
+    """
+    Keep delta chains consistent for pending inserts and deletes.
+
+    New versions delta-encode their predecessor (if delta storage is enabled);
+    deleted versions first thaw the predecessor that depends on them.
+    """
+    from ..models import RequirementVersion
+
+    for version in list(session.deleted):
+        if isinstance(version, RequirementVersion):
+            with session.no_autoflush:
+                previous = _previous_version(version, session)
+            if previous is not None and previous.delta is not None and previous not in session.deleted:
+                store_full(previous, materialize(previous, session))
+
+    if not delta_storage_enabled():
+        return
+
+    new_versions = {}
+    for version in session.new:
+        if isinstance(version, RequirementVersion):
+            requirement_id = version.requirement_id or (version.requirement.id if version.requirement else None)
+            if requirement_id is not None:
+                new_versions.setdefault(requirement_id, []).append(version)
+
+    for requirement_id, versions in new_versions.items():
+        versions.sort(key=lambda v: v.version_index)
+        with session.no_autoflush:
+            previous = RequirementVersion.query.with_session(session).filter(
+                RequirementVersion.requirement_id == requirement_id,
+                RequirementVersion.version_index < versions[0].version_index
+            ).order_by(RequirementVersion.version_index.desc()).first()
+        for version in versions:
+            # Apply the column default now, the delta must match the stored text
+            if version._custom_data is None:
+                version._custom_data = '{}'
+            if previous is not None:
+                encode_previous_version(version, previous)
+            previous = version
+
+
+def compact_requirement(requirement, interval: Optional[int] = None) -> int:
+    """
+    Delta-encode all eligible versions of an existing requirement.
+
+    Returns:
+        int: Number of versions that were encoded
+    """
+    versions = requirement.versions
+    encoded = 0
+    # Newest first, so every version is encoded against a full newer text
+    for newer, older in zip(reversed(versions), list(reversed(versions))[1:]):
+        if encode_previous_version(newer, older, interval):
+            encoded += 1
+    return encoded
+
+
+def expand_requirement(requirement) -> int:
+    """
+    Store every version of a requirement in full.
+
+    Returns:
+        int: Number of versions that were expanded
+    """
+    expanded = 0
+    # Materialize first: expanding changes the base the other deltas refer to
+    contents = [(v, materialize(v)) for v in requirement.versions if v.delta is not None]
+    for version, content in contents:
+        store_full(version, content)
+        expanded += 1
+    return expanded
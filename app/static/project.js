@@ -32,6 +32,19 @@ function attachEventListeners() {
       }
     });
 
+    // Inline editing of custom column cells
+    document.addEventListener("dblclick", function (e) {
+      const cell = e.target.closest(".editable-cell");
+      if (cell) {
+        startCellEdit(cell);
+      }
+    });
+
+    // Send queued edits before leaving the page
+    window.addEventListener("pagehide", function () {
+      flushEditQueue(true);
+    });
+
     eventListenersAttached = true;
   }
 
@@ -124,6 +137,8 @@ function updateRowWithVersionData(reqId, versionIndex) {
     const statusColor = selectedVersion.getAttribute("data-status-color");
     statusCell.innerHTML = `<span class="badge" style="background-color: ${statusColor}">${status}</span>`;
 
+    row.setAttribute("data-version-id", versionId);
+
     const editButton = row.querySelector(".edit-requirement-btn");
     if (editButton) {
       editButton.setAttribute("data-version-id", versionId);
@@ -337,6 +352,240 @@ function openEditModal(reqId, versionId) {
   }
 }
 
+// Inline edits are queued per version and sent together: every
+// EDIT_FLUSH_DELAY ms at most one request with one JSON merge patch per
+// version (null removes a column). Each patch carries the fingerprint the
+// version was loaded with; if the version changed on the server in the
+// meantime, the server applies nothing and answers 409 with its state.
+const EDIT_FLUSH_DELAY = 300;
+const pendingEdits = new Map(); // versionId -> {column: value}
+let editFlushTimer = null;
+let editRequestRunning = false;
+// Set if the page is left while a request is running: the queue is sent
+// once that request has returned the new fingerprints
+let flushAfterRequest = false;
+
+function getVersionDataElement(versionId) {
+  return document.querySelector(`.version-data[data-version-id="${versionId}"]`);
+}
+
+function getVersionCustomData(versionEl) {
+  try {
+    const customDataStr = versionEl.getAttribute("data-custom-data");
+    if (customDataStr && customDataStr.trim() !== "" && customDataStr !== "null") {
+      return JSON.parse(customDataStr);
+    }
+  } catch (e) {}
+  return {};
+}
+
+// Queue a change of one custom column
+function queueCustomDataEdit(versionId, column, value) {
+  versionId = String(versionId);
+  const patch = pendingEdits.get(versionId) || {};
+  patch[column] = value;
+  pendingEdits.set(versionId, patch);
+
+  // Keep the local copy current so switching versions shows the edit
+  const versionEl = getVersionDataElement(versionId);
+  if (versionEl) {
+    const customData = getVersionCustomData(versionEl);
+    if (value === null) {
+      delete customData[column];
+    } else {
+      customData[column] = value;
+    }
+    versionEl.setAttribute("data-custom-data", JSON.stringify(customData));
+  }
+  scheduleEditFlush();
+}
+
+function scheduleEditFlush() {
+  if (editFlushTimer === null) {
+    editFlushTimer = setTimeout(function () {
+      editFlushTimer = null;
+      flushEditQueue(false);
+    }, EDIT_FLUSH_DELAY);
+  }
+}
+
+// Send all queued edits in one request
+function flushEditQueue(leavingPage) {
+  if (pendingEdits.size === 0) {
+    return;
+  }
+  if (editRequestRunning) {
+    flushAfterRequest = flushAfterRequest || leavingPage;
+    return;
+  }
+
+  const batch = new Map(pendingEdits);
+  pendingEdits.clear();
+  const versions = [];
+  batch.forEach((patch, versionId) => {
+    const versionEl = getVersionDataElement(versionId);
+    versions.push({
+      version_id: Number(versionId),
+      fingerprint: versionEl ? versionEl.getAttribute("data-fingerprint") : "",
+      patch: patch,
+    });
+  });
+
+  editRequestRunning = true;
+  let sendRest = true;
+  fetch(window.PROJECT_CUSTOM_DATA_URL, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ versions: versions }),
+    keepalive: leavingPage,
+  })
+    .then((response) => response.json().then((data) => ({ status: response.status, data: data })))
+    .then(({ status, data }) => {
+      if (data.ok) {
+        data.versions.forEach(applyServerVersionState);
+      } else if (status === 409) {
+        // Changed versions take the server state and lose their edits;
+        // the others are sent again (newer queued edits win)
+        const conflicted = new Set(data.conflicts.map((state) => String(state.version_id)));
+        data.conflicts.forEach(applyServerVersionState);
+        conflicted.forEach((versionId) => pendingEdits.delete(versionId));
+        requeueEdits(batch, conflicted);
+        showEditMessage(
+          "Einige Anforderungen wurden zwischenzeitlich geändert oder blockiert. Ihre Änderungen daran wurden verworfen, die aktuellen Werte werden angezeigt."
+        );
+      } else {
+        showEditMessage(`Änderungen konnten nicht gespeichert werden: ${data.error}`);
+      }
+    })
+    .catch((error) => {
+      // Network error or no JSON answer (e.g. 403, 413): keep the edits and
+      // send them with the next change instead of retrying right away
+      console.error("Error:", error);
+      requeueEdits(batch, new Set());
+      sendRest = false;
+      showEditMessage(
+        "Änderungen konnten nicht gespeichert werden. Sie werden mit der nächsten Änderung erneut gesendet."
+      );
+    })
+    .finally(() => {
+      editRequestRunning = false;
+      if (flushAfterRequest) {
+        flushAfterRequest = false;
+        flushEditQueue(true);
+      } else if (sendRest && pendingEdits.size > 0) {
+        scheduleEditFlush();
+      }
+    });
+}
+
+// Put the edits of a failed request back into the queue (newer queued edits win)
+function requeueEdits(batch, skipped) {
+  batch.forEach((patch, versionId) => {
+    if (!skipped.has(versionId)) {
+      pendingEdits.set(versionId, Object.assign({}, patch, pendingEdits.get(versionId)));
+    }
+  });
+}
+
+// Store the server state of a version and refresh its row if it is shown
+function applyServerVersionState(state) {
+  const versionEl = getVersionDataElement(state.version_id);
+  if (!versionEl || state.missing) {
+    return;
+  }
+  const customData = Object.assign({}, state.custom_data);
+  // Edits queued after this request was sent stay visible
+  const queued = pendingEdits.get(String(state.version_id)) || {};
+  Object.entries(queued).forEach(([column, value]) => {
+    if (value === null) {
+      delete customData[column];
+    } else {
+      customData[column] = value;
+    }
+  });
+  versionEl.setAttribute("data-custom-data", JSON.stringify(customData));
+  versionEl.setAttribute("data-fingerprint", state.fingerprint);
+  versionEl.setAttribute("data-blocked", state.blocked ? "true" : "false");
+
+  const row = versionEl.closest("tr");
+  if (
+    row &&
+    row.getAttribute("data-version-id") === String(state.version_id) &&
+    !row.querySelector('[contenteditable="true"]')
+  ) {
+    updateRowWithVersionData(row.getAttribute("data-req-id"), versionEl.getAttribute("data-version-index"));
+    updateQuantifizierbarButtons(row, customData.quantifizierbar);
+  }
+}
+
+function showEditMessage(message) {
+  const alert = document.createElement("div");
+  alert.className = "alert alert-warning alert-dismissible fade show";
+  alert.setAttribute("role", "alert");
+  alert.textContent = message;
+  const closeButton = document.createElement("button");
+  closeButton.type = "button";
+  closeButton.className = "btn-close";
+  closeButton.setAttribute("data-bs-dismiss", "alert");
+  closeButton.setAttribute("aria-label", "Close");
+  alert.appendChild(closeButton);
+  document.querySelector("main").prepend(alert);
+}
+
+// Edit a custom column cell in place; Enter or leaving the cell queues the change
+function startCellEdit(cell) {
+  const row = cell.closest("tr");
+  const versionId = row.getAttribute("data-version-id");
+  const versionEl = getVersionDataElement(versionId);
+  if (!versionEl || versionEl.getAttribute("data-blocked") === "true" || cell.isContentEditable) {
+    return;
+  }
+
+  const column = cell.getAttribute("data-column");
+  const original = getVersionCustomData(versionEl)[column];
+  cell.textContent = original || "";
+  cell.contentEditable = "true";
+  cell.focus();
+
+  function finish(save) {
+    cell.removeEventListener("keydown", onKeydown);
+    cell.removeEventListener("blur", onBlur);
+    cell.contentEditable = "false";
+    const value = cell.textContent.trim();
+    if (save && value !== (original || "")) {
+      queueCustomDataEdit(versionId, column, value === "" ? null : value);
+      cell.textContent = value || "–";
+    } else {
+      cell.textContent = original || "–";
+    }
+  }
+  function onKeydown(e) {
+    if (e.key === "Enter") {
+      e.preventDefault();
+      cell.blur();
+    } else if (e.key === "Escape") {
+      finish(false);
+    }
+  }
+  function onBlur() {
+    finish(true);
+  }
+  cell.addEventListener("keydown", onKeydown);
+  cell.addEventListener("blur", onBlur);
+}
+
+// Update the ja/nein buttons of a row
+function updateQuantifizierbarButtons(row, value) {
+  row.querySelectorAll(".quantifizierbar-btn").forEach((btn) => {
+    btn.classList.remove("btn-success", "btn-danger", "btn-outline-success", "btn-outline-danger", "active");
+    if (btn.dataset.value === value) {
+      btn.classList.add("active", value === "ja" ? "btn-success" : "btn-danger");
+    } else {
+      btn.classList.add(btn.dataset.value === "ja" ? "btn-outline-success" : "btn-outline-danger");
+    }
+  });
+}
+
 // Initialize on DOMContentLoaded
 document.addEventListener("DOMContentLoaded", function () {
   attachEventListeners();
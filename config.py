@@ -7,13 +7,95 @@ SYSTEM_PROMPT_PATH = os.getenv('SYSTEM_PROMPT_PATH')
 SYSTEM_PROMPT = os.getenv('SYSTEM_PROMPT')
 
 # Available AI Models for selection
+# "response_format" describes how the model can be forced to answer with JSON:
+#   "json_schema" - Structured Outputs with a JSON schema built from the columns
+#   "json_object" - JSON mode (valid JSON, no schema)
+#   None          - plain prompt, JSON is extracted from the text
 AVAILABLE_AI_MODELS = [
-    {"id": "gpt-4o-mini", "name": "GPT-4o Mini (Schnell & Günstig)", "description": "Empfohlen für die meisten Aufgaben"},
-    {"id": "gpt-4o", "name": "GPT-4o (Leistungsstark)", "description": "Bessere Qualität, höhere Kosten"},
-    {"id": "gpt-4-turbo", "name": "GPT-4 Turbo", "description": "Sehr hohe Qualität"},
-    {"id": "gpt-3.5-turbo", "name": "GPT-3.5 Turbo (Schnell)", "description": "Schnell und kostengünstig"},
+    {"id": "gpt-4o-mini", "name": "GPT-4o Mini (Schnell & Günstig)", "description": "Empfohlen für die meisten Aufgaben", "response_format": "json_schema"},
+    {"id": "gpt-4o", "name": "GPT-4o (Leistungsstark)", "description": "Bessere Qualität, höhere Kosten", "response_format": "json_schema"},
+    {"id": "gpt-4-turbo", "name": "GPT-4 Turbo", "description": "Sehr hohe Qualität", "response_format": "json_object"},
+    {"id": "gpt-3.5-turbo", "name": "GPT-3.5 Turbo (Schnell)", "description": "Schnell und kostengünstig", "response_format": "json_object"},
 ]
 
+
+def get_response_format_mode(model):
+    """
+    Get the JSON output mode supported by a model.
+
+    Dated snapshots (e.g. 'gpt-4o-2024-08-06') inherit the mode of their base model.
+
+    Args:
+        model (str): Model id
+
+    Returns:
+        str | None: 'json_schema', 'json_object' or None if unknown
+    """
+    if not model:
+        return None
+    # Longest id first so 'gpt-4o-mini-...' does not match 'gpt-4o'
+    for entry in sorted(AVAILABLE_AI_MODELS, key=lambda m: len(m["id"]), reverse=True):
+        if model == entry["id"] or model.startswith(entry["id"] + "-"):
+            return entry.get("response_format")
+    return None
+
+# Duplicate detection on import (cosine similarity of hashed n-gram vectors)
+# Matches above SIMILARITY_FLAG_THRESHOLD are reported as possible duplicates,
+# matches above SIMILARITY_MERGE_THRESHOLD become a new version of the existing
+# requirement if SIMILARITY_AUTO_MERGE is enabled.
+SIMILARITY_FLAG_THRESHOLD = float(os.getenv('SIMILARITY_FLAG_THRESHOLD', '0.75'))
+SIMILARITY_MERGE_THRESHOLD = float(os.getenv('SIMILARITY_MERGE_THRESHOLD', '0.9'))
+SIMILARITY_AUTO_MERGE = os.getenv('SIMILARITY_AUTO_MERGE', 'false').lower() in ('1', 'true', 'yes')
+
+# Retrieval of related requirements for regeneration prompts
+# EMBEDDING_BACKEND: 'hashing' (local, deterministic) or 'openai'
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'hashing')
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
+# Directory for memory-mapped indexes; unset keeps indexes in memory only
+VECTOR_INDEX_DIR = os.getenv('VECTOR_INDEX_DIR')
+RAG_TOP_K = int(os.getenv('RAG_TOP_K', '5'))
+RAG_TOKEN_BUDGET = int(os.getenv('RAG_TOKEN_BUDGET', '600'))
+
+# Storage of requirement versions: 'full' keeps every version as a complete copy,
+# 'delta' stores older versions as compressed patches against the next version
+# and keeps every VERSION_SNAPSHOT_INTERVAL-th version (and the latest) in full.
+VERSION_STORAGE = os.getenv('VERSION_STORAGE', 'full')
+VERSION_SNAPSHOT_INTERVAL = int(os.getenv('VERSION_SNAPSHOT_INTERVAL', '10'))
+
+# Seconds a logged-in user's identity and project access set are cached per
+# process (0 disables the cache)
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '60'))
+
+# Password hashing: any Werkzeug method string, e.g. 'scrypt:32768:8:1' (default)
+# or 'pbkdf2:sha256:600000'. Existing hashes are upgraded on the next login.
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+# Threads reserved for hashing (default: number of CPU cores)
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '0'))
+
+# gzip compression of text/JSON responses (level 1-9, 0 disables compression)
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))
+# Responses smaller than this (bytes) are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+
+# Background Excel exports: worker threads, exports kept per project, max. age
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))
+EXPORT_KEEP = int(os.getenv('EXPORT_KEEP', '3'))
+EXPORT_MAX_AGE_DAYS = int(os.getenv('EXPORT_MAX_AGE_DAYS', '7'))
+# Directory for export files (empty: the uploads directory next to the app package)
+EXPORT_DIR = os.getenv('EXPORT_DIR', '')
+# Seconds the export request waits before showing the progress page; the
+# request holds a server worker meanwhile, so keep this short
+EXPORT_WAIT_SECONDS = float(os.getenv('EXPORT_WAIT_SECONDS', '0.5'))
+# Failed export jobs are forgotten after this many seconds
+EXPORT_FAILED_TTL = int(os.getenv('EXPORT_FAILED_TTL', '600'))
+
+# Excel uploads with several sheets: parse sheets in worker processes from this file size on
+EXCEL_PARALLEL_MIN_BYTES = int(os.getenv('EXCEL_PARALLEL_MIN_BYTES', str(5 * 1024 * 1024)))
+EXCEL_SHEET_PROCESSES = int(os.getenv('EXCEL_SHEET_PROCESSES', '4'))
+
+# Maximum size of a request (bytes); larger uploads are rejected with 413
+MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', str(32 * 1024 * 1024)))
+
 # Default System Prompt if none provided
 DEFAULT_SYSTEM_PROMPT = """
 Du bist ein erfahrener Requirements Engineer.
@@ -34,6 +116,9 @@ Regeln:
 def get_system_prompt(columns=None):
     """
     Get system prompt, optionally customized for dynamic columns.
+
+    The prompt file (SYSTEM_PROMPT_PATH) is loaded once and reloaded only when
+    its modification time changes; rendered prompts are cached per column tuple.
     
     Args:
         columns (list): Optional list of column names for the project
@@ -41,53 +126,5 @@ def get_system_prompt(columns=None):
     Returns:
         str: System prompt text
     """
-    if SYSTEM_PROMPT_PATH and os.path.exists(SYSTEM_PROMPT_PATH):
-        with open(SYSTEM_PROMPT_PATH, 'r', encoding='utf-8') as f:
-            base_prompt = f.read().strip()
-    elif SYSTEM_PROMPT:
-        base_prompt = SYSTEM_PROMPT
-    else:
-        base_prompt = DEFAULT_SYSTEM_PROMPT
-    
-    # If columns are provided, customize the prompt
-    if columns and isinstance(columns, list):
-        # Build JSON structure based on columns
-        json_fields = []
-        for col in columns:
-            col_lower = col.lower()
-            if col_lower in ['titel', 'title']:
-                json_fields.append(f'"{col}": "Kurzer, prägnanter Titel"')
-            elif col_lower in ['beschreibung', 'description']:
-                json_fields.append(f'"{col}": "Detaillierte Beschreibung mit Akzeptanzkriterien"')
-            elif col_lower in ['kategorie', 'category']:
-                json_fields.append(f'"{col}": "Kategorie (z.B. Funktional, Nicht-Funktional, etc.)"')
-            elif col_lower in ['status']:
-                json_fields.append(f'"{col}": "Offen"')
-            else:
-                json_fields.append(f'"{col}": "Passender Wert für {col}"')
-        
-        json_structure = "{\n      " + ",\n      ".join(json_fields) + "\n    }"
-        
-        custom_prompt = f"""
-Du bist ein erfahrener Requirements Engineer.
-Erzeuge klare, testbare, präzise Software-Anforderungen im JSON-Format.
-
-Das Projekt verwendet folgende Spalten: {', '.join(columns)}
-
-Antworte ausschließlich mit gültigem JSON in folgender Struktur:
-{{
-  "requirements": [
-    {json_structure}
-  ]
-}}
-
-Regeln:
-- Maximiere Klarheit und Testbarkeit (Akzeptanzkriterien implizit in Beschreibung).
-- Verwende kurze, prägnante Titel.
-- Fülle ALLE angegebenen Spalten mit sinnvollen Werten.
-- Wenn Informationen fehlen, triff sinnvolle, konservative Annahmen.
-- Generiere mindestens 3 und maximal 10 Requirements.
-"""
-        return custom_prompt
-    
-    return base_prompt
+    from app.services.prompt_registry import prompt_registry
+    return prompt_registry.render("system", columns if columns and isinstance(columns, list) else None)
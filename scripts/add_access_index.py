@@ -0,0 +1,53 @@
+"""
+Database migration script for project access checks:
+- Add an index on project_user_association.user_id
+  (lists of projects shared with a user, cached access sets)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                print("Creating index ix_project_user_association_user_id...")
+                conn.execute(db.text(
+                    "CREATE INDEX IF NOT EXISTS ix_project_user_association_user_id "
+                    "ON project_user_association (user_id)"
+                ))
+                conn.commit()
+
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Migration failed: {str(e)}")
+            return False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Database Migration: Project Access Index")
+    print("=" * 60)
+    print()
+
+    success = migrate_database()
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed.")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)
@@ -0,0 +1,58 @@
+"""
+Database migration script for cached exports:
+- Add content_version column to project_file
+  (project revision an export was built from)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                result = conn.execute(db.text("PRAGMA table_info(project_file)"))
+                columns = [row[1] for row in result]
+
+                if 'content_version' not in columns:
+                    print("Adding content_version column to project_file table...")
+                    conn.execute(db.text("ALTER TABLE project_file ADD COLUMN content_version INTEGER"))
+                    conn.commit()
+                else:
+                    print("Column content_version already exists")
+
+            # Existing exports have no content version and are never reused;
+            # they are evicted by age and count like new ones
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Migration failed: {str(e)}")
+            return False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Database Migration: Add Export Content Version")
+    print("=" * 60)
+    print()
+
+    success = migrate_database()
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed. Unchanged projects now reuse their last export.")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)
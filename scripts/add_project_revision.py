@@ -0,0 +1,55 @@
+"""
+Database migration script for conditional requests (ETags):
+- Add revision column to project
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                result = conn.execute(db.text("PRAGMA table_info(project)"))
+                columns = [row[1] for row in result]
+
+                if 'revision' not in columns:
+                    print("Adding revision column to project table...")
+                    conn.execute(db.text("ALTER TABLE project ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"))
+                    conn.commit()
+                else:
+                    print("Column revision already exists")
+
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Migration failed: {str(e)}")
+            return False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Database Migration: Add Project Revision")
+    print("=" * 60)
+    print()
+
+    success = migrate_database()
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed. Project pages can now be revalidated via ETag.")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)
@@ -0,0 +1,57 @@
+"""
+Database migration script for upload hashes:
+- Add content_hash column to project_file
+  (SHA-256 of an uploaded file)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                result = conn.execute(db.text("PRAGMA table_info(project_file)"))
+                columns = [row[1] for row in result]
+
+                if 'content_hash' not in columns:
+                    print("Adding content_hash column to project_file table...")
+                    conn.execute(db.text("ALTER TABLE project_file ADD COLUMN content_hash VARCHAR(64)"))
+                    conn.commit()
+                else:
+                    print("Column content_hash already exists")
+
+            # Files uploaded before the migration keep an empty hash
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Migration failed: {str(e)}")
+            return False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Database Migration: Add Upload Hashes")
+    print("=" * 60)
+    print()
+
+    success = migrate_database()
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed. New uploads are stored with their SHA-256.")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)
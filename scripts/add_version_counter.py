@@ -0,0 +1,74 @@
+"""
+Database migration script for concurrency-safe version allocation:
+- Add version_counter column to requirement
+- Initialize it with the highest existing version_index per requirement
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                result = conn.execute(db.text("PRAGMA table_info(requirement)"))
+                columns = [row[1] for row in result]
+
+                if 'version_counter' not in columns:
+                    print("Adding version_counter column to requirement table...")
+                    conn.execute(db.text("ALTER TABLE requirement ADD COLUMN version_counter INTEGER NOT NULL DEFAULT 0"))
+                    conn.commit()
+                else:
+                    print("Column version_counter already exists")
+
+                # allocate_version_index() also catches up on its own; this just
+                # makes the stored counters accurate right away
+                print("Initializing counters...")
+                result = conn.execute(db.text("""
+                    UPDATE requirement SET version_counter = (
+                        SELECT COALESCE(MAX(version_index), 0)
+                        FROM requirement_version
+                        WHERE requirement_version.requirement_id = requirement.id
+                    )
+                    WHERE version_counter < (
+                        SELECT COALESCE(MAX(version_index), 0)
+                        FROM requirement_version
+                        WHERE requirement_version.requirement_id = requirement.id
+                    )
+                """))
+                conn.commit()
+                print(f"  - {result.rowcount} requirements updated")
+
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Migration failed: {str(e)}")
+            return False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Database Migration: Add Requirement Version Counter")
+    print("=" * 60)
+    print()
+
+    success = migrate_database()
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed. Version indexes are now allocated atomically.")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)
@@ -0,0 +1,80 @@
+"""
+Database migration script for delta-encoded version storage:
+- Add delta column to requirement_version
+- Optionally re-encode existing versions:
+    --compact  delta-encode all eligible versions (VERSION_SNAPSHOT_INTERVAL)
+    --expand   store all versions in full again (before switching back to 'full')
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+
+
+def migrate_database(mode=None):
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                result = conn.execute(db.text("PRAGMA table_info(requirement_version)"))
+                columns = [row[1] for row in result]
+
+                if 'delta' not in columns:
+                    print("Adding delta column to requirement_version table...")
+                    conn.execute(db.text("ALTER TABLE requirement_version ADD COLUMN delta BLOB"))
+                    conn.commit()
+                else:
+                    print("Column delta already exists")
+
+            if mode:
+                from app.models import Requirement
+                from app.services.version_storage import compact_requirement, expand_requirement
+
+                action = compact_requirement if mode == '--compact' else expand_requirement
+                print("Compacting versions..." if mode == '--compact' else "Expanding versions...")
+                count = 0
+                for requirement in Requirement.query.all():
+                    count += action(requirement)
+                    db.session.commit()
+                print(f"  - {count} versions re-encoded")
+
+                # Reclaim the freed pages
+                with db.engine.connect() as conn:
+                    conn.execute(db.text("VACUUM"))
+
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Migration failed: {str(e)}")
+            db.session.rollback()
+            return False
+
+
+if __name__ == '__main__':
+    mode = sys.argv[1] if len(sys.argv) > 1 else None
+    if mode not in (None, '--compact', '--expand'):
+        print("Usage: python scripts/add_version_deltas.py [--compact | --expand]")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("Database Migration: Delta-Encoded Version Storage")
+    print("=" * 60)
+    print()
+
+    success = migrate_database(mode)
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed. Set VERSION_STORAGE=delta to encode new versions.")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)
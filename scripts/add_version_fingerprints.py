@@ -0,0 +1,70 @@
+"""
+Database migration script for content fingerprints:
+- Add fingerprint column to requirement_version
+  (hash of the normalized content, used to skip unchanged rows on import)
+- Backfill the fingerprint of all fully stored versions
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import RequirementVersion
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                result = conn.execute(db.text("PRAGMA table_info(requirement_version)"))
+                columns = [row[1] for row in result]
+
+                if 'fingerprint' not in columns:
+                    print("Adding fingerprint column to requirement_version table...")
+                    conn.execute(db.text("ALTER TABLE requirement_version ADD COLUMN fingerprint VARCHAR(40)"))
+                    conn.commit()
+                else:
+                    print("Column fingerprint already exists")
+
+            # Delta-encoded versions are never compared (only the latest version
+            # is) and are hashed on the fly if they become the latest again
+            versions = RequirementVersion.query.filter(
+                RequirementVersion.fingerprint.is_(None),
+                RequirementVersion.delta.is_(None)
+            ).all()
+            for version in versions:
+                version.fingerprint = version.compute_fingerprint()
+            db.session.commit()
+            print(f"Computed fingerprints for {len(versions)} versions")
+
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ Migration failed: {str(e)}")
+            return False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Database Migration: Add Version Fingerprints")
+    print("=" * 60)
+    print()
+
+    success = migrate_database()
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed. Re-imports now skip unchanged rows.")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)
@@ -0,0 +1,67 @@
+"""
+Database migration script for duplicate detection:
+- Add text_vector column to requirement_version
+- Backfill hashed n-gram vectors for existing versions
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                result = conn.execute(db.text("PRAGMA table_info(requirement_version)"))
+                columns = [row[1] for row in result]
+
+                if 'text_vector' not in columns:
+                    print("Adding text_vector column to requirement_version table...")
+                    conn.execute(db.text("ALTER TABLE requirement_version ADD COLUMN text_vector BLOB"))
+                    conn.commit()
+                else:
+                    print("Column text_vector already exists")
+
+            from app.models import RequirementVersion
+
+            print("Backfilling vectors...")
+            count = 0
+            for version in RequirementVersion.query.filter(RequirementVersion.text_vector.is_(None)).yield_per(500):
+                version.update_text_vector()
+                count += 1
+            db.session.commit()
+            print(f"  - {count} versions vectorized")
+
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Migration failed: {str(e)}")
+            db.session.rollback()
+            return False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Database Migration: Add Requirement Text Vectors")
+    print("=" * 60)
+    print()
+
+    success = migrate_database()
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed. Duplicate detection is now enabled.")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)
@@ -0,0 +1,109 @@
+"""
+Benchmark script for bulk requirement mutations:
+- Sets the status of REQUIREMENT_COUNT requirements and one custom column each,
+  once with the single-item routes (one POST and commit per change) and once
+  with one request to /project/<id>/requirements/batch
+- Reports the wall time of both and checks that both leave the same data
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+
+from app import create_app
+
+REQUIREMENT_COUNT = 200
+
+
+def excel_file(count):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Title", "Beschreibung", "Status"])
+    for i in range(count):
+        ws.append([f"Anforderung {i}", f"Beschreibung der Anforderung {i}", "Offen"])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def setup_project(app, client, name):
+    from app.models import Project
+    client.post('/create', data={'project_name': name})
+    with app.app_context():
+        project_id = Project.query.filter_by(name=name).first().id
+    client.post(f'/project/{project_id}/import_excel',
+                data={'excel_file': (excel_file(REQUIREMENT_COUNT), 'bench.xlsx')},
+                content_type='multipart/form-data')
+    return project_id
+
+
+def project_state(app, project_id):
+    from app.models import Requirement, RequirementVersion
+    with app.app_context():
+        return sorted(
+            (version.title, version.status, version.custom_data)
+            for version in RequirementVersion.query.join(Requirement).filter(Requirement.project_id == project_id)
+        )
+
+
+def version_ids(app, project_id):
+    from app.models import Requirement, RequirementVersion
+    with app.app_context():
+        return [
+            version_id for (version_id,) in RequirementVersion.query.join(Requirement)
+            .filter(Requirement.project_id == project_id)
+            .with_entities(RequirementVersion.id).order_by(RequirementVersion.id)
+        ]
+
+
+def run_benchmark():
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}"})
+    client = app.test_client()
+    client.post('/auth/register', data={'email': 'bench@example.com', 'password': 'bench'})
+    client.post('/auth/login', data={'email': 'bench@example.com', 'password': 'bench'})
+
+    single_project = setup_project(app, client, 'Einzeln')
+    batch_project = setup_project(app, client, 'Batch')
+
+    start = time.perf_counter()
+    for version_id in version_ids(app, single_project):
+        client.post(f'/requirement_version/{version_id}/update_status', data={'status': 'Fertig'})
+        client.post(f'/requirement_version/{version_id}/update_custom_data',
+                    data={'column_name': 'Prio', 'value': 'hoch'})
+    single_time = time.perf_counter() - start
+
+    operations = []
+    for version_id in version_ids(app, batch_project):
+        operations.append({'op': 'update_status', 'version_id': version_id, 'status': 'Fertig'})
+        operations.append({'op': 'update_custom_data', 'version_id': version_id, 'column_name': 'Prio', 'value': 'hoch'})
+    start = time.perf_counter()
+    response = client.post(f'/project/{batch_project}/requirements/batch', json={'operations': operations})
+    batch_time = time.perf_counter() - start
+
+    print(f"{REQUIREMENT_COUNT} requirements, {len(operations)} changes")
+    print(f"  single routes: {single_time * 1000:8.1f} ms ({len(operations)} requests)")
+    print(f"  batch:         {batch_time * 1000:8.1f} ms (1 request)")
+    print(f"Speedup: {single_time / batch_time:.1f}x")
+
+    same = project_state(app, single_project) == project_state(app, batch_project)
+    print(f"Results identical: {'yes' if same else 'NO'}")
+    return response.get_json().get('ok') and same
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Benchmark: Batch Requirement Mutations")
+    print("=" * 60)
+    print()
+    success = run_benchmark()
+    print("\n✅ Benchmark completed" if success else "\n❌ Benchmark failed")
+    sys.exit(0 if success else 1)
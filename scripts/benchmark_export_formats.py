@@ -0,0 +1,114 @@
+"""
+Benchmark script for bulk export formats:
+- Writes and reads a table with dynamic columns as xlsx, CSV and columnar (.rqc)
+- Reports rows per second for writing and reading and the bytes on disk
+- Checks that every format reads back the same rows
+"""
+
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+
+from app.services.table_formats import iter_csv, read_table, write_columnar
+
+ROW_COUNT = 20_000
+CUSTOM_COLUMNS = ["Priorität", "Quelle", "Verifikation", "Quantifizierbar"]
+WORDS = ("System Benutzer muss soll Daten Anmeldung Sekunden Export Bericht Sensor "
+         "Temperatur Fehler Meldung innerhalb speichern anzeigen prüfen").split()
+
+
+def sample_table():
+    rng = random.Random(42)
+    headers = ["ID", "title", "description", "category"] + CUSTOM_COLUMNS + ["Version", "Status"]
+    rows = []
+    for i in range(1, ROW_COUNT + 1):
+        rows.append([
+            i,
+            " ".join(rng.choices(WORDS, k=4)),
+            " ".join(rng.choices(WORDS, k=30)),
+            rng.choice(["Funktional", "Performance", "Sicherheit"]),
+            rng.choice(["hoch", "mittel", "niedrig"]),
+            rng.choice(["Lastenheft", "Workshop", "Norm"]),
+            rng.choice(["Test", "Analyse", "Review"]),
+            rng.choice(["ja", "nein"]),
+            rng.choice(["A", "B", "C"]),
+            rng.choice(["Offen", "In Arbeit", "Fertig"]),
+        ])
+    return headers, rows
+
+
+def write_xlsx(headers, rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def write_csv(headers, rows):
+    return b"".join(iter_csv(headers, rows))
+
+
+def write_rqc(headers, rows):
+    buffer = io.BytesIO()
+    write_columnar(headers, rows, buffer)
+    return buffer.getvalue()
+
+
+FORMATS = [
+    ("xlsx", "bench.xlsx", write_xlsx),
+    ("csv", "bench.csv", write_csv),
+    ("rqc", "bench.rqc", write_rqc),
+]
+
+
+def read_back(data, filename):
+    header, rows = read_table(io.BytesIO(data), filename)
+    return list(header), [list(row) for row in rows]
+
+
+def run_benchmark():
+    headers, rows = sample_table()
+    # CSV has no types - compare everything as text
+    expected = [[str(value) for value in row] for row in rows]
+
+    print(f"{ROW_COUNT} rows, {len(headers)} columns\n")
+    print(f"  {'format':6s} {'write rows/s':>14s} {'read rows/s':>14s} {'size':>12s}   round trip")
+    results = {}
+    all_ok = True
+    for name, filename, write in FORMATS:
+        start = time.perf_counter()
+        data = write(headers, rows)
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        header, read_rows = read_back(data, filename)
+        read_time = time.perf_counter() - start
+
+        ok = header == headers and [[str(value) for value in row] for row in read_rows] == expected
+        results[name] = len(data)
+        all_ok = all_ok and ok
+        print(f"  {name:6s} {ROW_COUNT / write_time:14,.0f} {ROW_COUNT / read_time:14,.0f} "
+              f"{len(data) / 1024:9.1f} KB   {'✅' if ok else '❌'}")
+
+    print(f"\nSize relative to xlsx: csv {results['csv'] / results['xlsx']:.0%}, "
+          f"rqc {results['rqc'] / results['xlsx']:.0%}")
+    return all_ok
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Benchmark: Export Formats")
+    print("=" * 60)
+    print()
+    success = run_benchmark()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,105 @@
+"""
+Fuzz and benchmark script for the JSON extraction in ai_client._parse_json_response:
+- Feeds well-formed, prose-wrapped and adversarial model outputs to the parser
+- Reports the worst parse time per input class and fails if a bound is exceeded
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ai_client import _parse_json_response
+
+# Worst-case time allowed per parse (seconds) for inputs of up to ~1 MB
+TIME_BOUND = 1.0
+FUZZ_ROUNDS = 300
+
+
+def valid_payload(count=20):
+    items = ",".join(
+        '{"title": "Anforderung %d {x}", "description": "Das System muss [%d] \\"Dinge\\" tun."}' % (i, i)
+        for i in range(count)
+    )
+    return '{"requirements": [%s]}' % items
+
+
+def adversarial_inputs():
+    n = 200_000
+    payload = valid_payload()
+    return {
+        "plain json": payload,
+        "prose wrapped": "Hier ist das Ergebnis:\n```json\n" + payload + "\n```\nViel Erfolg!",
+        "array only": "Antwort: [" + payload[len('{"requirements": ['):-1],
+        "unclosed braces": "{" * n,
+        "unclosed brackets": "[" * n,
+        "nested arrays of objects": "[{" * (n // 2),
+        "repeated keys": '{"requirements": ' * (n // 16),
+        "unterminated string": '{"requirements": "' + "x" * n,
+        "quote storm": '"' * n,
+        "brace soup": "{}[]{[}]" * (n // 8),
+        "prose before valid": "Text {mit} [Klammern] " * (n // 24) + payload,
+        "example arrays before valid": 'Beispiel: [{"a": 1}] ' * 100 + payload,
+        "long prose": "Lorem ipsum dolor sit amet. " * (n // 28),
+    }
+
+
+def random_noise(rng, length):
+    alphabet = '{}[]":,\\ ab01\n' + "requirements"
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def timed_parse(text):
+    start = time.perf_counter()
+    try:
+        _parse_json_response(text)
+        ok = True
+    except RuntimeError:
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+def run_benchmark():
+    worst = 0.0
+
+    print(f"{'Input':<28}{'Length':>10}{'Parsed':>8}{'Time (ms)':>12}")
+    for name, text in adversarial_inputs().items():
+        ok, elapsed = timed_parse(text)
+        worst = max(worst, elapsed)
+        print(f"{name:<28}{len(text):>10}{str(ok):>8}{elapsed * 1000:>12.2f}")
+
+    rng = random.Random(42)
+    fuzz_worst = 0.0
+    for _ in range(FUZZ_ROUNDS):
+        text = random_noise(rng, rng.randint(1, 20_000))
+        # Occasionally splice a valid payload into the noise
+        if rng.random() < 0.3:
+            pos = rng.randint(0, len(text))
+            text = text[:pos] + valid_payload(3) + text[pos:]
+        _, elapsed = timed_parse(text)
+        fuzz_worst = max(fuzz_worst, elapsed)
+    worst = max(worst, fuzz_worst)
+    print(f"{'random fuzz (x%d)' % FUZZ_ROUNDS:<28}{'<=20000':>10}{'-':>8}{fuzz_worst * 1000:>12.2f}")
+
+    return worst
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Benchmark: JSON extraction from model output")
+    print("=" * 60)
+    print()
+
+    worst = run_benchmark()
+
+    print()
+    print("=" * 60)
+    if worst <= TIME_BOUND:
+        print(f"✅ Worst parse time {worst * 1000:.2f} ms (bound {TIME_BOUND * 1000:.0f} ms)")
+        print("=" * 60)
+    else:
+        print(f"❌ Worst parse time {worst * 1000:.2f} ms exceeds bound {TIME_BOUND * 1000:.0f} ms")
+        print("=" * 60)
+        sys.exit(1)
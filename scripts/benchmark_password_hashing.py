@@ -0,0 +1,90 @@
+"""
+Benchmark script for password hashing:
+- Measures hash verifications per second on one core for several methods
+- Measures full /auth/login requests per second with the configured method
+- Checks that a hash with outdated parameters is upgraded after login
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import config
+
+METHODS = [
+    "scrypt:32768:8:1",       # Werkzeug default
+    "scrypt:16384:8:1",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:200000",
+]
+MIN_DURATION = 1.0  # seconds per measurement
+LOGIN_COUNT = 20
+
+
+def verifications_per_second(method):
+    pwhash = generate_password_hash("benchmark-password", method)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < MIN_DURATION:
+        check_password_hash(pwhash, "benchmark-password")
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def login_benchmark():
+    from app import create_app, db
+    from app.models import User
+
+    workdir = tempfile.mkdtemp()
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}"})
+    client = app.test_client()
+    client.post('/auth/register', data={'email': 'bench@example.com', 'password': 'benchmark-password'})
+
+    start = time.perf_counter()
+    for _ in range(LOGIN_COUNT):
+        response = client.post('/auth/login', data={'email': 'bench@example.com', 'password': 'benchmark-password'})
+        assert response.status_code == 302, response.status_code
+        client.get('/auth/logout')
+    rate = LOGIN_COUNT / (time.perf_counter() - start)
+
+    # Store a hash with outdated parameters and log in once
+    with app.app_context():
+        user = User.query.filter_by(email='bench@example.com').first()
+        user.password_hash = generate_password_hash('benchmark-password', 'pbkdf2:sha256:1000')
+        db.session.commit()
+    client.post('/auth/login', data={'email': 'bench@example.com', 'password': 'benchmark-password'})
+    upgraded = False
+    for _ in range(100):
+        with app.app_context():
+            stored = User.query.filter_by(email='bench@example.com').first().password_hash
+        if stored.startswith(config.PASSWORD_HASH_METHOD + "$"):
+            upgraded = True
+            break
+        time.sleep(0.05)
+    return rate, upgraded
+
+
+def run_benchmark():
+    print("Hash verifications per second (one core):")
+    for method in METHODS:
+        marker = " (configured)" if method == config.PASSWORD_HASH_METHOD else ""
+        print(f"  {method:24s} {verifications_per_second(method):8.1f}/s{marker}")
+
+    rate, upgraded = login_benchmark()
+    print(f"\n/auth/login with {config.PASSWORD_HASH_METHOD}: {rate:.1f} logins/s (single client)")
+    print(f"Outdated hash upgraded after login: {'yes' if upgraded else 'NO'}")
+    return upgraded
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Benchmark: Password Hashing")
+    print("=" * 60)
+    print()
+    success = run_benchmark()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,100 @@
+"""
+Benchmark script for semantic duplicate detection:
+- Builds a similarity index over 50,000 synthetic requirement versions
+- Measures vectorization, index construction and per-query latency
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.similarity_service import (
+    SimilarityIndex, text_vector, vector_from_bytes, vector_to_bytes, VECTOR_DIM, VECTOR_DTYPE
+)
+
+VERSION_COUNT = 50_000
+QUERY_COUNT = 200
+QUERY_BOUND = 0.1  # seconds per query
+
+VOCABULARY = [
+    "system", "muss", "benutzer", "anmeldung", "daten", "speichern", "export", "bericht",
+    "sekunden", "verfügbarkeit", "schnittstelle", "sensor", "akku", "ladezeit", "display",
+    "fehler", "meldung", "protokoll", "sicherheit", "verschlüsselung", "rolle", "rechte",
+    "geschwindigkeit", "bremse", "motor", "temperatur", "warnung", "update", "netzwerk",
+]
+
+
+def random_requirement(rng):
+    title = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(3, 6)))
+    description = "Das System muss " + " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(15, 40)))
+    return title, description
+
+
+def run_benchmark():
+    rng = random.Random(7)
+    texts = [random_requirement(rng) for _ in range(VERSION_COUNT)]
+
+    start = time.perf_counter()
+    blobs = [vector_to_bytes(text_vector(t, d)) for t, d in texts]
+    vectorize_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = np.zeros((VERSION_COUNT, VECTOR_DIM), dtype=VECTOR_DTYPE)
+    for idx, blob in enumerate(blobs):
+        matrix[idx] = vector_from_bytes(blob)
+    index = SimilarityIndex(list(range(1, VERSION_COUNT + 1)), matrix)
+    build_time = time.perf_counter() - start
+
+    queries = []
+    for _ in range(QUERY_COUNT):
+        title, description = texts[rng.randrange(VERSION_COUNT)]
+        # Reword slightly: drop one word and swap the title order
+        words = description.split()
+        words.pop(rng.randrange(len(words)))
+        queries.append(text_vector(" ".join(reversed(title.split())), " ".join(words)))
+
+    latencies = []
+    for vector in queries:
+        start = time.perf_counter()
+        index.query(vector, top_k=5, min_score=0.75)
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        'vectorize': vectorize_time,
+        'build': build_time,
+        'median': latencies[len(latencies) // 2],
+        'p99': latencies[int(len(latencies) * 0.99) - 1],
+        'max': latencies[-1],
+        'matrix_mb': matrix.nbytes / 1024 / 1024,
+    }
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print(f"Benchmark: Similarity search over {VERSION_COUNT:,} versions")
+    print("=" * 60)
+    print()
+
+    results = run_benchmark()
+
+    print(f"Vectorize {VERSION_COUNT:,} texts:  {results['vectorize']:.2f} s (one-time, stored per version)")
+    print(f"Build index from blobs:     {results['build'] * 1000:.1f} ms ({results['matrix_mb']:.1f} MB)")
+    print(f"Query latency median:       {results['median'] * 1000:.2f} ms")
+    print(f"Query latency p99:          {results['p99'] * 1000:.2f} ms")
+    print(f"Query latency max:          {results['max'] * 1000:.2f} ms")
+
+    print()
+    print("=" * 60)
+    if results['max'] <= QUERY_BOUND:
+        print(f"✅ All queries below {QUERY_BOUND * 1000:.0f} ms")
+        print("=" * 60)
+    else:
+        print(f"❌ Slowest query exceeds {QUERY_BOUND * 1000:.0f} ms")
+        print("=" * 60)
+        sys.exit(1)
@@ -0,0 +1,141 @@
+"""
+Benchmark script for delta-encoded version storage:
+- Creates a project with 50 versions per requirement in 'full' and 'delta' mode
+- Compares the SQLite file size (after VACUUM) and the time to read all versions
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+import config
+from app import db
+from app.models import User, Project, Requirement, RequirementVersion, version_label
+
+REQUIREMENT_COUNT = 100
+VERSIONS_PER_REQUIREMENT = 50
+CUSTOM_COLUMNS = ["Priorität", "Verantwortlich", "Quelle", "Testfall", "Risiko", "Kommentar"]
+
+VOCABULARY = [
+    "system", "muss", "benutzer", "anmeldung", "daten", "speichern", "export", "bericht",
+    "sekunden", "verfügbarkeit", "schnittstelle", "sensor", "akku", "ladezeit", "display",
+    "fehler", "meldung", "protokoll", "sicherheit", "verschlüsselung", "rolle", "rechte",
+]
+
+
+def evolve(rng, words):
+    """Small edit as produced by a regeneration or a re-import."""
+    words = list(words)
+    for _ in range(rng.randint(1, 3)):
+        pos = rng.randrange(len(words))
+        action = rng.random()
+        if action < 0.4:
+            words[pos] = rng.choice(VOCABULARY)
+        elif action < 0.7 or len(words) < 20:
+            words.insert(pos, rng.choice(VOCABULARY))
+        else:
+            del words[pos]
+    return words[:300]
+
+
+def populate(mode):
+    config.VERSION_STORAGE = mode
+    rng = random.Random(11)
+    user = User(email=f"bench-{mode}@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    project = Project(name="Benchmark", user_id=user.id)
+    project.set_custom_columns(CUSTOM_COLUMNS)
+    db.session.add(project)
+    db.session.commit()
+
+    start = time.perf_counter()
+    for r in range(REQUIREMENT_COUNT):
+        req = Requirement(project_id=project.id, key=f"req-{r}")
+        db.session.add(req)
+        db.session.flush()
+        words = ["Das", "System", "muss"] + [rng.choice(VOCABULARY) for _ in range(rng.randint(40, 120))]
+        data = {column: " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 8))) for column in CUSTOM_COLUMNS}
+        for idx in range(1, VERSIONS_PER_REQUIREMENT + 1):
+            words = evolve(rng, words)
+            if rng.random() < 0.3:
+                data[rng.choice(CUSTOM_COLUMNS)] = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 8)))
+            version = RequirementVersion(
+                requirement_id=req.id,
+                version_index=idx,
+                version_label=version_label(idx),
+                title=f"Anforderung {r}",
+                description=" ".join(words)[:2000],
+                category="Funktional",
+                status="Offen",
+                custom_data=json.dumps(data, ensure_ascii=False)
+            )
+            db.session.add(version)
+            # One commit per version, as regenerate_requirement does
+            db.session.commit()
+    return time.perf_counter() - start
+
+
+def read_all():
+    db.session.expire_all()
+    start = time.perf_counter()
+    total = 0
+    for req in Requirement.query.all():
+        for version in req.versions:
+            total += len(version.description) + len(version.custom_data or "")
+    return time.perf_counter() - start, total
+
+
+def run_mode(mode):
+    path = os.path.join(tempfile.mkdtemp(), f"{mode}.db")
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        write_time = populate(mode)
+        read_time, total = read_all()
+        db.session.remove()
+        with db.engine.connect() as conn:
+            conn.execute(db.text("VACUUM"))
+        db.engine.dispose()
+    return os.path.getsize(path), write_time, read_time, total
+
+
+def run_benchmark():
+    version_count = REQUIREMENT_COUNT * VERSIONS_PER_REQUIREMENT
+    print(f"{REQUIREMENT_COUNT} requirements x {VERSIONS_PER_REQUIREMENT} versions "
+          f"(snapshot interval {config.VERSION_SNAPSHOT_INTERVAL})")
+
+    results = {}
+    for mode in ("full", "delta"):
+        size, write_time, read_time, total = run_mode(mode)
+        results[mode] = (size, total)
+        print(f"  {mode:5s}: {size / 1024 / 1024:7.2f} MB, "
+              f"write {version_count / write_time:7.0f} versions/s, "
+              f"read all {read_time * 1000:7.1f} ms")
+
+    if results["full"][1] != results["delta"][1]:
+        print("❌ Materialized text differs between modes")
+        return False
+
+    reduction = 1 - results["delta"][0] / results["full"][0]
+    print(f"Database size reduction: {reduction:.0%}")
+    return True
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Benchmark: Version Storage (full vs. delta)")
+    print("=" * 60)
+    print()
+    success = run_benchmark()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,104 @@
+"""
+Build script for static assets:
+- Copies every file in app/static to app/static/dist/<name>.<hash><ext>
+- Writes gzip (and brotli, if the brotli package is installed) variants
+- Writes app/static/dist/manifest.json, used by asset_url() in the templates
+
+Fingerprinted files never change, so they are served with an immutable
+Cache-Control header. Re-run after changing a static file and restart the app.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+
+# Files smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+
+_CSS_URL = re.compile(r'url\(\s*(["\']?)(?!data:|https?:|/|#)([^"\')]+)\1\s*\)')
+
+
+def rewrite_css_urls(content):
+    """Keep relative url() references pointing next to the original file."""
+    return _CSS_URL.sub(lambda m: f'url({m.group(1)}../{m.group(2)}{m.group(1)})', content)
+
+
+def source_files():
+    for name in sorted(os.listdir(STATIC_DIR)):
+        path = os.path.join(STATIC_DIR, name)
+        if os.path.isfile(path) and not name.startswith('.'):
+            yield name, path
+
+
+def build_assets():
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    manifest = {}
+    total_raw = total_gzip = total_brotli = 0
+    for name, path in source_files():
+        with open(path, 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        if ext == '.css':
+            data = rewrite_css_urls(data.decode('utf-8')).encode('utf-8')
+
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        built_name = f"{stem}.{digest}{ext}"
+        built_path = os.path.join(DIST_DIR, built_name)
+        with open(built_path, 'wb') as f:
+            f.write(data)
+        manifest[name] = f"dist/{built_name}"
+
+        sizes = [len(data)]
+        if ext in COMPRESSIBLE_EXTENSIONS and len(data) >= MIN_COMPRESS_SIZE:
+            # mtime=0 keeps the output reproducible
+            gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+            with open(built_path + '.gz', 'wb') as f:
+                f.write(gzipped)
+            sizes.append(len(gzipped))
+            total_gzip += len(gzipped)
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                with open(built_path + '.br', 'wb') as f:
+                    f.write(compressed)
+                sizes.append(len(compressed))
+                total_brotli += len(compressed)
+        else:
+            total_gzip += len(data)
+            total_brotli += len(data)
+        total_raw += len(data)
+
+        print(f"  {name:28s} -> {built_name:40s} " + " / ".join(f"{size / 1024:7.1f} KB" for size in sizes))
+
+    with open(os.path.join(DIST_DIR, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"\n{len(manifest)} assets, {total_raw / 1024:.1f} KB raw, {total_gzip / 1024:.1f} KB gzip"
+          + (f", {total_brotli / 1024:.1f} KB brotli" if brotli is not None else " (brotli not installed)"))
+    return manifest
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Build: Static Assets")
+    print("=" * 60)
+    print()
+    build_assets()
+    sys.exit(0)
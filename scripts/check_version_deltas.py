@@ -0,0 +1,115 @@
+"""
+Consistency check for delta-encoded versions (VERSION_STORAGE='delta'):
+- Creates requirements whose versions come from separate project files
+- Deletes the file of the newest version and the file of a version in the
+  middle of a delta chain through the delete_project_file route
+- Checks that every remaining version still materializes to its original text
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from app import create_app, db
+
+VERSIONS_PER_REQUIREMENT = 6
+
+
+def description(req_number, idx):
+    return f"Anforderung {req_number}: das System muss Schritt {idx} in {idx * 10} Sekunden abschließen."
+
+
+def populate(app, user_id):
+    """One project with two requirements; version i of both comes from file i."""
+    from app.models import Project, ProjectFile, Requirement, RequirementVersion, version_label
+
+    with app.app_context():
+        project = Project(name="Delta-Prüfung", user_id=user_id)
+        db.session.add(project)
+        db.session.flush()
+        files = []
+        for idx in range(1, VERSIONS_PER_REQUIREMENT + 1):
+            project_file = ProjectFile(project_id=project.id, filename=f"import_{idx}.xlsx",
+                                       filepath=os.path.join(app.instance_path, f"missing_{idx}.xlsx"),
+                                       file_type='upload')
+            db.session.add(project_file)
+            files.append(project_file)
+        requirements = [Requirement(project_id=project.id, key=f"req-{n}") for n in (1, 2)]
+        db.session.add_all(requirements)
+        db.session.commit()
+
+        for idx, project_file in enumerate(files, 1):
+            for number, req in enumerate(requirements, 1):
+                db.session.add(RequirementVersion(
+                    requirement_id=req.id,
+                    version_index=req.allocate_version_index(),
+                    version_label=version_label(idx),
+                    title=f"Anforderung {number}",
+                    description=description(number, idx),
+                    custom_data=f'{{"Schritt": "{idx}"}}',
+                    source_file_id=project_file.id
+                ))
+            # One commit per file, as the upload does
+            db.session.commit()
+        encoded = RequirementVersion.query.filter(RequirementVersion.delta.isnot(None)).count()
+        return [f.id for f in files], encoded
+
+
+def check_versions(app, deleted):
+    """Return the versions whose materialized text differs from the original."""
+    from app.models import Requirement
+
+    errors = []
+    with app.app_context():
+        for number, req in enumerate(Requirement.query.order_by(Requirement.id), 1):
+            for version in req.versions:
+                try:
+                    step = int(version.get_custom_data().get("Schritt", 0))
+                    ok = (step not in deleted and version.description == description(number, step))
+                except ValueError as e:
+                    ok = False
+                    print(f"  {e}")
+                if not ok:
+                    errors.append((number, version.version_label))
+    return errors
+
+
+def run_check():
+    workdir = tempfile.mkdtemp()
+    config.VERSION_STORAGE = 'delta'
+    config.VERSION_SNAPSHOT_INTERVAL = 10
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'check.db')}"})
+    client = app.test_client()
+    client.post('/auth/register', data={'email': 'check@example.com', 'password': 'check'})
+    client.post('/auth/login', data={'email': 'check@example.com', 'password': 'check'})
+
+    from app.models import User
+    with app.app_context():
+        user_id = User.query.filter_by(email='check@example.com').first().id
+    file_ids, encoded = populate(app, user_id)
+    print(f"{2 * VERSIONS_PER_REQUIREMENT} versions, {encoded} delta-encoded")
+
+    deleted = set()
+    # Newest version first, then one in the middle of the remaining chain
+    for step in (VERSIONS_PER_REQUIREMENT, 3):
+        client.post(f'/file/{file_ids[step - 1]}/delete')
+        deleted.add(step)
+        errors = check_versions(app, deleted)
+        print(f"  after deleting file {step}: "
+              f"{'ok' if not errors else f'{len(errors)} versions broken: {errors}'}")
+        if errors:
+            return False
+    return True
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Check: Delta Chains After Deleting Project Files")
+    print("=" * 60)
+    print()
+    success = run_check()
+    print("\n✅ All versions intact" if success else "\n❌ Delta chains broken")
+    sys.exit(0 if success else 1)
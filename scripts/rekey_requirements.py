@@ -0,0 +1,70 @@
+"""
+Database migration script for requirement keys:
+- Recompute requirement.key with the unified normalize_key()
+  (Unicode-aware, German umlauts transliterated instead of collapsed to "_")
+- Resolve key collisions within a project
+- Replace the index on requirement.key with a unique index on (project_id, key)
+
+Keys were derived from the title a requirement was created with, so the new
+key is computed from the title of its first version. If several requirements
+of a project end up with the same key, the oldest one keeps it - imports have
+always matched the oldest one - and the others get "<key>~<id>", which no
+title normalizes to. All keys are written with one executemany UPDATE
+(rekey_requirements() in app/migration.py, shared with the /migrate-now route).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.migration import rekey_requirements
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                # The unique index would reject intermediate states of the update
+                conn.execute(db.text("DROP INDEX IF EXISTS uq_requirement_project_key"))
+                conn.execute(db.text("DROP INDEX IF EXISTS ix_requirement_key"))
+
+                total, updated, collisions = rekey_requirements(conn)
+                print(f"Found {total} requirements")
+                print(f"Updated {updated} keys ({collisions} collisions resolved)")
+
+                print("Creating unique index uq_requirement_project_key...")
+                conn.execute(db.text(
+                    "CREATE UNIQUE INDEX uq_requirement_project_key ON requirement (project_id, key)"
+                ))
+                conn.commit()
+
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Migration failed: {str(e)}")
+            return False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Database Migration: Re-key Requirements")
+    print("=" * 60)
+    print()
+
+    success = migrate_database()
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed. Key lookups now use the unique (project_id, key) index.")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)
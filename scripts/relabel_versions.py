@@ -0,0 +1,71 @@
+"""
+Database migration script for version labels beyond "Z":
+- Widen requirement_version.version_label to VARCHAR(8) (not needed on SQLite)
+- Recompute labels with the bijective base-26 scheme (A..Z, AA, AB, ...)
+
+Labels depend only on version_index, so one UPDATE per distinct index fixes
+all rows at once instead of touching every version individually.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import version_label
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                if db.engine.dialect.name != 'sqlite':
+                    print("Widening version_label column...")
+                    conn.execute(db.text("ALTER TABLE requirement_version ALTER COLUMN version_label TYPE VARCHAR(8)"))
+                    conn.commit()
+
+                indexes = [row[0] for row in conn.execute(
+                    db.text("SELECT DISTINCT version_index FROM requirement_version")
+                )]
+                params = [{'index': index, 'label': version_label(index)} for index in indexes]
+
+                print(f"Relabeling {len(params)} distinct version indexes...")
+                result = conn.execute(
+                    db.text("""
+                        UPDATE requirement_version SET version_label = :label
+                        WHERE version_index = :index AND version_label != :label
+                    """),
+                    params
+                ) if params else None
+                conn.commit()
+                print(f"  - {result.rowcount if result is not None else 0} versions relabeled")
+
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Migration failed: {str(e)}")
+            return False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Database Migration: Relabel Requirement Versions")
+    print("=" * 60)
+    print()
+
+    success = migrate_database()
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed. Version labels continue after Z with AA, AB, ...")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)
@@ -0,0 +1,156 @@
+"""
+Stress test for concurrent version allocation:
+- Runs Excel imports (/project/<id>/import_excel), Excel uploads
+  (/agent/upload_excel/<id>) and regenerations (/requirement/<id>/regenerate)
+  from several threads against the same project
+- The AI calls are replaced by canned results so only the database is exercised
+- Verifies that every operation succeeded and no version index was handed out twice
+"""
+
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+
+from app import create_app, db
+
+THREAD_COUNT = 8
+OPERATIONS_PER_THREAD = 6
+REQUIREMENT_COUNT = 10
+TITLES = [f"Anforderung {i}" for i in range(REQUIREMENT_COUNT)]
+
+
+def excel_file(rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Title", "Beschreibung", "Status"])
+    for row in rows:
+        ws.append(list(row))
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def fake_alternative(context, columns):
+    time.sleep(0.01)
+    return {"title": context["requirement_title"], "description": context["requirement_description"] + " (neu)"}
+
+
+def fake_optimize(existing_requirements, columns, user_description=None, model=None):
+    time.sleep(0.01)
+    return [dict(row) for row in existing_requirements]
+
+
+def login(app, email):
+    client = app.test_client()
+    client.post('/auth/login', data={'email': email, 'password': 'stress'})
+    return client
+
+
+def worker(app, project_id, requirement_ids, seed, results):
+    rng = random.Random(seed)
+    client = login(app, 'stress@example.com')
+    for op in range(OPERATIONS_PER_THREAD):
+        kind = ("import", "upload", "regenerate")[(seed + op) % 3]
+        rows = [(title, f"Beschreibung {title} {seed}-{op}", "Offen") for title in TITLES]
+        if kind == "import":
+            response = client.post(
+                f'/project/{project_id}/import_excel',
+                data={'excel_file': (excel_file(rows), 'stress.xlsx')},
+                content_type='multipart/form-data',
+                follow_redirects=True
+            )
+            ok = response.status_code == 200 and "Import abgeschlossen" in response.get_data(as_text=True)
+            results.append((kind, ok, REQUIREMENT_COUNT if ok else 0))
+        elif kind == "upload":
+            response = client.post(
+                f'/agent/upload_excel/{project_id}',
+                data={'excel_file': (excel_file(rows), 'stress.xlsx')},
+                content_type='multipart/form-data'
+            )
+            ok = response.status_code == 200 and response.get_json().get('ok')
+            results.append((kind, ok, REQUIREMENT_COUNT if ok else 0))
+        else:
+            req_id = rng.choice(requirement_ids)
+            response = client.post(f'/requirement/{req_id}/regenerate', follow_redirects=True)
+            ok = response.status_code == 200 and "erfolgreich generiert" in response.get_data(as_text=True)
+            results.append((kind, ok, 1 if ok else 0))
+        if not ok:
+            print(f"  ❌ {kind} failed: {response.status_code} {response.get_data(as_text=True)[:200]}")
+
+
+def run_stress_test():
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)  # uploaded files are stored relative to the working directory
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'stress.db')}",
+        'WTF_CSRF_ENABLED': False
+    })
+
+    client = app.test_client()
+    client.post('/auth/register', data={'email': 'stress@example.com', 'password': 'stress'})
+    client.post('/auth/login', data={'email': 'stress@example.com', 'password': 'stress'})
+    client.post('/create', data={'project_name': 'Stress'})
+
+    from app.models import Project, Requirement, RequirementVersion
+    with app.app_context():
+        project_id = Project.query.filter_by(name='Stress').first().id
+
+    rows = [(title, f"Beschreibung {title}", "Offen") for title in TITLES]
+    client.post(f'/project/{project_id}/import_excel',
+                data={'excel_file': (excel_file(rows), 'initial.xlsx')},
+                content_type='multipart/form-data')
+    with app.app_context():
+        requirement_ids = [r.id for r in Requirement.query.filter_by(project_id=project_id).all()]
+        initial_versions = RequirementVersion.query.count()
+
+    results = []
+    threads = [
+        threading.Thread(target=worker, args=(app, project_id, requirement_ids, seed, results))
+        for seed in range(THREAD_COUNT)
+    ]
+    start = time.perf_counter()
+    with mock.patch('app.routes.generate_single_requirement_alternative', fake_alternative), \
+            mock.patch('app.agent.optimize_excel_requirements', fake_optimize):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if not r[1]]
+    expected_versions = initial_versions + sum(r[2] for r in results)
+    with app.app_context():
+        total_versions = RequirementVersion.query.count()
+        requirement_count = Requirement.query.filter_by(project_id=project_id).count()
+        lagging = [
+            req.id for req in Requirement.query.filter_by(project_id=project_id).all()
+            if req.versions and req.version_counter < req.versions[-1].version_index
+        ]
+
+    print(f"{len(results)} operations from {THREAD_COUNT} threads in {elapsed:.1f}s")
+    print(f"  failed operations:  {len(failed)}")
+    print(f"  versions:           {total_versions} (expected {expected_versions})")
+    print(f"  requirements:       {requirement_count} (expected {REQUIREMENT_COUNT})")
+    print(f"  lagging counters:   {len(lagging)}")
+
+    return not failed and total_versions == expected_versions and not lagging
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Stress Test: Concurrent Version Allocation")
+    print("=" * 60)
+    print()
+    success = run_stress_test()
+    print("\n✅ No conflicts" if success else "\n❌ Conflicts detected")
+    sys.exit(0 if success else 1)
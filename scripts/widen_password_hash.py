@@ -0,0 +1,77 @@
+"""
+Database migration script for configurable password hashing:
+- Widen user.password_hash from VARCHAR(128) to VARCHAR(256)
+  (scrypt hashes with the configured parameters exceed 128 characters)
+
+SQLite cannot change a column type with ALTER TABLE, so the user table is
+rebuilt: created under a new name with the current schema, filled from the
+old table, and renamed in its place, all in one transaction.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.schema import CreateTable
+
+from app import create_app, db
+from app.models import User
+
+PASSWORD_HASH_TYPE = 'VARCHAR(256)'
+
+
+def migrate_database():
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("Starting database migration...")
+
+            with db.engine.connect() as conn:
+                result = conn.execute(db.text("PRAGMA table_info(user)"))
+                columns = {row[1]: row[2] for row in result}
+
+                if columns.get('password_hash', '').upper() == PASSWORD_HASH_TYPE:
+                    print("Column password_hash is already VARCHAR(256)")
+                else:
+                    print(f"Rebuilding user table (password_hash {columns.get('password_hash')} -> {PASSWORD_HASH_TYPE})...")
+                    foreign_keys = conn.execute(db.text("PRAGMA foreign_keys")).scalar()
+                    conn.execute(db.text("PRAGMA foreign_keys=OFF"))
+                    conn.commit()
+
+                    create_sql = str(CreateTable(User.__table__).compile(dialect=db.engine.dialect))
+                    conn.execute(db.text(create_sql.replace("CREATE TABLE user ", "CREATE TABLE user_new ", 1)))
+                    names = ", ".join(column for column in columns if column in User.__table__.c)
+                    conn.execute(db.text(f'INSERT INTO user_new ({names}) SELECT {names} FROM "user"'))
+                    conn.execute(db.text('DROP TABLE "user"'))
+                    conn.execute(db.text('ALTER TABLE user_new RENAME TO "user"'))
+                    conn.commit()
+
+                    conn.execute(db.text(f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}"))
+                    print(f"Copied {conn.execute(db.text('SELECT COUNT(*) FROM user')).scalar()} users")
+
+            print("\n✅ Migration completed successfully!")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Migration failed: {str(e)}")
+            return False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Database Migration: Widen Password Hash Column")
+    print("=" * 60)
+    print()
+
+    success = migrate_database()
+
+    if success:
+        print("\n" + "=" * 60)
+        print("Migration completed. Hashes of the configured method now fit.")
+        print("=" * 60)
+    else:
+        print("\n" + "=" * 60)
+        print("Migration failed. Please check the error messages above.")
+        print("=" * 60)